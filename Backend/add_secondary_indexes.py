@@ -0,0 +1,31 @@
+# Backend/add_secondary_indexes.py
+# Миграция: создает вторичные индексы, объявленные в моделях (recipes по дате,
+# автору, категории, сложности, времени готовки, просмотрам и лайкам; ratings,
+# comments и recipe_step_images по recipe_id; comments по автору; favorites по
+# пользователю и дате добавления), в уже существующей базе
+# и обновляет статистику планировщика (ANALYZE).
+#
+# Запуск: python add_secondary_indexes.py
+from sqlalchemy import text
+from app import app
+from models.db import db, ensure_indexes
+
+
+def add_secondary_indexes():
+    with app.app_context():
+        db.create_all()
+
+        created = ensure_indexes()
+        if created:
+            print(f"✅ Созданы индексы: {', '.join(created)}")
+        else:
+            print("✅ Все индексы уже существуют")
+
+        if db.engine.dialect.name == 'sqlite':
+            db.session.execute(text("ANALYZE"))
+            db.session.commit()
+            print("✅ Статистика планировщика обновлена (ANALYZE)")
+
+
+if __name__ == '__main__':
+    add_secondary_indexes()
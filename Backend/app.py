@@ -2,38 +2,55 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_cors import cross_origin
 from config import Config
-from flask import send_from_directory
 import os
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
 # Инициализация расширений
-from models.db import db
-db.init_app(app)
-CORS(app, supports_credentials=True)
+from models.db import db, init_engine
+init_engine(app)
+from controllers.pagination import PAGINATION_HEADERS
+CORS(app, supports_credentials=True, expose_headers=PAGINATION_HEADERS)
 
 # Импорт моделей
-from models.user import User, Favorite
+from models.user import User
 from models.recipe import Recipe, Rating, Comment
+from models.version import CollectionVersion
+from models.image import ImageVariant
 
 # Импорт сервисов
-from services.auth_service import AuthService
+from services.auth_service import AuthService, init_session_store
 from services.recipe_service import RecipeService
 from services.comment_service import CommentService
 from services.rating_service import RatingService
-from services.favorite_service import FavoriteService
+from services.favorite_service import FavoriteService, init_favorite_cache
+from services.user_stats_service import UserStatsService
+from services.view_counter import view_counter
+from services.image_service import ImageService, image_pipeline
+from services.replicator import replicator
+from services.leaderboard import leaderboard
+from services.query_plan import query_plan_advisor
 
 # Импорт контроллеров
 from controllers.auth_controller import AuthController
 from controllers.recipe_controller import RecipeController
+from controllers.uploads import send_upload
 
 # Инициализация сервисов
+view_counter.init_app(app)
+image_pipeline.init_app(app)
+replicator.init_app(app)
+leaderboard.init_app(app)
+query_plan_advisor.init_app(app)
+init_session_store(app)
+init_favorite_cache(app)
 auth_service = AuthService()
 recipe_service = RecipeService()
 comment_service = CommentService()
 rating_service = RatingService()
 favorite_service = FavoriteService()
+image_service = ImageService()
 
 # Инициализация контроллеров
 auth_controller = AuthController(auth_service, favorite_service)
@@ -41,10 +58,7 @@ auth_controller = AuthController(auth_service, favorite_service)
 recipe_controller = RecipeController(recipe_service, comment_service, rating_service, auth_service)   # Добавляем auth_service
 
 # Создаем папку для загрузок если её нет
-if not os.path.exists('uploads'):
-    os.makedirs('uploads')
-if not os.path.exists('uploads/recipes'):
-    os.makedirs('uploads/recipes')
+os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'recipes'), exist_ok=True)
 
 @app.route('/')
 def home():
@@ -110,6 +124,7 @@ def init_database():
                 db.session.add(recipe)
             
             db.session.commit()
+            UserStatsService().reconcile()
         
         return jsonify({"message": "Database initialized successfully"})
     
@@ -121,6 +136,10 @@ def init_database():
 def get_recipes():
     return recipe_controller.get_all_recipes()
 
+@app.route('/api/recipes/batch', methods=['GET', 'POST'])
+def get_recipes_batch():
+    return recipe_controller.get_recipes_batch()
+
 @app.route('/api/recipes/<int:recipe_id>', methods=['GET'])
 def get_recipe(recipe_id):
     return recipe_controller.get_recipe(recipe_id)
@@ -129,6 +148,14 @@ def get_recipe(recipe_id):
 def create_recipe():
     return recipe_controller.create_recipe()
 
+@app.route('/api/recipes/popular', methods=['GET'])
+def popular_recipes():
+    return recipe_controller.get_top_recipes('views')
+
+@app.route('/api/recipes/top-liked', methods=['GET'])
+def top_liked_recipes():
+    return recipe_controller.get_top_recipes('likes')
+
 @app.route('/api/recipes/search', methods=['GET'])
 def search_recipes():
     return recipe_controller.search_recipes()
@@ -140,12 +167,12 @@ def filter_recipes():
 # Маршрут для доступа к загруженным файлам
 @app.route('/uploads/recipes/<path:filename>')
 def serve_recipe_image(filename):
-    return send_from_directory('uploads/recipes', filename)
+    return send_upload('recipes', filename)
 
 # Альтернативно, можно создать статическую папку:
 @app.route('/static/recipes/<path:filename>')
 def static_recipe_image(filename):
-    return send_from_directory('uploads/recipes', filename)
+    return send_upload('recipes', filename)
 
 # Маршруты комментариев и оценок
 @app.route('/api/recipes/<int:recipe_id>/comments', methods=['GET'])
@@ -201,6 +228,10 @@ def get_my_recipes():
 def toggle_favorite():
     return auth_controller.toggle_favorite()
 
+@app.route('/api/auth/favorites/check', methods=['GET', 'POST'])
+def check_favorites():
+    return auth_controller.check_favorites()
+
 @app.route('/api/recipes/with-steps', methods=['POST'])
 def create_recipe_with_steps():
     try:
@@ -214,7 +245,7 @@ def create_recipe_with_steps():
             return jsonify({'error': 'Invalid session'}), 401
         
         # Передаем управление в контроллер
-        return recipe_controller.create_recipe_with_steps(user.id)
+        return recipe_controller.create_recipe_with_steps(user)
     except Exception as e:
         print(f"Error in create_recipe_with_steps route: {e}")
         import traceback
@@ -242,7 +273,7 @@ def update_recipe_with_steps(recipe_id):
         print(f"DEBUG: Form data keys: {list(request.form.keys())}")
         print(f"DEBUG: Files keys: {list(request.files.keys())}")
 
-        return recipe_controller.update_recipe_with_steps(recipe_id, user.id)
+        return recipe_controller.update_recipe_with_steps(recipe_id, user)
     except Exception as e:
         print(f"Error in update_recipe_with_steps route: {e}")
         import traceback
@@ -267,14 +298,21 @@ def debug_sessions():
     """Отладочный маршрут для проверки сессий"""
     return jsonify({
         'total_sessions': len(auth_service.sessions),
-        'sessions': list(auth_service.sessions.keys())
+        'sessions': auth_service.sessions.keys()
     })
 
 
+@app.route('/api/admin/recipes/import', methods=['POST'])
+def import_recipes():
+    return recipe_controller.import_recipes()
+
+@app.route('/api/admin/recipes/export', methods=['GET'])
+def export_recipes():
+    return recipe_controller.export_recipes()
+
 @app.route('/api/recipes/user/<int:user_id>', methods=['GET'])
 def get_user_recipes(user_id):
-    recipes = Recipe.query.filter_by(author_id=user_id).all()
-    return jsonify([recipe.to_dict() for recipe in recipes])
+    return recipe_controller.get_user_recipes(user_id)
 
 @app.route('/api/recipes/<int:recipe_id>', methods=['DELETE', 'OPTIONS'])
 @cross_origin(supports_credentials=True)
@@ -299,24 +337,22 @@ def delete_recipe(recipe_id):
 @app.route('/api/users/<int:user_id>', methods=['GET', 'PUT'])
 def user_profile(user_id):
     if request.method == 'GET':
-        # Получение данных пользователя
-        user = User.query.get(user_id)
+        # Данные и статистика пользователя - одна выборка по первичному ключу
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Получаем статистику
-        recipes_count = Recipe.query.filter_by(author_id=user_id).count()
-        favorites_count = Favorite.query.filter_by(user_id=user_id).count()
-        
         return jsonify({
             'id': user.id,
             'username': user.username,
             'email': user.email,
             'bio': user.bio if hasattr(user, 'bio') else '',
-            'avatar_url': user.avatar_url if hasattr(user, 'avatar_url') else None,
+            **user.avatar_fields(),
             'created_at': user.created_at.isoformat() if user.created_at else None,
-            'recipes_count': recipes_count,
-            'favorites_count': favorites_count
+            'recipes_count': user.recipes_count or 0,
+            'favorites_count': user.favorites_count or 0,
+            'comments_count': user.comments_count or 0,
+            'ratings_given': user.ratings_given or 0
         })
     
     elif request.method == 'PUT':
@@ -330,6 +366,9 @@ def user_profile(user_id):
             return jsonify({'error': 'Unauthorized'}), 403
         
         try:
+            # Снимок из кэша другого воркера мог устареть - правим свежую строку
+            db.session.refresh(user)
+            
             # Обновляем email и bio
             if 'email' in request.form:
                 user.email = request.form['email']
@@ -355,37 +394,22 @@ def user_profile(user_id):
             if 'avatar' in request.files:
                 avatar_file = request.files['avatar']
                 if avatar_file and avatar_file.filename:
-                    # Сохраняем аватар
-                    import os
-                    from werkzeug.utils import secure_filename
-                    from datetime import datetime
-                    import uuid
-                    
-                    # Создаем уникальное имя файла
-                    file_ext = avatar_file.filename.rsplit('.', 1)[1].lower() if '.' in avatar_file.filename else ''
-                    if file_ext not in ['png', 'jpg', 'jpeg', 'gif']:
+                    # Сохраняем аватар, варианты строятся в фоне
+                    avatar_url = image_service.save_upload(avatar_file, 'avatars', prefix='avatar_')
+                    if not avatar_url:
                         return jsonify({'error': 'Недопустимый формат изображения'}), 400
                     
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    unique_id = str(uuid.uuid4())[:8]
-                    filename = f"avatar_{timestamp}_{unique_id}.{file_ext}"
-                    
-                    # Сохраняем файл
-                    upload_folder = 'uploads/avatars'
-                    os.makedirs(upload_folder, exist_ok=True)
-                    file_path = os.path.join(upload_folder, filename)
-                    avatar_file.save(file_path)
-                    
-                    user.avatar_url = f"/uploads/avatars/{filename}"
+                    user.avatar_url = avatar_url
             
             db.session.commit()
+            auth_service.invalidate_user(user.id)
             
             return jsonify({
                 'id': user.id,
                 'username': user.username,
                 'email': user.email,
                 'bio': user.bio if hasattr(user, 'bio') else '',
-                'avatar_url': user.avatar_url if hasattr(user, 'avatar_url') else None
+                **user.avatar_fields()
             })
             
         except Exception as e:
@@ -396,27 +420,12 @@ def user_profile(user_id):
 # Эндпоинт для избранных рецептов
 @app.route('/api/auth/favorite-recipes', methods=['GET'])
 def get_favorite_recipes():
-    session_id = request.cookies.get('session_id')
-    if not session_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = auth_service.get_current_user(session_id)
-    if not user:
-        return jsonify({'error': 'Invalid session'}), 401
-    
-    # Получаем ID избранных рецептов
-    favorites = Favorite.query.filter_by(user_id=user.id).all()
-    favorite_ids = [f.recipe_id for f in favorites]
-    
-    # Получаем рецепты
-    recipes = Recipe.query.filter(Recipe.id.in_(favorite_ids)).all()
-    
-    return jsonify([recipe.to_dict() for recipe in recipes])
+    return auth_controller.get_favorite_recipes()
 
 # Маршрут для загрузки аватаров
 @app.route('/uploads/avatars/<path:filename>')
 def serve_avatar(filename):
-    return send_from_directory('uploads/avatars', filename)
+    return send_upload('avatars', filename)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,63 @@
+# Backend/backfill_image_variants.py
+# Построение уменьшенных копий (thumb/card/full, WebP и JPEG) для файлов,
+# загруженных до появления фоновой обработки изображений. Обходит
+# uploads/recipes и uploads/avatars; файлы, у которых варианты уже есть,
+# пропускаются (--force перестраивает все).
+#
+# Запуск: python backfill_image_variants.py [--force]
+import os
+import sys
+from app import app
+from models.db import db
+from models.image import ImageVariant
+from services.image_service import (
+    Image, ImageService, UPLOAD_FOLDERS, UPLOAD_ROOT, VARIANTS_DIR, generate_variants, path_to_url
+)
+
+
+def iter_uploads():
+    """URL исходных файлов в папках загрузок (без каталогов с вариантами)"""
+    image_service = ImageService()
+    for folder in UPLOAD_FOLDERS:
+        path = os.path.join(UPLOAD_ROOT, folder)
+        if not os.path.isdir(path):
+            continue
+        for name in sorted(os.listdir(path)):
+            file_path = os.path.join(path, name)
+            if name == VARIANTS_DIR or not os.path.isfile(file_path):
+                continue
+            if image_service.allowed_file(name):
+                yield path_to_url(file_path)
+
+
+def backfill_image_variants(force=False):
+    if Image is None:
+        print("❌ Pillow не установлен: pip install Pillow")
+        return
+
+    with app.app_context():
+        db.create_all()
+
+        urls = list(iter_uploads())
+        existing = {
+            row[0] for row in db.session.query(ImageVariant.original_url).distinct()
+        } if not force else set()
+
+        processed, skipped, failed = 0, 0, 0
+        for url in urls:
+            if url in existing:
+                skipped += 1
+                continue
+            try:
+                generate_variants(url)
+                processed += 1
+            except Exception as e:
+                db.session.rollback()
+                failed += 1
+                print(f"❌ {url}: {e}")
+
+        print(f"✅ Обработано: {processed}, пропущено: {skipped}, ошибок: {failed}")
+
+
+if __name__ == '__main__':
+    backfill_image_variants(force='--force' in sys.argv)
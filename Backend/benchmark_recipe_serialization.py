@@ -0,0 +1,81 @@
+# Backend/benchmark_recipe_serialization.py
+# Сравнение сериализации списка рецептов: jsonify(to_dict()) против кэша
+# готового JSON (services/recipe_cache.py). Печатает p50/p99 в миллисекундах.
+#
+# Запуск: python benchmark_recipe_serialization.py [кол-во рецептов] [повторов]
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Отдельная временная база, чтобы не трогать рабочую
+_db_file = os.path.join(tempfile.mkdtemp(), 'serialization_bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_file}'
+
+from flask import jsonify
+from app import app
+from models.db import db
+from models.recipe import Recipe
+from services.recipe_cache import recipe_json_cache
+from services.recipe_service import RecipeService
+
+
+def seed(count):
+    db.drop_all()
+    db.create_all()
+    ingredients = json.dumps([
+        {'name': f'Ингредиент {i}', 'amount': str(i * 10), 'unit': 'г'} for i in range(12)
+    ], ensure_ascii=False)
+    instructions = json.dumps([
+        {'description': f'Шаг {i}: перемешайте и готовьте еще несколько минут'} for i in range(8)
+    ], ensure_ascii=False)
+    db.session.bulk_insert_mappings(Recipe, [
+        {'title': f'Рецепт {i}', 'ingredients': ingredients, 'instructions': instructions,
+         'category': 'Десерты', 'author': 'bench', 'cooking_time': 30}
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index] * 1000
+
+
+def measure(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return percentile(samples, 50), percentile(samples, 99)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    with app.test_request_context():
+        seed(count)
+        recipes = Recipe.query.order_by(Recipe.created_at.desc(), Recipe.id.desc()).all()
+        RecipeService().prime_step_images(recipes)
+
+        # to_dict() печатает отладочный вывод - глушим его, чтобы не мерить print
+        with contextlib.redirect_stdout(io.StringIO()):
+            baseline = measure(lambda: jsonify([r.to_dict() for r in recipes]).get_data(), repeats)
+            recipe_json_cache.clear()
+            recipe_json_cache.encode_many(recipes)  # прогрев
+            cached = measure(lambda: recipe_json_cache.encode_many(recipes), repeats)
+
+    print(f"Рецептов в списке: {count}, повторов: {repeats}")
+    print(f"  jsonify(to_dict):  p50 = {baseline[0]:8.2f} мс   p99 = {baseline[1]:8.2f} мс")
+    print(f"  кэш готового JSON: p50 = {cached[0]:8.2f} мс   p99 = {cached[1]:8.2f} мс")
+    print(f"  ускорение p50: x{baseline[0] / cached[0]:.1f}, p99: x{baseline[1] / cached[1]:.1f}")
+
+
+if __name__ == '__main__':
+    main()
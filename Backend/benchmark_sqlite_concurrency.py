@@ -0,0 +1,136 @@
+# Backend/benchmark_sqlite_concurrency.py
+# Смешанная нагрузка чтение/запись на SQLite: профиль default (журнал отката,
+# настройки драйвера) против tuned (WAL, pragma, пул, read-only соединения для GET).
+# Каждый профиль запускается в отдельном процессе на своей временной базе.
+# Печатает операции в секунду, p50/p99 чтения и число ошибок "database is locked".
+#
+# Запуск: python benchmark_sqlite_concurrency.py [секунд] [читателей] [писателей]
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROFILES = ('default', 'tuned')
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index] * 1000
+
+
+def run_profile(duration, readers, writers):
+    """Выполняется в дочернем процессе: профиль задан через SQLITE_PROFILE"""
+    from app import app
+    from generate_synthetic_data import generate_dataset
+    from models.db import db
+    from models.recipe import Comment
+    from services.recipe_service import RecipeService
+
+    with app.app_context():
+        # Одинаковые данные для обоих профилей: фиксированный seed генератора
+        generate_dataset(
+            {'users': 100, 'recipes': 500, 'comments': 2000, 'ratings': 2000, 'favorites': 1000, 'step_images': 500},
+            log=lambda message: None
+        )
+        user_id = 1
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {'reads': 0, 'writes': 0, 'errors': 0, 'read_latency': []}
+
+    def reader(seed):
+        client = app.test_client()
+        i = seed
+        while not stop.is_set():
+            url = '/api/recipes?limit=20' if i % 2 else f'/api/recipes/{i % 500 + 1}'
+            start = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response.status_code == 200:
+                    stats['reads'] += 1
+                    stats['read_latency'].append(elapsed)
+                else:
+                    stats['errors'] += 1
+            i += 1
+
+    def writer(seed):
+        service = RecipeService()
+        i = seed
+        while not stop.is_set():
+            recipe_id = i % 500 + 1
+            with app.app_context():
+                try:
+                    if i % 2:
+                        ok = service.increment_likes(recipe_id) is not None
+                    else:
+                        db.session.add(Comment(recipe_id=recipe_id, user_id=user_id, text=f'Комментарий {i}'))
+                        db.session.commit()
+                        ok = True
+                except Exception:
+                    db.session.rollback()
+                    ok = False
+            with lock:
+                stats['writes' if ok else 'errors'] += 1
+            i += 1
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    # Рецепты печатают отладочный вывод - глушим его, чтобы не мерить print
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    return {
+        'reads_per_sec': stats['reads'] / duration,
+        'writes_per_sec': stats['writes'] / duration,
+        'errors': stats['errors'],
+        'read_p50': percentile(stats['read_latency'], 50),
+        'read_p99': percentile(stats['read_latency'], 99),
+    }
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    writers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+    results = {}
+    for profile in PROFILES:
+        env = dict(os.environ)
+        env['SQLITE_PROFILE'] = profile
+        env['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'concurrency_bench.db')}"
+        output = subprocess.run(
+            [sys.executable, __file__, '--worker', str(duration), str(readers), str(writers)],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        results[profile] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"Длительность: {duration:.0f} с, читателей: {readers}, писателей: {writers}")
+    for profile, r in results.items():
+        print(f"  {profile:8s} чтений/с = {r['reads_per_sec']:8.1f}   записей/с = {r['writes_per_sec']:7.1f}   "
+              f"чтение p50 = {r['read_p50']:7.2f} мс  p99 = {r['read_p99']:8.2f} мс   ошибок = {r['errors']}")
+    base, tuned = results['default'], results['tuned']
+    total_base = base['reads_per_sec'] + base['writes_per_sec']
+    total_tuned = tuned['reads_per_sec'] + tuned['writes_per_sec']
+    print(f"  суммарная пропускная способность: x{total_tuned / max(total_base, 1e-9):.2f}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        duration, readers, writers = float(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4])
+        print(json.dumps(run_profile(duration, readers, writers)))
+    else:
+        main()
@@ -0,0 +1,84 @@
+# Backend/check_id_validation.py
+# Проверка разбора списков id в /api/auth/favorites/check и /api/recipes/batch:
+# принимаются только настоящие целые (в JSON) и цифры ASCII (в query), все
+# остальное - тело-массив, строка вместо списка, bool, дробные, слишком длинный
+# список - получает 400, а не 500 и не молчаливое приведение типов.
+#
+# Запуск: python check_id_validation.py
+import os
+import sys
+import tempfile
+
+# Отдельная временная база, чтобы не трогать рабочую
+_db_file = os.path.join(tempfile.mkdtemp(), 'id_validation.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_file}'
+
+from app import app
+from controllers.auth_controller import MAX_FAVORITE_CHECK_IDS
+from controllers.recipe_controller import MAX_BATCH_SIZE
+from models.db import db
+from models.recipe import Recipe
+from models.user import User
+
+# (описание, метод, адрес, JSON-тело, ожидаемый статус)
+CASES = [
+    ('избранное: список целых', 'POST', '/api/auth/favorites/check', {'recipe_ids': [1, 2]}, 200),
+    ('избранное: пустой список', 'POST', '/api/auth/favorites/check', {'recipe_ids': []}, 200),
+    ('избранное: GET с цифрами', 'GET', '/api/auth/favorites/check?ids=1,2', None, 200),
+    ('избранное: тело-массив', 'POST', '/api/auth/favorites/check', [1, 2], 400),
+    ('избранное: строка вместо списка', 'POST', '/api/auth/favorites/check', {'recipe_ids': '12'}, 400),
+    ('избранное: bool и дробные', 'POST', '/api/auth/favorites/check', {'recipe_ids': [True, 2.9]}, 400),
+    ('избранное: строки в списке', 'POST', '/api/auth/favorites/check', {'recipe_ids': ['1']}, 400),
+    ('избранное: без recipe_ids', 'POST', '/api/auth/favorites/check', {}, 400),
+    ('избранное: GET не цифры', 'GET', '/api/auth/favorites/check?ids=1,x', None, 400),
+    ('избранное: GET отрицательный', 'GET', '/api/auth/favorites/check?ids=-1', None, 400),
+    ('избранное: GET не ASCII', 'GET', '/api/auth/favorites/check?ids=١', None, 400),
+    ('избранное: слишком много id', 'POST', '/api/auth/favorites/check',
+     {'recipe_ids': list(range(1, MAX_FAVORITE_CHECK_IDS + 2))}, 400),
+    ('batch: список целых', 'POST', '/api/recipes/batch', {'ids': [1, 2]}, 200),
+    ('batch: тело-массив', 'POST', '/api/recipes/batch', [1, 2], 400),
+    ('batch: bool и дробные', 'POST', '/api/recipes/batch', {'ids': [True, 2.9]}, 400),
+    ('batch: GET не цифры', 'GET', '/api/recipes/batch?ids=1,x', None, 400),
+    ('batch: слишком много id', 'POST', '/api/recipes/batch', {'ids': list(range(1, MAX_BATCH_SIZE + 2))}, 400),
+]
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    user = User(username='ids', email='ids@example.com')
+    user.set_password('ids12345')
+    db.session.add(user)
+    db.session.add_all([Recipe(title=f'Рецепт {n}', ingredients='Соль', author='Гость') for n in (1, 2)])
+    db.session.commit()
+
+
+def main():
+    with app.app_context():
+        seed()
+
+    client = app.test_client()
+    login = client.post('/api/auth/login', json={'username': 'ids', 'password': 'ids12345'})
+    if login.status_code != 200:
+        print(f"❌ Не удалось войти: {login.status_code}")
+        sys.exit(1)
+
+    failed = False
+    for name, method, url, body, expected in CASES:
+        response = client.open(url, method=method, json=body)
+        ok = response.status_code == expected
+        failed = failed or not ok
+        print(f"{'✅' if ok else '❌'} {name}: {response.status_code} (ожидался {expected})")
+
+    flags = client.post('/api/auth/favorites/check', json={'recipe_ids': [1, 2]}).get_json()
+    if flags != {'favorites': {'1': False, '2': False}}:
+        failed = True
+        print(f"❌ избранное: неверный ответ {flags}")
+
+    if failed:
+        sys.exit(1)
+    print("\n🎉 Некорректные списки id отклоняются с 400")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# Backend/check_import_roundtrip.py
+# Проверка, что выгрузка рецептов в NDJSON и обратная загрузка сохраняют
+# рецепты без изменений: гостевые рецепты, пустые (null) поля, JSON-ингредиенты
+# и авторов-пользователей.
+#
+# Запуск: python check_import_roundtrip.py
+import io
+import json
+import os
+import sys
+import tempfile
+
+# Отдельная временная база, чтобы не трогать рабочую
+_db_file = os.path.join(tempfile.mkdtemp(), 'import_roundtrip.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_file}'
+
+from app import app
+from models.db import db
+from models.recipe import Recipe, RecipeIngredient
+from models.user import User
+from services.recipe_import_service import EXPORT_COLUMNS, RecipeImportService
+
+# Поля, которые импорт обязан воспроизвести (id, рейтинг и updated_at назначаются заново)
+COMPARED = [name for name in EXPORT_COLUMNS if name not in ('id', 'rating', 'rating_count', 'updated_at')]
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+
+    user = User(username='roundtrip', email='roundtrip@example.com')
+    user.set_password('roundtrip123')
+    db.session.add(user)
+    db.session.flush()
+
+    db.session.add_all([
+        Recipe(title='Борщ', ingredients='Свекла - 2 шт, Капуста - 300г', instructions='Сварить',
+               category='Супы', cooking_time=90, author=user.username, author_id=user.id, views=12, likes=3),
+        Recipe(title='Блины', ingredients='[{"name": "Мука", "amount": "200", "unit": "г"}]',
+               instructions='[{"description": "Смешать"}]', author='Гость'),
+        Recipe(title='Без полей', ingredients='Соль', instructions=None, category=None, image_url=None,
+               cooking_time=None, servings=None, author='Гость'),
+        Recipe(title='Чужой гость', ingredients='Перец', author='Бабушка'),
+    ])
+    db.session.commit()
+
+
+def snapshot():
+    service = RecipeImportService()
+    return [
+        {name: record[name] for name in COMPARED}
+        for record in map(json.loads, service.export_ndjson())
+    ]
+
+
+def main():
+    with app.app_context():
+        seed()
+        before = snapshot()
+        exported = ''.join(RecipeImportService().export_ndjson()).encode()
+
+        RecipeIngredient.query.delete()
+        Recipe.query.delete()
+        db.session.commit()
+
+        report = RecipeImportService().import_stream(io.BytesIO(exported), 'ndjson')
+        after = snapshot()
+
+    failed = False
+    if report['failed']:
+        failed = True
+        for error in report['errors']:
+            print(f"❌ строка {error['line']}: {error['error']}")
+
+    for old, new in zip(before, after):
+        changed = {name: (old[name], new[name]) for name in COMPARED if old[name] != new[name]}
+        if changed:
+            failed = True
+            print(f"❌ {old['title']}: {changed}")
+    if len(before) != len(after):
+        failed = True
+        print(f"❌ Выгружено {len(before)} рецептов, загружено {len(after)}")
+
+    if failed:
+        sys.exit(1)
+    print(f"🎉 {len(after)} рецептов прошли выгрузку и загрузку без изменений")
+
+
+if __name__ == '__main__':
+    main()
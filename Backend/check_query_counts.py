@@ -0,0 +1,147 @@
+# Backend/check_query_counts.py
+# Проверка, что списочные эндпоинты делают фиксированное число SQL-запросов
+# независимо от размера страницы (нет N+1 по изображениям шагов), а пакетное
+# чтение /api/recipes/batch - независимо от числа id и без записей в базу.
+#
+# Запуск: python check_query_counts.py
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+# Отдельная временная база, чтобы не трогать рабочую
+_db_file = os.path.join(tempfile.mkdtemp(), 'query_counts.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_file}'
+
+from sqlalchemy import event
+from app import app
+from models.db import db
+from models.user import User, Favorite
+from models.recipe import Recipe, RecipeStepImage
+
+SMALL_PAGE = 5
+LARGE_PAGE = 50
+
+
+class QueryCounter:
+    """Считает SQL-выражения, выполненные через все engine приложения (включая read-only)"""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter()
+    engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', counter)
+
+
+def seed(recipes_count=LARGE_PAGE * 2):
+    db.drop_all()
+    db.create_all()
+
+    user = User(username='query_counter', email='query_counter@example.com')
+    user.set_password('counter123')
+    db.session.add(user)
+    db.session.flush()
+
+    for i in range(recipes_count):
+        recipe = Recipe(
+            title=f'Рецепт {i}',
+            ingredients='Мука - 200г, Яйца - 2 шт',
+            instructions='[]',
+            category='Десерты',
+            author=user.username,
+            author_id=user.id
+        )
+        db.session.add(recipe)
+        db.session.flush()
+        for step_index in range(3):
+            db.session.add(RecipeStepImage(
+                recipe_id=recipe.id,
+                step_index=step_index,
+                image_url=f'/uploads/recipes/step_{recipe.id}_{step_index}.jpg'
+            ))
+        db.session.add(Favorite(user_id=user.id, recipe_id=recipe.id))
+
+    db.session.commit()
+    return user
+
+
+def measure(client, url, limit):
+    separator = '&' if '?' in url else '?'
+    with count_queries() as counter:
+        response = client.get(f'{url}{separator}limit={limit}')
+    assert response.status_code == 200, f'{url}: HTTP {response.status_code}'
+    assert len(response.get_json()) == limit, f'{url}: ожидалось {limit} рецептов'
+    return counter.count
+
+
+def measure_batch(client, size):
+    ids = ','.join(str(recipe_id) for recipe_id in range(1, size + 1))
+    with count_queries() as counter:
+        response = client.get(f'/api/recipes/batch?ids={ids}')
+    assert response.status_code == 200, f'/api/recipes/batch: HTTP {response.status_code}'
+    assert len(response.get_json()) == size, f'/api/recipes/batch: ожидалось {size} рецептов'
+    writes = [s for s in counter.statements if not s.lstrip().upper().startswith('SELECT')]
+    return counter.count, writes
+
+
+def main():
+    endpoints = [
+        '/api/recipes',
+        '/api/recipes/search?q=Рецепт',
+        '/api/recipes/filter?category=Десерты',
+        '/api/recipes/user/1',
+        '/api/recipes/my',
+        '/api/auth/favorite-recipes',
+    ]
+
+    with app.app_context():
+        seed()
+
+    client = app.test_client()
+    login = client.post('/api/auth/login', json={'username': 'query_counter', 'password': 'counter123'})
+    assert login.status_code == 200, 'Не удалось войти тестовым пользователем'
+
+    failed = False
+    with app.app_context():
+        for url in endpoints:
+            # Прогрев: ленивые одноразовые действия (например, сборка FTS-индекса)
+            client.get(url)
+            small = measure(client, url, SMALL_PAGE)
+            large = measure(client, url, LARGE_PAGE)
+            if small == large:
+                print(f"✅ {url}: {small} запросов при limit={SMALL_PAGE} и limit={LARGE_PAGE}")
+            else:
+                failed = True
+                print(f"❌ {url}: {small} запросов при limit={SMALL_PAGE}, {large} при limit={LARGE_PAGE}")
+
+        small, small_writes = measure_batch(client, SMALL_PAGE)
+        large, large_writes = measure_batch(client, LARGE_PAGE)
+        if small == large and not small_writes + large_writes:
+            print(f"✅ /api/recipes/batch: {small} запросов при {SMALL_PAGE} и {LARGE_PAGE} id, без записей")
+        else:
+            failed = True
+            print(f"❌ /api/recipes/batch: {small} запросов при {SMALL_PAGE} id, {large} при {LARGE_PAGE}, "
+                  f"записей: {len(small_writes + large_writes)}")
+
+    if failed:
+        sys.exit(1)
+    print("\n🎉 Число запросов не зависит от размера страницы")
+
+
+if __name__ == '__main__':
+    main()
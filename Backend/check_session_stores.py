@@ -0,0 +1,192 @@
+# Backend/check_session_stores.py
+# Проверка хранилищ сессий (services/session_store.py) без внешних серверов:
+# SqlSessionStore - на временной SQLite-базе, RedisSessionStore - на fakeredis,
+# а если он не установлен - на минимальной замене Redis в памяти (FakeRedis ниже).
+# Для каждого хранилища проверяются вход, выход, завершение всех сессий
+# пользователя, истечение по TTL, скользящее продление и keys()/len().
+#
+# Запуск: python check_session_stores.py
+import fnmatch
+import os
+import sys
+import tempfile
+import time
+
+# Отдельная временная база, чтобы не трогать рабочую
+_db_file = os.path.join(tempfile.mkdtemp(), 'session_stores.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_file}'
+
+from app import app
+from models.db import db
+from services.session_store import (
+    MemorySessionStore, RedisSessionStore, SessionStore, SqlSessionStore
+)
+
+TTL = 2
+
+
+class FakeRedis:
+    """Строки с TTL и множества в памяти: ровно то подмножество redis-py, которым пользуется RedisSessionStore"""
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+
+    def _alive(self, key):
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def get(self, key):
+        return str(self._data[key]).encode() if self._alive(key) else None
+
+    def set(self, key, value, ex=None):
+        self._data[key] = value
+        self._expires.pop(key, None)
+        if ex:
+            self._expires[key] = time.time() + ex
+        return True
+
+    def expire(self, key, seconds):
+        if not self._alive(key):
+            return False
+        self._expires[key] = time.time() + seconds
+        return True
+
+    def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                del self._data[key]
+                self._expires.pop(key, None)
+                removed += 1
+        return removed
+
+    def exists(self, key):
+        return int(self._alive(key))
+
+    def sadd(self, key, member):
+        self._alive(key)  # Истекшее множество создается заново
+        members = self._data.setdefault(key, set())
+        added = member not in members
+        members.add(member)
+        return int(added)
+
+    def srem(self, key, member):
+        if not self._alive(key) or member not in self._data[key]:
+            return 0
+        self._data[key].discard(member)
+        return 1
+
+    def smembers(self, key):
+        return {member.encode() for member in self._data[key]} if self._alive(key) else set()
+
+    def scan_iter(self, match='*'):
+        return [key.encode() for key in list(self._data) if self._alive(key) and fnmatch.fnmatchcase(key, match)]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._calls.append((getattr(self._client, name), args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        return [method(*args, **kwargs) for method, args, kwargs in calls]
+
+
+def redis_client():
+    try:
+        import fakeredis
+        return fakeredis.FakeRedis(), 'fakeredis'
+    except ImportError:
+        return FakeRedis(), 'FakeRedis'
+
+
+def check(results, name, condition):
+    results.append((name, bool(condition)))
+
+
+def check_store(store):
+    """Список (проверка, успех) для одного хранилища"""
+    results = []
+    store.set('s1', 1)
+    store.set('s2', 1)
+    store.set('s3', 2)
+    check(results, 'get после set', store.get('s1') == 1 and store.get('s3') == 2)
+    check(results, 'неизвестная сессия', store.get('missing') is None and 'missing' not in store)
+    check(results, 'keys и len', sorted(store.keys()) == ['s1', 's2', 's3'] and len(store) == 3)
+
+    store.delete('s2')
+    check(results, 'delete', store.get('s2') is None and store.get('s1') == 1)
+
+    store.set('s4', 1)
+    check(results, 'revoke_user', store.revoke_user(1) == 2 and store.get('s1') is None
+          and store.get('s4') is None and store.get('s3') == 2)
+
+    store.set('short', 3)
+    store.set('sliding', 3)
+    time.sleep(TTL * 0.6)
+    store.get('sliding')  # продление: прожила больше половины ttl
+    time.sleep(TTL * 0.6)
+    check(results, 'истечение по ttl', store.get('short') is None)
+    check(results, 'скользящее продление', store.get('sliding') == 3)
+    store.sweep_expired()
+    check(results, 'sweep_expired', 'short' not in store.keys())
+    return results
+
+
+def check_interface():
+    """SessionStore - абстрактный: без всех методов подкласс не создать"""
+    class Partial(SessionStore):
+        def get(self, session_id):
+            return None
+
+    for cls in (SessionStore, Partial):
+        try:
+            cls()
+        except TypeError:
+            continue
+        return False
+    return True
+
+
+def main():
+    failed = False
+    if check_interface():
+        print("✅ SessionStore: неполную реализацию создать нельзя")
+    else:
+        failed = True
+        print("❌ SessionStore: абстрактные методы не проверяются")
+
+    client, client_name = redis_client()
+    with app.app_context():
+        db.create_all()
+        stores = [
+            ('memory', MemorySessionStore(TTL)),
+            ('sql', SqlSessionStore(TTL)),
+            (f'redis ({client_name})', RedisSessionStore(TTL, client=client)),
+        ]
+        for name, store in stores:
+            for check_name, ok in check_store(store):
+                failed = failed or not ok
+                print(f"{'✅' if ok else '❌'} {name}: {check_name}")
+
+    if failed:
+        sys.exit(1)
+    print("\n🎉 Все хранилища сессий ведут себя одинаково")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,53 @@ class Config:
         'sqlite:////tmp/cookbook.db'  # 4 слэша! абсолютный путь
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+    # Каталог загрузок на диске; им пользуются и запись (ImageService), и отдача (/uploads/...)
+    UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads'))
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
\ No newline at end of file
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    # Write-behind счетчик просмотров: интервал сброса (сек) и порог накопленных просмотров
+    VIEW_FLUSH_INTERVAL = float(os.getenv('VIEW_FLUSH_INTERVAL', 5))
+    VIEW_FLUSH_THRESHOLD = int(os.getenv('VIEW_FLUSH_THRESHOLD', 1000))
+    # Хранилище сессий: memory (один процесс), sql (таблица user_sessions) или redis
+    SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'memory')
+    SESSION_TTL = int(os.getenv('SESSION_TTL', 7 * 24 * 3600))
+    SESSION_MAX_ENTRIES = int(os.getenv('SESSION_MAX_ENTRIES', 10000))
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    # Время жизни (сек) снимков пользователя по сессии между запросами
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 30))
+    # Время жизни (сек) кэша избранного в процессе: столько изменения из других
+    # процессов могут быть не видны при чтении (переключение всегда идет по базе)
+    FAVORITE_CACHE_TTL = int(os.getenv('FAVORITE_CACHE_TTL', 5))
+    # Фоновая обработка изображений: число потоков-обработчиков
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+    # Отдача загрузок: '' - сам Flask, 'x-sendfile' (Apache/lighttpd) или 'x-accel' (nginx)
+    UPLOAD_SENDFILE = os.getenv('UPLOAD_SENDFILE', '')
+    USE_X_SENDFILE = UPLOAD_SENDFILE == 'x-sendfile'
+    # internal-location nginx, которая указывает на папку uploads
+    UPLOAD_ACCEL_PREFIX = os.getenv('UPLOAD_ACCEL_PREFIX', '/internal-uploads')
+    UPLOAD_MAX_AGE = int(os.getenv('UPLOAD_MAX_AGE', 365 * 24 * 3600))
+    # Профиль SQLite: tuned (WAL, pragma ниже, пул соединений) или default (как есть)
+    SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'tuned')
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))  # мс
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', -64000))  # отрицательное - в КиБ
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    # SELECT-ы GET-запросов через отдельные соединения с PRAGMA query_only
+    DB_READONLY_GETS = os.getenv('DB_READONLY_GETS', '1') == '1'
+    # Реплики для чтения (через запятую); запись всегда в SQLALCHEMY_DATABASE_URI
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    # Сколько секунд после своей записи клиент читает из основной базы
+    DB_STICKY_SECONDS = int(os.getenv('DB_STICKY_SECONDS', 5))
+    # Тестовый репликатор SQLite: копировать основную базу в реплики каждые N секунд (0 - выключен)
+    SQLITE_REPLICATOR_INTERVAL = float(os.getenv('SQLITE_REPLICATOR_INTERVAL', 0))
+    # Режим разработки: EXPLAIN QUERY PLAN для каждого SELECT и предупреждения о полных сканах
+    QUERY_PLAN_ADVISOR = os.getenv('QUERY_PLAN_ADVISOR', os.getenv('FLASK_DEBUG', '0')) == '1'
+    # Рейтинги популярных рецептов в памяти: размер, кандидаты из БД и интервал сверки (сек)
+    LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', 100))
+    LEADERBOARD_CANDIDATES = int(os.getenv('LEADERBOARD_CANDIDATES', 1000))
+    LEADERBOARD_RECONCILE_INTERVAL = float(os.getenv('LEADERBOARD_RECONCILE_INTERVAL', 300))
+    # Массовый импорт/экспорт рецептов: строк в одном INSERT и в одной порции чтения
+    IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', 1000))
+    # id пользователей с доступом к административным эндпоинтам (через запятую)
+    ADMIN_USER_IDS = {int(value) for value in os.getenv('ADMIN_USER_IDS', '').split(',') if value.strip()}
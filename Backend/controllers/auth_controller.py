@@ -1,6 +1,10 @@
 from flask import jsonify, request
 from services.auth_service import AuthService
 from services.favorite_service import FavoriteService
+from controllers.pagination import ids_from_request, page_request_from_args, page_response
+
+# Максимум id в одном запросе проверки избранного
+MAX_FAVORITE_CHECK_IDS = 500
 
 class AuthController:
     def __init__(self, auth_service, favorite_service):
@@ -25,6 +29,8 @@ class AuthController:
         if error:
             return jsonify({'error': error}), 400
         
+        self.favorite_service.warm(user.id)
+        
         response = jsonify({
             'message': 'User registered successfully',
             'user': user.to_dict(),
@@ -44,6 +50,8 @@ class AuthController:
         if error:
             return jsonify({'error': error}), 401
         
+        self.favorite_service.warm(user.id)
+        
         response = jsonify({
             'message': 'Login successful',
             'user': user.to_dict(),
@@ -124,9 +132,12 @@ class AuthController:
         # Используем сервис рецептов для получения рецептов пользователя
         from services.recipe_service import RecipeService
         recipe_service = RecipeService()
-        recipes = recipe_service.get_user_recipes(user.id)
+        try:
+            page = recipe_service.get_user_recipes(user.id, page_request_from_args())
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
         
-        return jsonify([recipe.to_dict() for recipe in recipes])
+        return page_response(page)
     
     def toggle_favorite(self):
         """Добавить/удалить рецепт из избранного"""
@@ -142,17 +153,30 @@ class AuthController:
         if not recipe_id:
             return jsonify({'error': 'Recipe ID is required'}), 400
         
-        # Проверяем, есть ли уже в избранном
-        if self.favorite_service.is_favorite(user.id, int(recipe_id)):
-            # Удаляем из избранного
-            if self.favorite_service.remove_from_favorites(user.id, int(recipe_id)):
-                return jsonify({'message': 'Removed from favorites', 'is_favorite': False})
-        else:
-            # Добавляем в избранное
-            if self.favorite_service.add_to_favorites(user.id, int(recipe_id)):
-                return jsonify({'message': 'Added to favorites', 'is_favorite': True})
-        
-        return jsonify({'error': 'Failed to update favorites'}), 500
+        is_favorite = self.favorite_service.toggle_favorite(user.id, int(recipe_id))
+        if is_favorite is None:
+            return jsonify({'error': 'Failed to update favorites'}), 500
+        
+        message = 'Added to favorites' if is_favorite else 'Removed from favorites'
+        return jsonify({'message': message, 'is_favorite': is_favorite})
+    
+    def check_favorites(self):
+        """Флаги избранного для набора рецептов: GET ?ids=1,2,3 или POST {"recipe_ids": [...]}"""
+        session_id = request.cookies.get('session_id')
+        user = self.auth_service.get_current_user(session_id)
+        
+        if not user:
+            return jsonify({'error': 'Not authenticated'}), 401
+        
+        recipe_ids = ids_from_request('recipe_ids')
+        if recipe_ids is None:
+            return jsonify({'error': 'Recipe IDs must be a list of integers'}), 400
+        
+        if len(recipe_ids) > MAX_FAVORITE_CHECK_IDS:
+            return jsonify({'error': f'At most {MAX_FAVORITE_CHECK_IDS} recipe IDs per request'}), 400
+        
+        flags = self.favorite_service.are_favorites(user.id, recipe_ids)
+        return jsonify({'favorites': {str(recipe_id): flag for recipe_id, flag in flags.items()}})
     
     def get_favorite_recipes(self):
         """Получить избранные рецепты пользователя"""
@@ -162,6 +186,10 @@ class AuthController:
         if not user:
             return jsonify({'error': 'Not authenticated'}), 401
         
-        favorite_recipes = self.favorite_service.get_favorite_recipes(user.id)
-        return jsonify(favorite_recipes)
+        try:
+            page = self.favorite_service.get_favorite_recipes(user.id, page_request_from_args())
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        return page_response(page)
     
@@ -0,0 +1,51 @@
+import hashlib
+from datetime import timezone
+from flask import current_app, request
+
+
+def make_etag(*parts):
+    """Сильный ETag из частей версии ресурса"""
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _as_utc(value):
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def is_not_modified(etag, last_modified=None):
+    """Проверить If-None-Match / If-Modified-Since текущего запроса"""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    since = request.if_modified_since
+    modified = _as_utc(last_modified)
+    return since is not None and modified is not None and modified <= since
+
+
+def with_validators(response, etag, last_modified=None):
+    """Добавить ETag/Last-Modified; клиент обязан перепроверять ресурс при каждом обращении"""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _as_utc(last_modified)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def not_modified(etag, last_modified=None):
+    """Ответ 304 без тела"""
+    return with_validators(current_app.response_class(status=304), etag, last_modified)
+
+
+def conditional_response(etag, last_modified, build):
+    """304, если клиент уже имеет эту версию, иначе build() с валидаторами.
+
+    build вызывается только при необходимости и может вернуть кортеж (ответ, код) для ошибок.
+    """
+    if is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+    response = build()
+    if isinstance(response, tuple):
+        return response
+    return with_validators(response, etag, last_modified)
@@ -0,0 +1,48 @@
+from flask import current_app, jsonify, request
+from services.pagination import PageRequest
+from services.recipe_cache import recipe_json_cache
+
+# Заголовки, которые фронтенд должен видеть через CORS
+PAGINATION_HEADERS = ['X-Next-Cursor', 'X-Prev-Cursor', 'X-Total-Count']
+
+
+def page_request_from_args():
+    """Параметры пагинации из текущего запроса"""
+    return PageRequest.from_args(request.args)
+
+
+def ids_from_request(json_key):
+    """Список id из GET ?ids=1,2,3 или из POST {json_key: [...]}; None, если id некорректны.
+
+    Только целые: строки, bool и дробные в JSON не приводятся молча, в query - только цифры ASCII.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        raw_ids = data.get(json_key) if isinstance(data, dict) else None
+        if not isinstance(raw_ids, list) or not all(type(value) is int for value in raw_ids):
+            return None
+        return raw_ids
+    raw_ids = [value.strip() for value in request.args.get('ids', '').split(',') if value.strip()]
+    if not all(value.isascii() and value.isdigit() for value in raw_ids):
+        return None
+    return [int(value) for value in raw_ids]
+
+
+def page_response(page, serialize=None):
+    """JSON-массив элементов страницы, курсоры передаются в заголовках.
+
+    Без serialize элементы считаются рецептами и берутся из кэша готового JSON.
+    """
+    if serialize is None:
+        response = current_app.response_class(
+            recipe_json_cache.encode_many(page), mimetype='application/json'
+        )
+    else:
+        response = jsonify([serialize(item) for item in page])
+    if page.next_cursor:
+        response.headers['X-Next-Cursor'] = page.next_cursor
+    if page.prev_cursor:
+        response.headers['X-Prev-Cursor'] = page.prev_cursor
+    if page.total is not None:
+        response.headers['X-Total-Count'] = str(page.total)
+    return response
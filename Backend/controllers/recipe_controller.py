@@ -1,25 +1,104 @@
-from flask import jsonify, request
+from flask import current_app, jsonify, request, stream_with_context
 from services.recipe_service import RecipeService
 from services.comment_service import CommentService
 from services.rating_service import RatingService
 from services.auth_service import AuthService
+from controllers.pagination import ids_from_request, page_request_from_args, page_response
+from controllers.conditional import conditional_response, is_not_modified, make_etag, not_modified, with_validators
+from services.recipe_cache import recipe_json_cache
+from services.cache import TTLCache
+from services.version_service import VersionService, RECIPES, comments_collection, recipe_collections
+from services.pagination import MAX_PAGE_SIZE
+from services.recipe_import_service import RecipeImportService
 from models.db import db
 
+# Синонимы окон рейтинга в параметре window
+LEADERBOARD_WINDOWS = {'day': 'day', 'week': 'week', 'all': 'all', 'all-time': 'all', 'alltime': 'all'}
+# Готовый JSON рейтинга по набору мест: пока места не меняются, ответ отдается без SQL
+top_response_cache = TTLCache(maxsize=256, ttl=10)
+# Максимум рецептов в одном пакетном запросе /api/recipes/batch
+MAX_BATCH_SIZE = MAX_PAGE_SIZE
+
 class RecipeController:
     def __init__(self, recipe_service, comment_service, rating_service,auth_service=None):
         self.recipe_service = recipe_service
         self.comment_service = comment_service
         self.rating_service = rating_service
         self.auth_service = auth_service  # Добавляем auth_service
+        self.version_service = VersionService()
+    
+    def _conditional_list(self, build):
+        """Список рецептов с ETag по версиям коллекции recipes и параметрам запроса"""
+        version, updated_at = self.version_service.get_many(recipe_collections())
+        etag = make_etag(RECIPES, version, request.full_path)
+        return conditional_response(etag, updated_at, build)
     
     def get_all_recipes(self):
-        recipes = self.recipe_service.get_all_recipes()
-        return jsonify([recipe.to_dict() for recipe in recipes])
+        def build():
+            try:
+                page = self.recipe_service.get_all_recipes(page_request_from_args())
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            return page_response(page)
+        return self._conditional_list(build)
+    
+    def get_top_recipes(self, metric):
+        """Рейтинг рецептов (views - популярные, likes - самые понравившиеся) за окно day/week/all"""
+        window = LEADERBOARD_WINDOWS.get(request.args.get('window', 'all'))
+        if window is None:
+            return jsonify({'error': 'window must be day, week or all'}), 400
+        # Как и размер страницы: нечисловой limit - по умолчанию, остальное - в 1..LEADERBOARD_SIZE
+        limit = request.args.get('limit', 10, type=int)
+        limit = max(1, min(limit, current_app.config['LEADERBOARD_SIZE']))
+        
+        ranking = self.recipe_service.get_top_ranking(metric, window, limit)
+        key = (metric, window, tuple(recipe_id for recipe_id, _ in ranking))
+        body = top_response_cache.get(key)
+        if body is None:
+            recipes = self.recipe_service.get_recipes_by_ids(list(key[2]))
+            body = recipe_json_cache.encode_many(recipes)
+            top_response_cache.set(key, body)
+        return current_app.response_class(body, mimetype='application/json')
+    
+    def get_recipes_batch(self):
+        """Несколько рецептов за один запрос: GET ?ids=1,2,3 или POST {"ids": [...]}.
+
+        Ответ - объект {id: рецепт}, для несуществующих id - null. Просмотры не
+        засчитываются: пакет используется для предзагрузки, а не для открытия рецепта.
+        """
+        raw_ids = ids_from_request('ids')
+        if raw_ids is None:
+            return jsonify({'error': 'ids must be a list of integers'}), 400
+        
+        recipe_ids = list(dict.fromkeys(raw_ids))
+        if not recipe_ids:
+            return jsonify({'error': 'ids are required'}), 400
+        if len(recipe_ids) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'At most {MAX_BATCH_SIZE} ids per request'}), 400
+        
+        recipes = self.recipe_service.get_recipes_by_ids(recipe_ids)
+        return current_app.response_class(
+            recipe_json_cache.encode_map(recipe_ids, recipes), mimetype='application/json'
+        )
     
     def get_recipe(self, recipe_id):
+        # Условный запрос: сверяем только (updated_at, views), без загрузки и сериализации рецепта
+        if request.if_none_match or request.if_modified_since:
+            version = self.recipe_service.get_recipe_version(recipe_id)
+            if version is None:
+                return jsonify({'error': 'Recipe not found'}), 404
+            etag = make_etag('recipe', recipe_id, *version)
+            if is_not_modified(etag, version[0]):
+                self.recipe_service.record_view(recipe_id)
+                return not_modified(etag, version[0])
+        
         recipe = self.recipe_service.get_recipe_by_id(recipe_id)
         if recipe:
-            return jsonify(recipe.to_dict())
+            response = current_app.response_class(
+                recipe_json_cache.encode(recipe), mimetype='application/json'
+            )
+            etag = make_etag('recipe', recipe.id, recipe.updated_at, recipe.views)
+            return with_validators(response, etag, recipe.updated_at)
         return jsonify({'error': 'Recipe not found'}), 404
             
     def create_recipe(self):
@@ -116,21 +195,21 @@ class RecipeController:
                 recipe.image_url = recipe_data['image_url']
             
             db.session.commit()
+            recipe_json_cache.invalidate(recipe_id)
             return jsonify(recipe.to_dict())
         except Exception as e:
             db.session.rollback()
             print(f"Error updating recipe: {e}")
             return jsonify({'error': 'Failed to update recipe'}), 500
 
-    def update_recipe_with_steps(self, recipe_id, user_id=None):
+    def update_recipe_with_steps(self, recipe_id, user_obj=None):
         """Обновить рецепт с изображениями шагов"""
         try:
             recipe = self.recipe_service.get_recipe_by_id(recipe_id)
             if not recipe:
                 return jsonify({'error': 'Recipe not found'}), 404
             
-            from models.user import User
-            user_obj = User.query.get(user_id)
+            # Пользователь уже получен маршрутом из сессии
             if not user_obj:
                 return jsonify({'error': 'User not found'}), 404
                 
@@ -207,9 +286,7 @@ class RecipeController:
         if not session_id:
             return jsonify({'error': 'Not authenticated'}), 401
         
-        from services.auth_service import AuthService
-        auth_service = AuthService()
-        user = auth_service.get_current_user(session_id)
+        user = self.auth_service.get_current_user(session_id)
         if not user:
             return jsonify({'error': 'Invalid session'}), 401
         
@@ -223,8 +300,15 @@ class RecipeController:
         if not query:
             return jsonify({'error': 'Query parameter "q" is required'}), 400
         
-        recipes = self.recipe_service.search_recipes(query)
-        return jsonify([recipe.to_dict() for recipe in recipes])
+        def build():
+            try:
+                page = self.recipe_service.search_recipes(
+                    query, page_request_from_args(), sort=request.args.get('sort', 'relevance')
+                )
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            return page_response(page)
+        return self._conditional_list(build)
     
     def get_filtered_recipes(self):
         category = request.args.get('category')
@@ -238,22 +322,36 @@ class RecipeController:
         exclude_list = [ing.strip() for ing in exclude_ingredients.split(',')] if exclude_ingredients else None
         
         # Используем расширенный метод фильтрации
-        filtered_recipes = self.recipe_service.get_recipes_by_filters(
-            category=category,
-            difficulty=difficulty,
-            max_cooking_time=max_cooking_time,
-            include_ingredients=include_list,
-            exclude_ingredients=exclude_list
-        )
+        def build():
+            try:
+                page = self.recipe_service.get_recipes_by_filters(
+                    category=category,
+                    difficulty=difficulty,
+                    max_cooking_time=max_cooking_time,
+                    include_ingredients=include_list,
+                    exclude_ingredients=exclude_list,
+                    page_request=page_request_from_args()
+                )
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            return page_response(page)
         
-        return jsonify([recipe.to_dict() for recipe in filtered_recipes])
+        return self._conditional_list(build)
     
     def get_comments(self, recipe_id):
         try:
             print(f"DEBUG: Getting comments for recipe {recipe_id}")
-            comments = self.comment_service.get_comments_for_recipe(recipe_id)
-            print(f"DEBUG: Found {len(comments)} comments")
-            return jsonify([comment.to_dict() for comment in comments])
+            version, updated_at = self.version_service.get(comments_collection(recipe_id))
+            etag = make_etag('comments', recipe_id, version, request.full_path)
+            
+            def build():
+                try:
+                    page = self.comment_service.get_comments_for_recipe(recipe_id, page_request_from_args())
+                except ValueError:
+                    return jsonify({'error': 'Invalid cursor'}), 400
+                print(f"DEBUG: Found {len(page)} comments")
+                return page_response(page, serialize=lambda comment: comment)
+            return conditional_response(etag, updated_at, build)
         except Exception as e:
             print(f"Error in get_comments: {e}")
             import traceback
@@ -309,13 +407,70 @@ class RecipeController:
     
     def get_user_recipes(self, user_id):
         """Получить рецепты пользователя"""
-        recipes = self.recipe_service.get_user_recipes(user_id)
-        return jsonify([recipe.to_dict() for recipe in recipes])
+        def build():
+            try:
+                page = self.recipe_service.get_user_recipes(user_id, page_request_from_args())
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            return page_response(page)
+        return self._conditional_list(build)
+    
+    def _require_admin(self):
+        """Ответ с ошибкой, если текущий пользователь не администратор (ADMIN_USER_IDS), иначе None"""
+        session_id = request.cookies.get('session_id')
+        user = self.auth_service.get_current_user(session_id) if session_id else None
+        if not user:
+            return jsonify({'error': 'Not authenticated'}), 401
+        if user.id not in current_app.config['ADMIN_USER_IDS']:
+            return jsonify({'error': 'Admin access required'}), 403
+        return None
+    
+    def import_recipes(self):
+        """Массовый импорт рецептов (только admin): файл в поле file или тело запроса.
+
+        Формат - ?format=ndjson|csv, иначе по расширению файла или Content-Type.
+        """
+        denied = self._require_admin()
+        if denied:
+            return denied
+        
+        upload = request.files.get('file')
+        filename = upload.filename if upload else ''
+        format = request.args.get('format')
+        if not format:
+            is_csv = filename.lower().endswith('.csv') or request.mimetype == 'text/csv'
+            format = 'csv' if is_csv else 'ndjson'
+        
+        service = RecipeImportService(current_app.config['IMPORT_CHUNK_SIZE'])
+        try:
+            report = service.import_stream(
+                upload.stream if upload else request.stream, format,
+                dry_run=request.args.get('dry_run') in ('1', 'true')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            print(f"Error importing recipes: {e}")
+            return jsonify({'error': 'Import failed'}), 500
+        return jsonify(report)
     
-    def create_recipe_with_steps(self, user_id=None):
+    def export_recipes(self):
+        """Потоковая выгрузка всех рецептов в NDJSON (только admin)"""
+        denied = self._require_admin()
+        if denied:
+            return denied
+        
+        service = RecipeImportService(current_app.config['IMPORT_CHUNK_SIZE'])
+        response = current_app.response_class(
+            stream_with_context(service.export_ndjson()), mimetype='application/x-ndjson'
+        )
+        response.headers['Content-Disposition'] = 'attachment; filename=recipes.ndjson'
+        return response
+    
+    def create_recipe_with_steps(self, user_obj=None):
         """Создать рецепт с изображениями шагов"""
         try:
-            print(f"DEBUG: Starting create_recipe_with_steps, user_id={user_id}")
+            print(f"DEBUG: Starting create_recipe_with_steps, user_id={user_obj.id if user_obj else None}")
             
             # Проверяем multipart/form-data
             print(f"DEBUG: Request form data: {request.form}")
@@ -371,10 +526,7 @@ class RecipeController:
                 recipe_data['main_image'] = main_image
                 print(f"DEBUG: Main image added to recipe_data")
             
-            # Получаем объект пользователя
-            from models.user import User
-            user_obj = User.query.get(user_id)
-            
+            # Пользователь уже получен маршрутом из сессии
             if not user_obj:
                 return jsonify({'error': 'User not found'}), 404
             
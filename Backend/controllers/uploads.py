@@ -0,0 +1,45 @@
+import mimetypes
+import os
+from flask import abort, current_app, send_from_directory
+from werkzeug.security import safe_join
+from services.image_service import UPLOAD_ROOT, is_content_addressed
+
+
+def send_upload(folder, filename):
+    """Отдать загруженный файл из UPLOAD_FOLDER/<folder>.
+
+    Оригиналы с именем по хэшу содержимого не меняются, поэтому кэшируются
+    надолго с immutable. Варианты (перестраиваются backfill_image_variants.py
+    --force) и старые файлы клиент перепроверяет по ETag. ETag и Range
+    обрабатывает send_file; в режиме x-sendfile/x-accel байты отдает
+    фронт-прокси, а Python-процесс только проверяет путь.
+    """
+    directory = os.path.join(UPLOAD_ROOT, folder)
+    immutable = is_content_addressed(filename)
+    max_age = current_app.config['UPLOAD_MAX_AGE'] if immutable else 0
+
+    if current_app.config.get('UPLOAD_SENDFILE') == 'x-accel':
+        response = _accel_redirect(directory, folder, filename)
+    else:
+        # При USE_X_SENDFILE send_file сам заменяет тело заголовком X-Sendfile
+        response = send_from_directory(directory, filename, max_age=max_age)
+
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if immutable:
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def _accel_redirect(directory, folder, filename):
+    """Ответ с X-Accel-Redirect на internal-location nginx"""
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    response = current_app.response_class()
+    response.headers['X-Accel-Redirect'] = f"{current_app.config['UPLOAD_ACCEL_PREFIX']}/{folder}/{filename}"
+    response.content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    return response
@@ -1,9 +1,10 @@
 # Backend/create_avatar_folder.py
 import os
+from config import Config
 
 def create_avatar_folder():
     """Создает папку для загрузки аватаров"""
-    avatar_folder = 'uploads/avatars'
+    avatar_folder = os.path.join(Config.UPLOAD_FOLDER, 'avatars')
     
     try:
         os.makedirs(avatar_folder, exist_ok=True)
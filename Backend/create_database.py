@@ -199,6 +199,10 @@ def create_sample_data():
                     db.session.add(rating)
         
         db.session.commit()
+        
+        # Приводим rating/rating_count рецептов в соответствие с таблицей ratings
+        from services.rating_service import RatingService
+        RatingService().reconcile_ratings()
         print("✅ Рейтинги созданы!")
         
         # Создаем избранное
@@ -214,6 +218,10 @@ def create_sample_data():
         db.session.commit()
         print("✅ Избранное создано!")
         
+        # Счетчики профилей - по созданным данным
+        from services.user_stats_service import UserStatsService
+        UserStatsService().reconcile()
+        
         print("\n🎉 База данных успешно заполнена!")
         print(f"📊 Статистика:")
         print(f"   👥 Пользователей: {User.query.count()}")
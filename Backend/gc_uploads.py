@@ -0,0 +1,27 @@
+# Backend/gc_uploads.py
+# Сборка мусора в uploads/recipes и uploads/avatars: удаляет файлы, на которые
+# не ссылаются recipes.image_url, recipe_step_images.image_url и users.avatar_url,
+# вместе с их уменьшенными копиями. Свежие файлы (моложе --grace минут) не трогаются.
+#
+# Запуск: python gc_uploads.py [--dry-run] [--grace 60]
+import argparse
+from app import app
+from models.db import db
+from services.image_service import ImageService
+
+
+def gc_uploads(grace_minutes=60, dry_run=False):
+    with app.app_context():
+        db.create_all()
+
+        removed, freed = ImageService().collect_garbage(grace_minutes * 60, dry_run=dry_run)
+        action = "Будет удалено" if dry_run else "Удалено"
+        print(f"✅ {action} файлов: {removed}, освобождено: {freed / 1024 / 1024:.1f} МБ")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Удаление загрузок без ссылок')
+    parser.add_argument('--dry-run', action='store_true', help='только показать, что будет удалено')
+    parser.add_argument('--grace', type=int, default=60, help='не трогать файлы моложе N минут')
+    args = parser.parse_args()
+    gc_uploads(args.grace, dry_run=args.dry_run)
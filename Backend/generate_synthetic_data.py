@@ -0,0 +1,328 @@
+# Backend/generate_synthetic_data.py
+# Генератор синтетической базы для нагрузочного тестирования: пользователи,
+# рецепты с ингредиентами и шагами в JSON, изображения шагов, комментарии,
+# оценки, избранное и почасовая активность за последнюю неделю (рейтинги за
+# день и неделю). Популярность рецептов и активность пользователей
+# распределены по Ципфу (немногие рецепты собирают большую часть просмотров,
+# оценок и комментариев), данные вставляются пакетами, при одном и том же
+# seed содержимое базы одинаковое (даты отсчитываются от текущего дня).
+# База пересоздается с нуля - не запускайте на рабочей базе.
+#
+# Используется бенчмарками: from generate_synthetic_data import generate_dataset
+#
+# Запуск: python generate_synthetic_data.py [--database sqlite:///synthetic.db]
+#         [--users 10000] [--recipes 100000] [--comments 300000] [--ratings 300000]
+#         [--favorites 200000] [--step-images 100000] [--activity 100000]
+#         [--zipf 1.1] [--seed 42] [--chunk 10000]
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from array import array
+from datetime import datetime, timedelta
+
+DEFAULT_COUNTS = {
+    'users': 10000,
+    'recipes': 100000,
+    'comments': 300000,
+    'ratings': 300000,
+    'favorites': 200000,
+    'step_images': 100000,
+    'activity': 100000,  # строки recipe_activity (рецепт, час) за последние ACTIVITY_DAYS дней
+}
+# Синтетические пользователи: user_<n> с общим паролем
+PASSWORD = 'password123'
+HISTORY_DAYS = 730
+ACTIVITY_DAYS = 7
+
+CATEGORIES = ['Завтраки', 'Супы', 'Салаты', 'Паста', 'Основные блюда', 'Выпечка', 'Десерты', 'Напитки']
+DIFFICULTIES = ['Легкий', 'Средний', 'Сложный']
+INGREDIENTS = [
+    ('Мука', 'г'), ('Сахар', 'г'), ('Яйца', 'шт'), ('Молоко', 'мл'), ('Сливочное масло', 'г'),
+    ('Соль', 'г'), ('Перец черный', 'г'), ('Чеснок', 'зубчика'), ('Лук репчатый', 'шт'),
+    ('Морковь', 'шт'), ('Картофель', 'шт'), ('Свекла', 'шт'), ('Капуста', 'г'), ('Помидоры', 'шт'),
+    ('Огурцы', 'шт'), ('Куриное филе', 'г'), ('Говядина', 'г'), ('Свинина', 'г'), ('Рис', 'г'),
+    ('Гречка', 'г'), ('Спагетти', 'г'), ('Сыр пармезан', 'г'), ('Сметана', 'г'), ('Сливки', 'мл'),
+    ('Оливковое масло', 'мл'), ('Лимонный сок', 'мл'), ('Шоколад', 'г'), ('Какао-порошок', 'ст.л.'),
+    ('Грибы', 'г'), ('Зелень', 'пучок'), ('Творог', 'г'), ('Мед', 'ст.л.'),
+]
+DISHES = ['Суп', 'Салат', 'Пирог', 'Паста', 'Рагу', 'Запеканка', 'Омлет', 'Каша', 'Торт', 'Котлеты']
+STEP_ACTIONS = ['Нарежьте', 'Смешайте', 'Обжарьте', 'Отварите', 'Запекайте', 'Взбейте', 'Тушите', 'Остудите']
+COMMENTS = [
+    'Очень вкусно, спасибо за рецепт!', 'Готовила по этому рецепту, всем понравилось.',
+    'Добавил больше специй - получилось отлично.', 'Слишком долго, но результат того стоит.',
+    'Просто и быстро, буду готовить еще.', 'У меня получилось суховато, в следующий раз добавлю сливок.',
+]
+
+
+class Zipf:
+    """Выборка id из 1..n по закону Ципфа: вероятность места k пропорциональна 1 / k**s.
+
+    Места перемешаны по id, чтобы популярными были не только первые записи.
+    """
+
+    def __init__(self, rng, n, s=1.1):
+        self.rng = rng
+        self.ids_by_rank = list(range(1, n + 1))
+        rng.shuffle(self.ids_by_rank)
+        self.cum_weights = list(itertools.accumulate(1.0 / k ** s for k in range(1, n + 1)))
+        self.rank_of = array('l', [0]) * (n + 1)
+        for rank, item_id in enumerate(self.ids_by_rank, start=1):
+            self.rank_of[item_id] = rank
+
+    def sample(self, k):
+        return self.rng.choices(self.ids_by_rank, cum_weights=self.cum_weights, k=k)
+
+
+def _chunks(total, chunk_size):
+    for start in range(0, total, chunk_size):
+        yield start, min(chunk_size, total - start)
+
+
+def _insert(table, rows, ignore_conflicts=False):
+    from models.db import db, dialect_insert
+
+    if not rows:
+        return 0
+    if ignore_conflicts:
+        statement = dialect_insert(db.session.get_bind())(table).on_conflict_do_nothing()
+    else:
+        statement = table.insert()
+    result = db.session.execute(statement, rows)
+    db.session.commit()
+    return result.rowcount if ignore_conflicts else len(rows)
+
+
+def generate_dataset(counts=None, seed=42, zipf_s=1.1, chunk_size=10000, now=None, log=print):
+    """Пересоздать таблицы и заполнить их синтетическими данными.
+
+    counts - словарь с ключами DEFAULT_COUNTS (недостающие берутся оттуда).
+    Вызывается внутри app.app_context(). Возвращает фактическое число строк
+    по таблицам: дубликаты пар пользователь-рецепт в оценках и избранном
+    и пар рецепт-час в активности отбрасываются, поэтому их может оказаться
+    чуть меньше заказанного.
+    """
+    from models.db import db
+    from models.recipe import (
+        Comment, Rating, Recipe, RecipeActivity, RecipeIngredient, RecipeStepImage
+    )
+    from models.user import Favorite, User
+    from services.ingredient_service import ingredient_keys
+    from services.rating_service import RatingService
+    from services.search_service import SearchService
+    from services.user_stats_service import UserStatsService
+    from sqlalchemy import func, select, text, update
+
+    counts = {**DEFAULT_COUNTS, **(counts or {})}
+    rng = random.Random(seed)
+    now = now or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = now - timedelta(days=HISTORY_DAYS)
+    span = (now - start).total_seconds()
+    result = {}
+
+    def random_offset(after=0.0):
+        """Случайный момент между after и now - в секундах от начала истории"""
+        return after + rng.random() * (span - after)
+
+    def at(offset):
+        return start + timedelta(seconds=offset)
+
+    def step(name, started):
+        log(f"✅ {name}: {result[name]} строк за {time.perf_counter() - started:.1f} с")
+
+    db.drop_all()
+    db.create_all()
+
+    # Пользователи: хэш пароля считается один раз - он намеренно медленный
+    started = time.perf_counter()
+    probe = User(username='probe', email='probe@example.com')
+    probe.set_password(PASSWORD)
+    user_count = counts['users']
+    result['users'] = 0
+    for offset, size in _chunks(user_count, chunk_size):
+        result['users'] += _insert(User.__table__, [
+            {'id': user_id, 'username': f'user_{user_id}', 'email': f'user_{user_id}@example.com',
+             'password_hash': probe.password_hash, 'created_at': at(random_offset()), 'bio': ''}
+            for user_id in range(offset + 1, offset + size + 1)
+        ])
+    step('users', started)
+
+    # Активные пользователи пишут больше рецептов и комментариев
+    active_users = Zipf(rng, user_count, zipf_s)
+
+    # Рецепты: просмотры и лайки по месту в рейтинге популярности
+    started = time.perf_counter()
+    recipe_count = counts['recipes']
+    popularity = Zipf(rng, recipe_count, zipf_s)
+    # Словарь ингредиентов фиксирован: нормализованные слова считаются один раз,
+    # строки индекса ингредиентов получаются те же, что строит build_index_rows
+    keys_by_name = {name: list(dict.fromkeys(ingredient_keys(name))) for name, _ in INGREDIENTS}
+    created = array('d')  # время создания рецепта - комментарии и оценки появляются позже
+    steps_per_recipe = array('b')
+    result['recipes'] = result['recipe_ingredients'] = 0
+    for offset, size in _chunks(recipe_count, chunk_size):
+        recipes, index_rows = [], []
+        for recipe_id, author_id in zip(range(offset + 1, offset + size + 1), active_users.sample(size)):
+            chosen = [
+                (name, rng.randint(1, 50) * 10, unit)
+                for name, unit in rng.sample(INGREDIENTS, rng.randint(3, 12))
+            ]
+            ingredients = json.dumps([
+                {'name': name, 'amount': str(amount), 'unit': unit} for name, amount, unit in chosen
+            ], ensure_ascii=False)
+            steps = rng.randint(2, 8)
+            instructions = json.dumps([
+                {'description': f'{rng.choice(STEP_ACTIONS)} ингредиенты и готовьте {rng.randint(2, 30)} минут'}
+                for _ in range(steps)
+            ], ensure_ascii=False)
+            views = int(100000 / popularity.rank_of[recipe_id] ** zipf_s) + rng.randint(0, 20)
+            created_offset = random_offset()
+            created_at = at(created_offset)
+            recipes.append({
+                'id': recipe_id,
+                'title': f'{rng.choice(DISHES)} №{recipe_id}',
+                'ingredients': ingredients,
+                'instructions': instructions,
+                'cooking_time': rng.choice((10, 15, 20, 30, 45, 60, 90, 120)),
+                'category': rng.choice(CATEGORIES),
+                'difficulty': rng.choice(DIFFICULTIES),
+                'author': f'user_{author_id}',
+                'author_id': author_id,
+                'servings': rng.randint(1, 8),
+                'views': views,
+                'likes': int(views * rng.uniform(0.02, 0.1)),
+                'created_at': created_at,
+                'updated_at': created_at,
+            })
+            created.append(created_offset)
+            steps_per_recipe.append(steps)
+            index_rows.extend(
+                {'recipe_id': recipe_id, 'position': position, 'name': name,
+                 'ingredient_key': key, 'quantity': float(amount), 'unit': unit}
+                for position, (name, amount, unit) in enumerate(chosen)
+                for key in keys_by_name[name]
+            )
+        result['recipes'] += _insert(Recipe.__table__, recipes)
+        result['recipe_ingredients'] += _insert(RecipeIngredient.__table__, index_rows)
+    step('recipes', started)
+
+    # Изображения шагов: у части рецептов (в случайном порядке) фото есть у каждого шага
+    started = time.perf_counter()
+    result['step_images'] = 0
+    order = list(range(1, recipe_count + 1))
+    rng.shuffle(order)
+    rows = []
+    for recipe_id in order:
+        remaining = counts['step_images'] - result['step_images'] - len(rows)
+        if remaining <= 0:
+            break
+        # У последнего рецепта фото только у первых шагов - ровно заказанное число
+        rows.extend(
+            {'recipe_id': recipe_id, 'step_index': step_index,
+             'image_url': f'/uploads/recipes/synthetic_{recipe_id}_{step_index}.jpg',
+             'created_at': at(created[recipe_id - 1])}
+            for step_index in range(min(steps_per_recipe[recipe_id - 1], remaining))
+        )
+        if len(rows) >= chunk_size:
+            result['step_images'] += _insert(RecipeStepImage.__table__, rows)
+            rows = []
+    result['step_images'] += _insert(RecipeStepImage.__table__, rows)
+    step('step_images', started)
+
+    # Комментарии, оценки и избранное тяготеют к популярным рецептам
+    started = time.perf_counter()
+    result['comments'] = 0
+    for _, size in _chunks(counts['comments'], chunk_size):
+        result['comments'] += _insert(Comment.__table__, [
+            {'recipe_id': recipe_id, 'user_id': user_id, 'text': rng.choice(COMMENTS),
+             'created_at': at(random_offset(created[recipe_id - 1]))}
+            for recipe_id, user_id in zip(popularity.sample(size), active_users.sample(size))
+        ])
+    step('comments', started)
+
+    for name, table, extra in (
+        ('ratings', Rating.__table__, lambda: {'rating': rng.choices((1, 2, 3, 4, 5), (1, 1, 3, 6, 9))[0]}),
+        ('favorites', Favorite.__table__, dict),
+    ):
+        started = time.perf_counter()
+        result[name] = 0
+        for _, size in _chunks(counts[name], chunk_size):
+            # Пользователь для оценки выбирается равномерно: меньше повторов пар
+            result[name] += _insert(table, [
+                {'recipe_id': recipe_id, 'user_id': rng.randint(1, user_count),
+                 'created_at': at(random_offset(created[recipe_id - 1])), **extra()}
+                for recipe_id in popularity.sample(size)
+            ], ignore_conflicts=True)
+        step(name, started)
+
+    # Почасовая активность за последнюю неделю (не раньше создания рецепта) - для
+    # рейтингов за день и неделю; популярные рецепты активны чаще
+    started = time.perf_counter()
+    result['activity'] = 0
+    activity_hours = ACTIVITY_DAYS * 24
+    for _, size in _chunks(counts['activity'], chunk_size):
+        rows = []
+        for recipe_id in popularity.sample(size):
+            hours = min(activity_hours, int((span - created[recipe_id - 1]) // 3600))
+            if hours < 1:
+                continue
+            views = rng.randint(1, 50)
+            rows.append({
+                'recipe_id': recipe_id, 'bucket': now - timedelta(hours=rng.randint(1, hours)),
+                'views': views, 'likes': int(views * rng.uniform(0.02, 0.1))
+            })
+        result['activity'] += _insert(RecipeActivity.__table__, rows, ignore_conflicts=True)
+    step('activity', started)
+
+    # Денормализованные счетчики и индексы - так же, как после обычной работы приложения
+    started = time.perf_counter()
+    RatingService().reconcile_ratings()
+    # Массовые UPDATE ставят updated_at = now - синтетические рецепты не редактировались.
+    # Недавняя активность входит в общие просмотры и лайки рецепта
+    recipes = Recipe.__table__
+    activity = RecipeActivity.__table__
+
+    def recent(metric):
+        return select(func.coalesce(func.sum(activity.c[metric]), 0)).where(
+            activity.c.recipe_id == recipes.c.id
+        ).scalar_subquery()
+
+    db.session.execute(update(recipes).values(
+        comments_count=select(func.count()).select_from(Comment)
+        .where(Comment.recipe_id == recipes.c.id).scalar_subquery(),
+        views=recipes.c.views + recent('views'),
+        likes=recipes.c.likes + recent('likes'),
+        updated_at=recipes.c.created_at
+    ))
+    db.session.commit()
+    UserStatsService().reconcile()
+    if db.engine.dialect.name == 'sqlite':
+        SearchService().rebuild_index()
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+    log(f"✅ Счетчики, полнотекстовый индекс и статистика за {time.perf_counter() - started:.1f} с")
+    return result
+
+
+def option(name, default):
+    if name in sys.argv:
+        return type(default)(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+if __name__ == '__main__':
+    # Путь к базе задается до импорта приложения: конфиг читает DATABASE_URL при загрузке
+    os.environ['DATABASE_URL'] = option('--database', 'sqlite:///synthetic.db')
+
+    from app import app
+
+    counts = {name: option(f"--{name.replace('_', '-')}", value) for name, value in DEFAULT_COUNTS.items()}
+    with app.app_context():
+        started = time.perf_counter()
+        result = generate_dataset(
+            counts, seed=option('--seed', 42), zipf_s=option('--zipf', 1.1), chunk_size=option('--chunk', 10000)
+        )
+        total = sum(result.values())
+        print(f"🎉 {total} строк за {time.perf_counter() - started:.1f} с в {app.config['SQLALCHEMY_DATABASE_URI']}")
@@ -0,0 +1,59 @@
+# Backend/import_recipes.py
+# Массовый импорт рецептов из NDJSON или CSV (поля: title, ingredients,
+# instructions, cooking_time, category, difficulty, image_url, servings,
+# author или author_id, views, likes, created_at) и выгрузка всех рецептов
+# в NDJSON. Файл читается потоково, рецепты вставляются пакетами.
+#
+# Запуск: python import_recipes.py import recipes.ndjson [--csv] [--chunk 1000] [--dry-run]
+#         python import_recipes.py export recipes.ndjson
+import sys
+import time
+from app import app
+from models.db import db
+from services.recipe_import_service import RecipeImportService
+
+
+def option(name, default=None):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def import_recipes(path, format, chunk_size, dry_run=False):
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        with open(path, 'rb') as stream:
+            report = RecipeImportService(chunk_size).import_stream(stream, format, dry_run)
+        elapsed = time.perf_counter() - started
+
+        for error in report['errors']:
+            print(f"❌ строка {error['line']}: {error['error']}")
+        action = 'Проверено' if dry_run else 'Импортировано'
+        print(f"✅ {action}: {report['imported']} рецептов за {elapsed:.1f} с "
+              f"({report['imported'] / max(elapsed, 1e-9):.0f}/с), с ошибками: {report['failed']}")
+
+
+def export_recipes(path, chunk_size):
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        count = 0
+        with open(path, 'w', encoding='utf-8') as out:
+            for line in RecipeImportService(chunk_size).export_ndjson():
+                out.write(line)
+                count += 1
+        print(f"✅ Выгружено {count} рецептов в {path} за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] not in ('import', 'export'):
+        print("Использование: python import_recipes.py import|export <файл> [--csv] [--chunk N] [--dry-run]")
+        sys.exit(1)
+
+    chunk_size = int(option('--chunk', app.config['IMPORT_CHUNK_SIZE']))
+    if sys.argv[1] == 'import':
+        format = 'csv' if '--csv' in sys.argv or sys.argv[2].lower().endswith('.csv') else 'ndjson'
+        import_recipes(sys.argv[2], format, chunk_size, dry_run='--dry-run' in sys.argv)
+    else:
+        export_recipes(sys.argv[2], chunk_size)
@@ -4,4 +4,11 @@ from models.db import db
 with app.app_context():
     db.create_all()
     print('Database tables created successfully!')
-    print('SQLite database file: cookbook.db')
\ No newline at end of file
+    print('SQLite database file: cookbook.db')
+    from services.search_service import SearchService
+    SearchService().rebuild_index()
+    print('Full-text search index rebuilt')
+    from services.ingredient_service import IngredientService
+    print(f'Ingredient index rebuilt: {IngredientService().rebuild_index()} rows')
+    from models.db import ensure_indexes
+    print(f'Indexes created: {ensure_indexes()}')
@@ -1,9 +1,199 @@
+import itertools
+import time
+from flask import current_app, g, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_migrate import Migrate
+from sqlalchemy import event, inspect, text
 
-db = SQLAlchemy()
+# Ключ bind-а с read-only соединениями к основной базе (когда реплик нет)
+READ_BIND = 'read'
+# Ключи bind-ов реплик: replica_0, replica_1, ...
+REPLICA_BIND = 'replica_{}'
+READ_METHODS = ('GET', 'HEAD')
+# Cookie "читать из основной базы": ставится после записи, чтобы клиент видел свои изменения
+STICKY_COOKIE = 'db_primary'
+
+_round_robin = itertools.count()
+
+
+def read_bind_keys(app=None):
+    """Ключи bind-ов, на которые можно отправлять чтение (пусто - только основная база)"""
+    return (app or current_app).config.get('DB_READ_BINDS', [])
+
+
+def is_sticky_to_primary():
+    """Клиент недавно писал сам - читаем из основной базы, пока реплики не догонят"""
+    return STICKY_COOKIE in request.cookies
+
+
+class RoutingSession(Session):
+    """Сессия, которая отправляет SELECT-ы GET-запросов на реплики (или read-only соединения).
+
+    Запись (flush, DML, text) всегда идет в основную базу; после первой записи
+    транзакция до конца читает тоже из основной, чтобы видеть свои изменения.
+    Одна транзакция читает из одной реплики.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_read_bind(clause):
+            return self._db.engines[self._read_bind()]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _read_bind(self):
+        key = self.info.get('read_bind')
+        if key is None:
+            keys = read_bind_keys()
+            key = self.info['read_bind'] = keys[next(_round_robin) % len(keys)]
+        return key
+
+    def _use_read_bind(self, clause):
+        if clause is not None and not getattr(clause, 'is_select', False):
+            self.info['wrote'] = True
+        if clause is None or self._flushing or self.info.get('wrote'):
+            return False
+        if not has_request_context() or request.method not in READ_METHODS:
+            return False
+        return bool(read_bind_keys()) and not is_sticky_to_primary()
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_commit(session):
+    if has_request_context() and session.info.get('wrote'):
+        g._db_committed = True
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _reset_written(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('wrote', None)
+        session.info.pop('read_bind', None)
+
+
+def _set_sticky_cookie(response):
+    """После записи клиент DB_STICKY_SECONDS секунд читает из основной базы"""
+    if g.get('_db_committed'):
+        seconds = current_app.config['DB_STICKY_SECONDS']
+        response.set_cookie(STICKY_COOKIE, str(int(time.time() + seconds)), max_age=seconds,
+                            httponly=True, samesite='Lax')
+    return response
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
+def dialect_insert(bind):
+    """insert() диалекта соединения - с поддержкой ON CONFLICT (SQLite, PostgreSQL)"""
+    if bind.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
 def init_db(app):
     db.init_app(app)
-    migrate.init_app(app, db)
\ No newline at end of file
+    migrate.init_app(app, db)
+
+def _is_file_sqlite(uri):
+    return uri.startswith('sqlite') and ':memory:' not in uri and uri.rstrip('/') not in ('sqlite:', 'sqlite:/')
+
+def _sqlite_pragmas(config, read_only=False):
+    pragmas = [
+        ('busy_timeout', config['SQLITE_BUSY_TIMEOUT']),
+        ('synchronous', 'NORMAL'),
+        ('temp_store', 'MEMORY'),
+        ('mmap_size', config['SQLITE_MMAP_SIZE']),
+        ('cache_size', config['SQLITE_CACHE_SIZE']),
+    ]
+    # journal_mode хранится в файле базы - переключает его только пишущее соединение
+    pragmas.insert(0, ('query_only', 'ON') if read_only else ('journal_mode', 'WAL'))
+    return pragmas
+
+def _listen_pragmas(engine, pragmas):
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+def init_engine(app):
+    """Подключить db к приложению с профилем движка из конфигурации.
+
+    SQLITE_PROFILE=tuned: WAL, synchronous=NORMAL, busy_timeout, mmap, кэш страниц,
+    пул соединений с pre-ping и (DB_READONLY_GETS) read-only соединения для GET.
+    SQLITE_PROFILE=default - настройки драйвера как есть.
+    DATABASE_REPLICA_URLS: чтение GET-запросов распределяется по репликам.
+    """
+    config = app.config
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    tuned = config.get('SQLITE_PROFILE') == 'tuned' and _is_file_sqlite(uri)
+    replicas = config.get('DATABASE_REPLICA_URLS') or []
+
+    options = {}
+    if tuned:
+        options = {
+            'pool_pre_ping': True,
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT'] / 1000},
+        }
+        options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+    if replicas:
+        for index, url in enumerate(replicas):
+            binds.setdefault(REPLICA_BIND.format(index), {'url': url, **options})
+        config['DB_READ_BINDS'] = [REPLICA_BIND.format(index) for index in range(len(replicas))]
+    elif tuned and config.get('DB_READONLY_GETS'):
+        binds.setdefault(READ_BIND, {'url': uri, **options})
+        config['DB_READ_BINDS'] = [READ_BIND]
+    else:
+        config['DB_READ_BINDS'] = []
+    config['SQLALCHEMY_BINDS'] = binds
+
+    db.init_app(app)
+    app.after_request(_set_sticky_cookie)
+
+    with app.app_context():
+        for key, engine in db.engines.items():
+            if engine.dialect.name == 'sqlite' and (tuned or key in config['DB_READ_BINDS']):
+                read_only = key in config['DB_READ_BINDS']
+                _listen_pragmas(engine, _sqlite_pragmas(config, read_only=read_only))
+
+def ensure_columns(table_name, columns):
+    """Добавить недостающие колонки в существующую таблицу (ALTER TABLE ... ADD COLUMN).
+
+    columns - словарь {имя колонки: SQL-определение}. Возвращает список добавленных.
+    """
+    existing = {col['name'] for col in inspect(db.engine).get_columns(table_name)}
+    added = []
+    for name, ddl in columns.items():
+        if name not in existing:
+            db.session.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {ddl}"))
+            added.append(name)
+    db.session.commit()
+    return added
+
+def ensure_indexes():
+    """Создать недостающие индексы, объявленные в моделях, в уже существующих таблицах.
+
+    db.create_all() создает индексы только вместе с новыми таблицами.
+    """
+    existing_tables = set(inspect(db.engine).get_table_names())
+    created = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index['name'] for index in inspect(db.engine).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                created.append(index.name)
+    return created
@@ -0,0 +1,55 @@
+from .db import db
+from datetime import datetime
+
+class ImageVariant(db.Model):
+    """Уменьшенная копия загруженного изображения (миниатюра, карточка, полный размер)"""
+    __tablename__ = 'image_variants'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    original_url = db.Column(db.String(500), nullable=False, index=True)  # URL исходного файла
+    variant = db.Column(db.String(20), nullable=False)  # thumb / card / full
+    format = db.Column(db.String(10), nullable=False)  # webp / jpeg
+    url = db.Column(db.String(500), nullable=False)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('original_url', 'variant', 'format', name='unique_image_variant'),)
+    
+    def to_dict(self):
+        return {
+            'variant': self.variant,
+            'format': self.format,
+            'url': self.url,
+            'width': self.width,
+            'height': self.height
+        }
+    
+    @staticmethod
+    def by_original(urls):
+        """Варианты для набора исходных URL одним IN-запросом: {original_url: [ImageVariant]}"""
+        urls = {url for url in urls if url}
+        result = {url: [] for url in urls}
+        if not urls:
+            return result
+        for variant in ImageVariant.query.filter(ImageVariant.original_url.in_(urls)).all():
+            result[variant.original_url].append(variant)
+        return result
+    
+    @staticmethod
+    def srcset(variants):
+        """Карта формат -> строка srcset ('url 160w, url 480w, ...'); None если вариантов нет"""
+        if not variants:
+            return None
+        by_format = {}
+        for variant in sorted(variants, key=lambda v: v.width or 0):
+            by_format.setdefault(variant.format, []).append(f"{variant.url} {variant.width}w")
+        return {format_name: ', '.join(items) for format_name, items in by_format.items()}
+    
+    @staticmethod
+    def pick(variants, name, format='jpeg'):
+        """URL варианта name в формате format (None если его еще нет)"""
+        for variant in variants or []:
+            if variant.variant == name and variant.format == format:
+                return variant.url
+        return None
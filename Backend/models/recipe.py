@@ -18,12 +18,25 @@ class Recipe(db.Model):
     # Статистика
     rating = db.Column(db.Float, default=0.0)
     rating_count = db.Column(db.Integer, default=0)
+    rating_sum = db.Column(db.Integer, default=0)  # Сумма оценок, для инкрементального среднего
     views = db.Column(db.Integer, default=0)
     likes = db.Column(db.Integer, default=0)
     comments_count = db.Column(db.Integer, default=0)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Списки сортируются по (created_at, id); фильтры автора, категории и сложности
+    # идут в паре с этой сортировкой, популярные - по views/likes
+    __table_args__ = (
+        db.Index('ix_recipes_created_id', 'created_at', 'id'),
+        db.Index('ix_recipes_author_created', 'author_id', 'created_at'),
+        db.Index('ix_recipes_category_created', 'category', 'created_at'),
+        db.Index('ix_recipes_difficulty_created', 'difficulty', 'created_at'),
+        db.Index('ix_recipes_cooking_time', 'cooking_time'),
+        db.Index('ix_recipes_views', 'views'),
+        db.Index('ix_recipes_likes', 'likes'),
+    )
 
     @property
     def step_images_list(self):
@@ -33,11 +46,15 @@ class Recipe(db.Model):
         
         # Ленивая загрузка при первом обращении
         from models.recipe import RecipeStepImage
+        from models.image import ImageVariant
         step_images = RecipeStepImage.query.filter_by(
             recipe_id=self.id
         ).order_by(RecipeStepImage.step_index).all()
         
-        self._step_images_cache = [img.to_dict() for img in step_images]
+        # Варианты главного изображения и изображений шагов - одним запросом
+        variants = ImageVariant.by_original([self.image_url] + [img.image_url for img in step_images])
+        self._image_variants_cache = variants.get(self.image_url, [])
+        self._step_images_cache = [img.to_dict(variants.get(img.image_url)) for img in step_images]
         return self._step_images_cache
     
     @step_images_list.setter
@@ -45,6 +62,20 @@ class Recipe(db.Model):
         """Сеттер: установить кэшированные изображения шагов"""
         self._step_images_cache = value
     
+    @property
+    def image_variants_list(self):
+        """Уменьшенные копии главного изображения (ImageVariant)"""
+        if hasattr(self, '_image_variants_cache'):
+            return self._image_variants_cache
+        
+        from models.image import ImageVariant
+        self._image_variants_cache = ImageVariant.by_original([self.image_url]).get(self.image_url, [])
+        return self._image_variants_cache
+    
+    @image_variants_list.setter
+    def image_variants_list(self, value):
+        self._image_variants_cache = value
+    
     def to_dict(self):
         import json
         ingredients = self.ingredients
@@ -65,6 +96,9 @@ class Recipe(db.Model):
         
         # ДЕБАГ: Проверяем image_url
         print(f"DEBUG [Recipe.to_dict]: id={self.id}, image_url={self.image_url}")
+        from models.image import ImageVariant
+        step_images = self.step_images_list
+        variants = self.image_variants_list
         return {
             'id': self.id,
             'title': self.title,
@@ -74,6 +108,9 @@ class Recipe(db.Model):
             'category': self.category,
             'difficulty': self.difficulty,
             'image_url': self.image_url,
+            # srcset по форматам и карточный вариант для списков (до обработки - оригинал)
+            'image_srcset': ImageVariant.srcset(variants),
+            'card_image_url': ImageVariant.pick(variants, 'card') or self.image_url,
             'author': self.author,
             'author_id': self.author_id,            
             'servings': self.servings,  # Добавляем servings в ответ API
@@ -84,7 +121,7 @@ class Recipe(db.Model):
             'comments_count': self.comments_count,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'step_images': self.step_images_list 
+            'step_images': step_images
         }
 
 class Rating(db.Model):
@@ -96,7 +133,10 @@ class Rating(db.Model):
     rating = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    __table_args__ = (db.UniqueConstraint('user_id', 'recipe_id', name='unique_user_recipe_rating'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'recipe_id', name='unique_user_recipe_rating'),
+        db.Index('ix_ratings_recipe', 'recipe_id'),
+    )
 
 class Comment(db.Model):
     __tablename__ = 'comments'
@@ -111,6 +151,12 @@ class Comment(db.Model):
     user = db.relationship('User', backref='comments')
     recipe = db.relationship('Recipe', backref='comments')
     
+    # Комментарии рецепта читаются по (recipe_id, created_at)
+    __table_args__ = (
+        db.Index('ix_comments_recipe_created', 'recipe_id', 'created_at'),
+        db.Index('ix_comments_user', 'user_id'),  # Счетчики пользователя (reconcile)
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -134,11 +180,44 @@ class RecipeStepImage(db.Model):
     # Связь с рецептом
     recipe = db.relationship('Recipe', backref=db.backref('step_images', lazy=True, cascade='all, delete-orphan'))
     
-    def to_dict(self):
+    __table_args__ = (db.Index('ix_recipe_step_images_recipe_step', 'recipe_id', 'step_index'),)
+    
+    def to_dict(self, variants=None):
+        from models.image import ImageVariant
         return {
             'id': self.id,
             'recipe_id': self.recipe_id,
             'step_index': self.step_index,
             'image_url': self.image_url,
+            'image_srcset': ImageVariant.srcset(variants),
+            'card_image_url': ImageVariant.pick(variants, 'card') or self.image_url,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+class RecipeIngredient(db.Model):
+    """Нормализованный индекс ингредиентов: одна строка на слово названия ингредиента"""
+    __tablename__ = 'recipe_ingredients'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)  # Порядковый номер ингредиента в рецепте
+    name = db.Column(db.String(200), nullable=False)  # Название как в рецепте
+    ingredient_key = db.Column(db.String(100), nullable=False)  # Нормализованное слово названия
+    quantity = db.Column(db.Float)
+    unit = db.Column(db.String(50))
+    
+    # Связь с рецептом
+    recipe = db.relationship('Recipe', backref=db.backref('ingredient_index', lazy=True, cascade='all, delete-orphan'))
+    
+    __table_args__ = (db.Index('ix_recipe_ingredients_key_recipe', 'ingredient_key', 'recipe_id'),)
+
+class RecipeActivity(db.Model):
+    """Просмотры и лайки рецепта за час - для рейтингов за день и неделю"""
+    __tablename__ = 'recipe_activity'
+    
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)  # Начало часа (UTC)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    likes = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (db.Index('ix_recipe_activity_bucket', 'bucket'),)
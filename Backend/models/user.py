@@ -12,18 +12,33 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     bio = db.Column(db.Text, default='')
     avatar_url = db.Column(db.String(500))
+    # Денормализованная статистика профиля (ведут сервисы, сверяет reconcile_user_stats.py)
+    recipes_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    favorites_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    comments_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    ratings_given = db.Column(db.Integer, default=0, nullable=False, server_default='0')
     
     # Связи
     recipes = db.relationship('Recipe', backref='user', lazy=True, foreign_keys='Recipe.author_id')
     favorites = db.relationship('Favorite', backref='user', lazy=True)
     
+    def avatar_fields(self):
+        """Аватар и его уменьшенные копии: srcset по форматам и миниатюра (до обработки - оригинал)"""
+        from models.image import ImageVariant
+        variants = ImageVariant.by_original([self.avatar_url]).get(self.avatar_url, []) if self.avatar_url else []
+        return {
+            'avatar_url': self.avatar_url,
+            'avatar_srcset': ImageVariant.srcset(variants),
+            'avatar_thumb_url': ImageVariant.pick(variants, 'thumb') or self.avatar_url
+        }
+    
     def to_dict(self):
         return {
             'id': self.id,
             'username': self.username,
             'email': self.email,
             'bio': self.bio,
-            'avatar_url': self.avatar_url,
+            **self.avatar_fields(),
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
     
@@ -41,5 +56,17 @@ class Favorite(db.Model):
     recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Уникальная пара пользователь-рецепт
-    __table_args__ = (db.UniqueConstraint('user_id', 'recipe_id', name='unique_user_recipe'),)
\ No newline at end of file
+    # Уникальная пара пользователь-рецепт; индекс для списка избранного по дате добавления
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'recipe_id', name='unique_user_recipe'),
+        db.Index('ix_favorites_user_created', 'user_id', 'created_at', 'id'),
+    )
+
+class UserSession(db.Model):
+    """Сессия пользователя для SQL-хранилища сессий"""
+    __tablename__ = 'user_sessions'
+    
+    session_id = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
\ No newline at end of file
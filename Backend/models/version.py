@@ -0,0 +1,10 @@
+from .db import db
+from datetime import datetime
+
+class CollectionVersion(db.Model):
+    """Счетчик версии коллекции (например, списка рецептов) для условных GET-запросов"""
+    __tablename__ = 'collection_versions'
+    
+    name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
@@ -0,0 +1,25 @@
+# Backend/reconcile_ratings.py
+# Пересчет агрегатов оценок рецептов (rating, rating_count, rating_sum)
+# по таблице ratings одним GROUP BY. Заодно добавляет колонку rating_sum
+# в базы, созданные до ее появления.
+#
+# Запуск: python reconcile_ratings.py
+from app import app
+from models.db import db, ensure_columns
+from services.rating_service import RatingService
+
+
+def reconcile_ratings():
+    with app.app_context():
+        db.create_all()
+
+        added = ensure_columns('recipes', {'rating_sum': 'INTEGER DEFAULT 0'})
+        if added:
+            print(f"✅ Добавлены колонки: {', '.join(added)}")
+
+        updated = RatingService().reconcile_ratings()
+        print(f"✅ Агрегаты оценок пересчитаны для {updated} рецептов")
+
+
+if __name__ == '__main__':
+    reconcile_ratings()
@@ -0,0 +1,25 @@
+# Backend/reconcile_user_stats.py
+# Пересчет статистики пользователей (recipes_count, favorites_count,
+# comments_count, ratings_given) по таблицам recipes, favorites, comments
+# и ratings. Заодно добавляет колонки счетчиков в базы, созданные до их появления.
+#
+# Запуск: python reconcile_user_stats.py
+from app import app
+from models.db import db, ensure_columns
+from services.user_stats_service import UserStatsService, USER_COUNTERS
+
+
+def reconcile_user_stats():
+    with app.app_context():
+        db.create_all()
+
+        added = ensure_columns('users', {name: 'INTEGER NOT NULL DEFAULT 0' for name in USER_COUNTERS})
+        if added:
+            print(f"✅ Добавлены колонки: {', '.join(added)}")
+
+        updated = UserStatsService().reconcile()
+        print(f"✅ Статистика пересчитана для {updated} пользователей")
+
+
+if __name__ == '__main__':
+    reconcile_user_stats()
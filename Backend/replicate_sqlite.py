@@ -0,0 +1,17 @@
+# Backend/replicate_sqlite.py
+# Учебный репликатор для локальной проверки разделения чтения и записи:
+# копирует основную SQLite-базу (DATABASE_URL) в файлы реплик
+# (DATABASE_REPLICA_URLS) каждые N секунд через online backup API.
+#
+# Запуск: DATABASE_REPLICA_URLS=sqlite:////tmp/cookbook_replica.db python replicate_sqlite.py [секунд]
+import sys
+from config import Config
+from services.replicator import run_replicator
+
+
+if __name__ == '__main__':
+    if not Config.DATABASE_REPLICA_URLS:
+        print("❌ Не заданы DATABASE_REPLICA_URLS")
+        sys.exit(1)
+    interval = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    run_replicator(Config.SQLALCHEMY_DATABASE_URI, Config.DATABASE_REPLICA_URLS, interval)
@@ -1,11 +1,37 @@
 import uuid
+from flask import g, has_app_context
+from sqlalchemy.orm import make_transient_to_detached
 from models.db import db
 from models.user import User
+from services.cache import TTLCache
+from services.session_store import MemorySessionStore, create_session_store
+
+# Общее хранилище сессий процесса; init_session_store() выбирает бэкенд по конфигу
+session_store = MemorySessionStore()
+
+# Снимки пользователей по user_id между запросами (короткий TTL); сама сессия
+# каждый раз проверяется в общем хранилище. Кэш у каждого процесса свой:
+# invalidate_user() сбрасывает его только в текущем воркере, в остальных
+# email, bio и аватар могут отставать от базы до USER_CACHE_TTL секунд.
+user_cache = TTLCache(maxsize=10000, ttl=30)
+# Колонки, которые в снимок не попадают и всегда читаются из базы при обращении:
+# старый пароль не должен действовать ни в одном воркере после смены
+UNCACHED_USER_COLUMNS = {'password_hash'}
+
+def init_session_store(app):
+    global session_store
+    session_store = create_session_store(app.config)
+    user_cache.ttl = app.config.get('USER_CACHE_TTL', user_cache.ttl)
+    user_cache.clear()
+    return session_store
 
-session_store = {}
 class AuthService:
     def __init__(self):
-        self.sessions = session_store  # Простое хранилище сессий
+        pass
+    
+    @property
+    def sessions(self):
+        return session_store
     
     def _generate_session_id(self):
         return str(uuid.uuid4())
@@ -78,14 +104,61 @@ class AuthService:
         return None, None, "Invalid username or password"
     
     def get_current_user(self, session_id):
-        if session_id in self.sessions:
-            user_id = self.sessions[session_id]
-            return User.query.get(user_id)
-        return None
+        """Пользователь сессии: один раз за запрос (flask.g), между запросами - из снимка"""
+        if not session_id:
+            return None
+        
+        memo = g.get('_current_user') if has_app_context() else None
+        if memo is not None and memo[0] == session_id:
+            return memo[1]
+        
+        user = self._load_user(session_id)
+        if has_app_context():
+            g._current_user = (session_id, user)
+        return user
+    
+    def _load_user(self, session_id):
+        # Сессия могла быть завершена в другом воркере - проверяем ее до кэша
+        user_id = self.sessions.get(session_id)
+        if user_id is None:
+            return None
+        
+        snapshot = user_cache.get(user_id)
+        if snapshot is not None:
+            # Присоединяем снимок к сессии без SELECT по первичному ключу;
+            # колонки вне снимка (password_hash) догружаются при первом обращении
+            user = User(**snapshot)
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+        
+        user = db.session.get(User, user_id)
+        if user:
+            user_cache.set(user_id, {
+                column.name: getattr(user, column.name)
+                for column in User.__table__.columns if column.name not in UNCACHED_USER_COLUMNS
+            })
+        return user
+    
+    def invalidate_user(self, user_id):
+        """Сбросить кэшированные снимки пользователя (после изменения профиля).
+
+        Действует только в текущем процессе: другие воркеры увидят изменения
+        email, bio и аватара по истечении USER_CACHE_TTL. Пароль в снимки не
+        попадает и проверяется по базе сразу.
+        """
+        user_cache.pop(user_id)
+        if has_app_context():
+            g.pop('_current_user', None)
     
     def logout_user(self, session_id):
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        self.sessions.delete(session_id)
+        if has_app_context():
+            g.pop('_current_user', None)
+    
+    def logout_everywhere(self, user_id):
+        """Завершить все сессии пользователя"""
+        self.invalidate_user(user_id)
+        return self.sessions.revoke_user(user_id)
     
     def get_user_by_id(self, user_id):
         return User.query.get(user_id)
@@ -1,10 +1,14 @@
 from models.db import db
 from datetime import datetime
-from models.recipe import Recipe
+from models.recipe import Recipe, Comment
+from models.user import User
+from services.pagination import paginate
+from services.recipe_cache import recipe_json_cache
+from services.user_stats_service import UserStatsService
 
 class CommentService:
     def __init__(self):
-        pass
+        self.user_stats = UserStatsService()
     
     def add_comment(self, recipe_id, user_id, text):
         try:
@@ -21,17 +25,43 @@ class CommentService:
             recipe = db.session.get(Recipe, recipe_id)
             if recipe:
                 recipe.comments_count += 1
+            self.user_stats.adjust(user_id, comments_count=1)
             
             db.session.commit()
+            recipe_json_cache.invalidate(recipe_id)
             return comment
         except Exception as e:
             db.session.rollback()
             print(f"Error adding comment: {e}")
             return None
     
-    def get_comments_for_recipe(self, recipe_id):
-        from models.recipe import Comment
-        return Comment.query.filter_by(recipe_id=recipe_id).order_by(Comment.created_at.desc()).all()
+    def get_comments_for_recipe(self, recipe_id, page_request=None):
+        """Страница комментариев рецепта с именами авторов одним JOIN-запросом.
+
+        Элементы страницы - словари в формате Comment.to_dict(), без ORM-объектов User.
+        """
+        query = db.session.query(
+            Comment.id, Comment.recipe_id, Comment.user_id, Comment.text,
+            Comment.created_at, User.username
+        ).outerjoin(User, User.id == Comment.user_id).filter(Comment.recipe_id == recipe_id)
+        
+        page = paginate(
+            query, page_request,
+            columns=(Comment.created_at, Comment.id),
+            key=lambda row: (row.created_at, row.id)
+        )
+        page.items = [self._row_to_dict(row) for row in page.items]
+        return page
+    
+    def _row_to_dict(self, row):
+        return {
+            'id': row.id,
+            'recipe_id': row.recipe_id,
+            'user_id': row.user_id,
+            'username': row.username or 'Unknown',
+            'text': row.text,
+            'created_at': row.created_at.isoformat() if row.created_at else None
+        }
     
     def delete_comment(self, comment_id, user_id):
         try:
@@ -43,8 +73,11 @@ class CommentService:
                 if recipe and recipe.comments_count > 0:
                     recipe.comments_count -= 1
                 
+                recipe_id = comment.recipe_id
+                self.user_stats.adjust(user_id, comments_count=-1)
                 db.session.delete(comment)
                 db.session.commit()
+                recipe_json_cache.invalidate(recipe_id)
                 return True
             return False
         except Exception as e:
@@ -1,25 +1,96 @@
-from models.db import db
+import threading
+from array import array
+from bisect import bisect_left
+from sqlalchemy import delete, select
+from models.db import db, dialect_insert
 from models.user import Favorite
 from models.recipe import Recipe
+from services.cache import TTLCache
+from services.pagination import paginate
+from services.recipe_service import RecipeService
+from services.user_stats_service import UserStatsService
+
+# user_id -> отсортированный array('l') id избранных рецептов. Кэш у каждого
+# процесса свой, поэтому TTL короткий: изменения из других процессов видны
+# для чтения не позже чем через TTL. Записи решаются по базе, а не по кэшу
+favorite_sets = TTLCache(maxsize=10000, ttl=5)
+_sets_lock = threading.Lock()
+
+
+def init_favorite_cache(app):
+    favorite_sets.ttl = app.config.get('FAVORITE_CACHE_TTL', favorite_sets.ttl)
+    favorite_sets.clear()
+
+
+def _contains(ids, recipe_id):
+    index = bisect_left(ids, recipe_id)
+    return index < len(ids) and ids[index] == recipe_id
+
 
 class FavoriteService:
     def __init__(self):
-        pass
+        self.user_stats = UserStatsService()
+        self.recipe_service = RecipeService()
+    
+    def favorite_ids(self, user_id):
+        """Отсортированный массив id избранных рецептов пользователя (из кэша или одним SELECT)"""
+        ids = favorite_sets.get(user_id)
+        if ids is None:
+            # Набор кэшируется надолго - читаем из основной базы, а не с отстающей реплики
+            rows = db.session.execute(
+                select(Favorite.recipe_id).where(Favorite.user_id == user_id).order_by(Favorite.recipe_id),
+                bind_arguments={'bind': db.engine}
+            ).scalars()
+            ids = array('l', rows)
+            favorite_sets.set(user_id, ids)
+        return ids
+    
+    def warm(self, user_id):
+        """Загрузить избранное в кэш заранее (при входе)"""
+        favorite_sets.pop(user_id)
+        return self.favorite_ids(user_id)
+    
+    def _update_cached(self, user_id, recipe_id, present):
+        # Массив не меняется на месте: читатели без блокировки видят целую копию
+        with _sets_lock:
+            ids = favorite_sets.get(user_id)
+            if ids is None or _contains(ids, recipe_id) == present:
+                return
+            updated = array('l', ids)
+            index = bisect_left(updated, recipe_id)
+            if present:
+                updated.insert(index, recipe_id)
+            else:
+                del updated[index]
+            favorite_sets.set(user_id, updated)
+    
+    def _insert(self, user_id, recipe_id):
+        """INSERT ... ON CONFLICT DO NOTHING; True если строка добавлена"""
+        insert = dialect_insert(db.session.get_bind(mapper=Favorite))
+        result = db.session.execute(
+            insert(Favorite.__table__)
+            .values(user_id=user_id, recipe_id=recipe_id)
+            .on_conflict_do_nothing(index_elements=['user_id', 'recipe_id'])
+        )
+        if result.rowcount:
+            self.user_stats.adjust(user_id, favorites_count=1)
+        return result.rowcount > 0
+    
+    def _delete(self, user_id, recipe_id):
+        """DELETE одной строки; True если она была"""
+        result = db.session.execute(
+            delete(Favorite).where(Favorite.user_id == user_id, Favorite.recipe_id == recipe_id)
+        )
+        if result.rowcount:
+            self.user_stats.adjust(user_id, favorites_count=-1)
+        return result.rowcount > 0
     
     def add_to_favorites(self, user_id, recipe_id):
+        """Добавить в избранное одним INSERT ... ON CONFLICT DO NOTHING"""
         try:
-            # Проверяем, нет ли уже в избранном
-            existing_favorite = Favorite.query.filter_by(
-                user_id=user_id, 
-                recipe_id=recipe_id
-            ).first()
-            
-            if existing_favorite:
-                return True  # Уже в избранном
-                
-            favorite = Favorite(user_id=user_id, recipe_id=recipe_id)
-            db.session.add(favorite)
+            self._insert(user_id, recipe_id)
             db.session.commit()
+            self._update_cached(user_id, recipe_id, True)
             return True
         except Exception as e:
             db.session.rollback()
@@ -27,35 +98,60 @@ class FavoriteService:
             return False
     
     def remove_from_favorites(self, user_id, recipe_id):
+        """Удалить из избранного одним DELETE; False если рецепта в избранном не было"""
         try:
-            favorite = Favorite.query.filter_by(
-                user_id=user_id, 
-                recipe_id=recipe_id
-            ).first()
-            
-            if favorite:
-                db.session.delete(favorite)
-                db.session.commit()
-                return True
-            return False
+            removed = self._delete(user_id, recipe_id)
+            db.session.commit()
+            self._update_cached(user_id, recipe_id, False)
+            return removed
         except Exception as e:
             db.session.rollback()
             print(f"Error removing from favorites: {e}")
             return False
     
+    def toggle_favorite(self, user_id, recipe_id):
+        """Переключить избранное: новое состояние (True/False) или None при ошибке.
+
+        Кэш не используется: в одной транзакции DELETE, и если он ничего
+        не удалил - INSERT. Так переключение верно, даже если кэш этого
+        процесса устарел.
+        """
+        try:
+            removed = self._delete(user_id, recipe_id)
+            if not removed:
+                self._insert(user_id, recipe_id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error toggling favorite: {e}")
+            return None
+        self._update_cached(user_id, recipe_id, not removed)
+        return not removed
+    
     def get_favorites(self, user_id):
-        favorites = Favorite.query.filter_by(user_id=user_id).all()
-        return [fav.recipe_id for fav in favorites]
+        return list(self.favorite_ids(user_id))
     
-    def get_favorite_recipes(self, user_id):
-        favorites = Favorite.query.filter_by(user_id=user_id).join(
-            Recipe, Favorite.recipe_id == Recipe.id
-        ).all()
-        return [fav.recipe.to_dict() for fav in favorites]
+    def get_favorite_recipes(self, user_id, page_request=None):
+        """Страница избранных рецептов, новые добавления первыми.
+
+        Один JOIN-запрос по индексу (user_id, created_at, id) и пакетная загрузка
+        изображений шагов - число запросов не зависит от размера избранного.
+        """
+        query = db.session.query(Recipe, Favorite.created_at, Favorite.id).join(
+            Favorite, Favorite.recipe_id == Recipe.id
+        ).filter(Favorite.user_id == user_id)
+        page = paginate(
+            query, page_request,
+            columns=(Favorite.created_at, Favorite.id),
+            key=lambda row: (row.created_at, row.id)
+        )
+        page.items = self.recipe_service.prime_step_images([row.Recipe for row in page.items])
+        return page
     
     def is_favorite(self, user_id, recipe_id):
-        favorite = Favorite.query.filter_by(
-            user_id=user_id, 
-            recipe_id=recipe_id
-        ).first()
-        return favorite is not None
\ No newline at end of file
+        return _contains(self.favorite_ids(user_id), recipe_id)
+    
+    def are_favorites(self, user_id, recipe_ids):
+        """Флаги избранного для набора рецептов: {recipe_id: bool}"""
+        ids = self.favorite_ids(user_id)
+        return {recipe_id: _contains(ids, recipe_id) for recipe_id in recipe_ids}
@@ -0,0 +1,354 @@
+import atexit
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from models.db import db
+from models.image import ImageVariant
+from models.recipe import Recipe, RecipeStepImage
+from models.user import User
+from services.recipe_cache import touch_recipes
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Без Pillow загрузки сохраняются, но варианты не строятся
+    Image = None
+    ImageOps = None
+
+# Каталог загрузок на диске и префикс их URL
+UPLOAD_ROOT = Config.UPLOAD_FOLDER
+UPLOAD_URL_PREFIX = '/uploads/'
+VARIANTS_DIR = 'variants'
+CHUNK_SIZE = 64 * 1024
+PART_SUFFIX = '.part'
+# Папки загрузок, на файлы которых ссылаются recipes, recipe_step_images и users
+UPLOAD_FOLDERS = ('recipes', 'avatars')
+# Ключи Image.info с метаданными, которые не храним вместе с оригиналом
+METADATA_KEYS = {'exif', 'xmp', 'XML:com.adobe.xmp', 'comment', 'photoshop'}
+# Имя оригинала по SHA-256 содержимого (save_upload): по такому имени всегда одни и те же байты
+CONTENT_ADDRESSED_NAME = re.compile(r'^[a-z_]*[0-9a-f]{64}\.[a-z0-9]+$')
+
+# Размер варианта - максимальная сторона в пикселях
+IMAGE_VARIANTS = {'thumb': 160, 'card': 480, 'full': 1600}
+# формат -> (формат Pillow, расширение файла, параметры сохранения)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def url_to_path(url):
+    """'/uploads/recipes/x.jpg' -> '<UPLOAD_ROOT>/recipes/x.jpg'"""
+    if url.startswith(UPLOAD_URL_PREFIX):
+        return os.path.join(UPLOAD_ROOT, *url[len(UPLOAD_URL_PREFIX):].split('/'))
+    return url.lstrip('/')
+
+
+def path_to_url(path):
+    """'<UPLOAD_ROOT>/recipes/x.jpg' -> '/uploads/recipes/x.jpg'"""
+    return UPLOAD_URL_PREFIX + os.path.relpath(path, UPLOAD_ROOT).replace(os.sep, '/')
+
+
+def is_content_addressed(filename):
+    """Имя загрузки по хэшу содержимого (варианты и старые файлы - нет)"""
+    return CONTENT_ADDRESSED_NAME.match(filename) is not None
+
+
+def spool_upload(file, directory):
+    """Потоково записать загрузку во временный файл в directory, попутно считая SHA-256.
+
+    Возвращает (путь временного файла, hex-дайджест); данные уже сброшены на диск (fsync).
+    """
+    digest = hashlib.sha256()
+    stream = getattr(file, 'stream', file)
+    fd, part_path = tempfile.mkstemp(dir=directory, suffix=PART_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+    except Exception:
+        os.remove(part_path)
+        raise
+    return part_path, digest.hexdigest()
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def strip_metadata(part_path, directory):
+    """Перекодировать загрузку без метаданных (EXIF с GPS, XMP, комментарии).
+
+    JPEG перекодируется, только если метаданные в нем есть; PNG - всегда (без
+    потерь). Ориентация из EXIF применяется к пикселям, ICC-профиль сохраняется.
+    GIF хранится как есть (EXIF в нем не бывает, а перекодирование теряет анимацию).
+    Возвращает (путь нового временного файла, SHA-256) или None, если исходный
+    файл подходит как есть.
+    """
+    if Image is None:
+        return None
+    with Image.open(part_path) as opened:
+        pil_format = opened.format
+        if pil_format not in ('JPEG', 'PNG'):
+            return None
+        if pil_format == 'JPEG' and not (len(opened.getexif()) or set(opened.info) & METADATA_KEYS):
+            return None
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+        options = {'icc_profile': opened.info.get('icc_profile')}
+        if pil_format == 'JPEG':
+            options.update(quality=95, optimize=True)
+        elif 'transparency' in opened.info:
+            options['transparency'] = opened.info['transparency']
+
+    fd, clean_path = tempfile.mkstemp(dir=directory, suffix=PART_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            image.save(out, pil_format, **{key: value for key, value in options.items() if value is not None})
+            out.flush()
+            os.fsync(out.fileno())
+    except Exception:
+        os.remove(clean_path)
+        raise
+    return clean_path, _file_digest(clean_path)
+
+
+def _prepare(image, pil_format):
+    """Привести режим изображения к поддерживаемому форматом"""
+    if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[-1])
+        return background
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        return image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    return image
+
+
+def generate_variants(image_url):
+    """Построить варианты изображения и записать их в image_variants.
+
+    Метаданные (EXIF, GPS) не переносятся в варианты; ориентация применяется заранее.
+    Повторный вызов перестраивает варианты (используется и для догрузки старых файлов).
+    """
+    if Image is None:
+        return []
+
+    source_path = url_to_path(image_url)
+    folder = os.path.join(os.path.dirname(source_path), VARIANTS_DIR)
+    os.makedirs(folder, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+
+    with Image.open(source_path) as opened:
+        opened.seek(0)  # Для анимированных GIF берем первый кадр
+        source = ImageOps.exif_transpose(opened)
+        source.load()
+
+    variants = []
+    for variant, max_side in IMAGE_VARIANTS.items():
+        resized = source.copy()
+        resized.thumbnail((max_side, max_side), Image.LANCZOS)
+        for format_name, (pil_format, ext, options) in VARIANT_FORMATS.items():
+            path = os.path.join(folder, f'{stem}_{variant}.{ext}')
+            # Уникальный временный файл: одно изображение могут обрабатывать два задания
+            fd, part_path = tempfile.mkstemp(dir=folder, suffix=PART_SUFFIX)
+            os.close(fd)
+            try:
+                _prepare(resized, pil_format).save(part_path, pil_format, **options)
+                os.replace(part_path, path)
+            except Exception:
+                os.remove(part_path)
+                raise
+            variants.append(ImageVariant(
+                original_url=image_url,
+                variant=variant,
+                format=format_name,
+                url=path_to_url(path),
+                width=resized.width,
+                height=resized.height
+            ))
+
+    ImageVariant.query.filter_by(original_url=image_url).delete()
+    db.session.add_all(variants)
+    # Рецепты с этим изображением могли быть закэшированы без вариантов
+    touch_recipes(db.session.connection(), referencing_recipe_ids(image_url))
+    db.session.commit()
+    return variants
+
+
+def referencing_recipe_ids(image_url):
+    """id рецептов, у которых image_url - главное изображение или изображение шага"""
+    main = db.session.query(Recipe.id).filter(Recipe.image_url == image_url)
+    steps = db.session.query(RecipeStepImage.recipe_id).filter(RecipeStepImage.image_url == image_url)
+    return {row[0] for row in main.union(steps).all()}
+
+
+class ImagePipeline:
+    """Фоновый пул обработки загруженных изображений"""
+
+    def __init__(self, max_workers=2):
+        self.app = None
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.max_workers = app.config.get('IMAGE_WORKERS', self.max_workers)
+        atexit.register(self.shutdown)
+
+    def submit(self, image_url):
+        """Поставить изображение в очередь на построение вариантов"""
+        if Image is None or self.app is None:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='image-pipeline'
+                )
+            return self._executor.submit(self._process, image_url)
+
+    def _process(self, image_url):
+        with self.app.app_context():
+            try:
+                return generate_variants(image_url)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error processing image {image_url}: {e}")
+                return []
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+image_pipeline = ImagePipeline()
+
+
+class ImageService:
+    def __init__(self):
+        self.ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+
+    def allowed_file(self, filename):
+        if not filename or '.' not in filename:
+            return False
+        return filename.rsplit('.', 1)[1].lower() in self.ALLOWED_EXTENSIONS
+
+    def save_upload(self, file, folder, prefix=''):
+        """Сохранить загрузку в uploads/<folder> под именем по SHA-256 содержимого.
+
+        Метаданные (EXIF с GPS и т.п.) удаляются до сохранения (strip_metadata), имя
+        считается по очищенному файлу. Повторная загрузка того же файла не создает
+        копию и возвращает прежний URL. Новые файлы ставятся в очередь на построение вариантов.
+        """
+        if not file or not self.allowed_file(file.filename):
+            return None
+
+        file_ext = file.filename.rsplit('.', 1)[1].lower()
+        if file_ext == 'jpeg':
+            file_ext = 'jpg'
+
+        upload_path = os.path.join(UPLOAD_ROOT, folder)
+        os.makedirs(upload_path, exist_ok=True)
+        part_path, digest = spool_upload(file, upload_path)
+        try:
+            cleaned = strip_metadata(part_path, upload_path)
+        except Exception as e:
+            # Нераспознанное изображение: варианты для него тоже не построятся
+            print(f"Error stripping metadata from upload: {e}")
+            cleaned = None
+        if cleaned is not None:
+            os.remove(part_path)
+            part_path, digest = cleaned
+
+        filename = f"{prefix}{digest}.{file_ext}"
+        file_path = os.path.join(upload_path, filename)
+        image_url = f"{UPLOAD_URL_PREFIX}{folder}/{filename}"
+
+        if os.path.exists(file_path):
+            os.remove(part_path)  # Такой файл уже хранится
+            # Новая загрузка еще не в БД: обновляем mtime, чтобы collect_garbage
+            # не удалил файл как давно осиротевший в окне grace_seconds
+            os.utime(file_path)
+            if ImageVariant.query.filter_by(original_url=image_url).first() is not None:
+                return image_url
+        else:
+            os.replace(part_path, file_path)
+
+        image_pipeline.submit(image_url)
+        return image_url
+
+    def reference_counts(self):
+        """Число ссылок на каждый загруженный файл из recipes, recipe_step_images и users"""
+        counts = Counter()
+        for column in (Recipe.image_url, RecipeStepImage.image_url, User.avatar_url):
+            rows = db.session.query(column, db.func.count()).filter(column.isnot(None)).group_by(column)
+            for url, count in rows:
+                counts[url] += count
+        return counts
+
+    def collect_garbage(self, grace_seconds=3600, dry_run=False):
+        """Удалить файлы загрузок без ссылок вместе с их вариантами.
+
+        Файлы моложе grace_seconds не трогаются: загрузка могла еще не попасть в БД.
+        Возвращает (число удаленных файлов, освобождено байт).
+        """
+        referenced = set(self.reference_counts())
+        cutoff = time.time() - grace_seconds
+        removed, freed = 0, 0
+        orphan_urls = []
+
+        for folder in UPLOAD_FOLDERS:
+            upload_path = os.path.join(UPLOAD_ROOT, folder)
+            if not os.path.isdir(upload_path):
+                continue
+            live_stems = set()
+            for name in os.listdir(upload_path):
+                path = os.path.join(upload_path, name)
+                if not os.path.isfile(path):
+                    continue
+                url = path_to_url(path)
+                if url in referenced or os.path.getmtime(path) > cutoff:
+                    live_stems.add(os.path.splitext(name)[0])
+                    continue
+                if not name.endswith(PART_SUFFIX):
+                    orphan_urls.append(url)
+                removed, freed = removed + 1, freed + os.path.getsize(path)
+                if not dry_run:
+                    os.remove(path)
+
+            # Варианты называются <stem>_<вариант>.<ext>: удаляем те, чей оригинал не сохранился
+            variants_path = os.path.join(upload_path, VARIANTS_DIR)
+            if os.path.isdir(variants_path):
+                for name in os.listdir(variants_path):
+                    path = os.path.join(variants_path, name)
+                    stem = os.path.splitext(name)[0].rsplit('_', 1)[0]
+                    if stem in live_stems or os.path.getmtime(path) > cutoff:
+                        continue
+                    removed, freed = removed + 1, freed + os.path.getsize(path)
+                    if not dry_run:
+                        os.remove(path)
+
+        if orphan_urls and not dry_run:
+            ImageVariant.query.filter(ImageVariant.original_url.in_(orphan_urls)).delete(
+                synchronize_session=False
+            )
+            db.session.commit()
+        return removed, freed
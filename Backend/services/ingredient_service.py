@@ -0,0 +1,149 @@
+import re
+import json
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+from models.db import db
+from models.recipe import Recipe, RecipeIngredient
+from services.search_service import normalize_text
+
+# "Спагетти - 400г", "Лук - 0.5 шт", "Сахар - 1/2 стакана"
+_AMOUNT_RE = re.compile(r'^\s*(\d+(?:[.,]\d+)?(?:\s*/\s*\d+)?)\s*(.*?)\s*$')
+
+
+def ingredient_keys(name):
+    """Нормализованные слова названия ингредиента: регистр, ё -> е, без чисел"""
+    return [word for word in re.findall(r'\w+', normalize_text(name)) if not word.isdigit()]
+
+
+def parse_amount(amount):
+    """'400г' -> (400.0, 'г'); '2 ст.л.' -> (2.0, 'ст.л.'); 'по вкусу' -> (None, 'по вкусу')"""
+    amount = (str(amount) if amount is not None else '').strip()
+    if not amount:
+        return None, None
+
+    match = _AMOUNT_RE.match(amount)
+    if not match:
+        return None, amount[:50]
+
+    number, unit = match.groups()
+    number = number.replace(',', '.').replace(' ', '')
+    if '/' in number:
+        numerator, denominator = number.split('/')
+        quantity = float(numerator) / float(denominator) if float(denominator) else None
+    else:
+        quantity = float(number)
+    return quantity, (unit[:50] or None)
+
+
+def parse_ingredients(raw):
+    """Разобрать ingredients рецепта в список (name, quantity, unit).
+
+    Поддерживает JSON-массив (как в to_dict) и старый формат через запятую.
+    """
+    if not raw or not isinstance(raw, str):
+        return []
+
+    parsed = None
+    if raw.lstrip().startswith('['):
+        try:
+            parsed = json.loads(raw)
+        except ValueError:
+            parsed = None
+
+    items = []
+    if isinstance(parsed, list):
+        for entry in parsed:
+            if isinstance(entry, dict):
+                name = entry.get('name') or entry.get('ingredient') or ''
+                quantity, unit = parse_amount(entry.get('amount') or entry.get('quantity'))
+                unit = entry.get('unit') or unit
+            else:
+                name, quantity, unit = str(entry), None, None
+            if str(name).strip():
+                items.append((str(name).strip(), quantity, unit))
+        return items
+
+    for part in raw.split(','):
+        name, _, amount = part.partition(' - ')
+        name = name.strip()
+        if name:
+            quantity, unit = parse_amount(amount)
+            items.append((name, quantity, unit))
+    return items
+
+
+def build_index_rows(raw):
+    """Строки индекса для текста ingredients: (position, name, key, quantity, unit)"""
+    rows = []
+    for position, (name, quantity, unit) in enumerate(parse_ingredients(raw)):
+        for key in dict.fromkeys(ingredient_keys(name)):
+            rows.append((position, name[:200], key[:100], quantity, unit[:50] if unit else None))
+    return rows
+
+
+@event.listens_for(Session, 'before_flush')
+def _sync_ingredient_index(session, flush_context, instances):
+    """Перестроить индекс ингредиентов для новых и измененных рецептов"""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Recipe):
+            continue
+        if obj not in session.new and not inspect(obj).attrs.ingredients.history.has_changes():
+            continue
+        obj.ingredient_index = [
+            RecipeIngredient(position=position, name=name, ingredient_key=key,
+                             quantity=quantity, unit=unit)
+            for position, name, key, quantity, unit in build_index_rows(obj.ingredients)
+        ]
+
+
+class IngredientService:
+    def __init__(self):
+        pass
+
+    def matching_recipe_ids(self, term):
+        """Подзапрос id рецептов, в которых есть все слова ингредиента term"""
+        keys = list(dict.fromkeys(ingredient_keys(term)))
+        if not keys:
+            return None
+        return (
+            select(RecipeIngredient.recipe_id)
+            .where(RecipeIngredient.ingredient_key.in_(keys))
+            .group_by(RecipeIngredient.recipe_id)
+            .having(func.count(func.distinct(RecipeIngredient.ingredient_key)) == len(keys))
+        )
+
+    def apply_filters(self, query, include_ingredients=None, exclude_ingredients=None):
+        """Фильтр по ингредиентам через индекс: пересечение include, вычитание exclude"""
+        for term in include_ingredients or []:
+            ids = self.matching_recipe_ids(term)
+            if ids is not None:
+                query = query.filter(Recipe.id.in_(ids))
+
+        for term in exclude_ingredients or []:
+            ids = self.matching_recipe_ids(term)
+            if ids is not None:
+                query = query.filter(~Recipe.id.in_(ids))
+        return query
+
+    def rebuild_index(self, chunk_size=1000):
+        """Перестроить индекс ингредиентов для всех рецептов (для существующих баз)"""
+        db.session.query(RecipeIngredient).delete()
+
+        batch = []
+        total = 0
+        for recipe_id, ingredients in db.session.query(Recipe.id, Recipe.ingredients).yield_per(chunk_size):
+            for position, name, key, quantity, unit in build_index_rows(ingredients):
+                batch.append({
+                    'recipe_id': recipe_id, 'position': position, 'name': name,
+                    'ingredient_key': key, 'quantity': quantity, 'unit': unit
+                })
+            if len(batch) >= chunk_size:
+                db.session.execute(RecipeIngredient.__table__.insert(), batch)
+                total += len(batch)
+                batch = []
+
+        if batch:
+            db.session.execute(RecipeIngredient.__table__.insert(), batch)
+            total += len(batch)
+        db.session.commit()
+        return total
@@ -0,0 +1,230 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, delete, func, select
+from models.db import db, dialect_insert
+from models.recipe import Recipe, RecipeActivity
+
+METRICS = ('views', 'likes')
+# Окно рейтинга -> длительность (None - за все время)
+WINDOWS = {'day': timedelta(days=1), 'week': timedelta(days=7), 'all': None}
+# Почасовая активность хранится с запасом относительно самого длинного окна
+ACTIVITY_RETENTION = timedelta(days=8)
+
+
+def current_bucket(now=None):
+    """Начало текущего часа (UTC) - ключ строки recipe_activity"""
+    return (now or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+
+
+def record_activity(connection, metric, counts, bucket=None):
+    """Прибавить counts {recipe_id: n} к почасовой активности одним пакетным UPSERT"""
+    if not counts:
+        return
+    activity = RecipeActivity.__table__
+    insert = dialect_insert(connection)
+    values = {'recipe_id': bindparam('recipe_id'), 'bucket': bindparam('bucket'), 'views': 0, 'likes': 0}
+    values[metric] = bindparam('delta')
+    statement = insert(activity).values(**values)
+    statement = statement.on_conflict_do_update(
+        index_elements=['recipe_id', 'bucket'],
+        set_={metric: activity.c[metric] + statement.excluded[metric]}
+    )
+    bucket = bucket or current_bucket()
+    connection.execute(statement, [
+        {'recipe_id': recipe_id, 'bucket': bucket, 'delta': delta} for recipe_id, delta in counts.items()
+    ])
+
+
+class Board:
+    """Счета одного рейтинга (метрика, окно) и отсортированные top-size мест.
+
+    scores ограничен: при 2 * candidates записей остаются candidates лучших.
+    Места хранятся ключами (-счет, -recipe_id) по возрастанию и обновляются
+    при каждом приращении за O(size), top() - срез списка.
+    """
+
+    def __init__(self, scores, size, candidates):
+        self.scores = scores  # recipe_id -> счет
+        self.size = size
+        self.candidates = candidates
+        self._rebuild()
+
+    def _rebuild(self):
+        best = heapq.nlargest(self.size, ((count, recipe_id) for recipe_id, count in self.scores.items() if count > 0))
+        self.ranks = sorted((-count, -recipe_id) for count, recipe_id in best)
+        self.ranked = {recipe_id for _, recipe_id in best}
+
+    def _trim(self):
+        best = heapq.nlargest(self.candidates, self.scores.items(), key=lambda item: (item[1], item[0]))
+        self.scores = dict(best)
+
+    def add(self, recipe_id, count):
+        old = self.scores.get(recipe_id)
+        if old is None and len(self.scores) >= 2 * self.candidates:
+            self._trim()
+        new = (old or 0) + count
+        self.scores[recipe_id] = new
+        if recipe_id in self.ranked:
+            del self.ranks[bisect_left(self.ranks, (-old, -recipe_id))]
+            if count < 0 or new <= 0:
+                # Место мог занять рецепт не из top-size - пересобираем
+                self._rebuild()
+                return
+            insort(self.ranks, (-new, -recipe_id))
+        elif new > 0 and (len(self.ranks) < self.size or (-new, -recipe_id) < self.ranks[-1]):
+            insort(self.ranks, (-new, -recipe_id))
+            self.ranked.add(recipe_id)
+            if len(self.ranks) > self.size:
+                _, dropped = self.ranks.pop()
+                self.ranked.discard(-dropped)
+
+    def remove(self, recipe_id):
+        """Убрать рецепт из счетов и мест; освободившееся место занимает следующий кандидат"""
+        self.scores.pop(recipe_id, None)
+        if recipe_id in self.ranked:
+            self._rebuild()
+
+    def top(self, limit):
+        return [(-recipe_id, -count) for count, recipe_id in self.ranks[:limit]]
+
+
+class Leaderboard:
+    """Рейтинги рецептов по просмотрам и лайкам за день, неделю и все время в памяти процесса.
+
+    База рейтинга - top-N кандидатов из БД на момент сверки; приращения из
+    счетчика просмотров и лайков добавляются сразу. Сверка с БД (там же
+    просмотры и лайки других процессов) - в фоновом потоке раз в
+    reconcile_interval секунд; синхронно только первая загрузка.
+    """
+
+    def __init__(self, size=100, candidates=1000, reconcile_interval=300):
+        self.app = None
+        self.size = size
+        self.candidates = candidates
+        self.reconcile_interval = reconcile_interval
+        self._boards = {(metric, window): Board({}, size, candidates) for metric in METRICS for window in WINDOWS}
+        self._since_reconcile = None  # приращения во время сверки
+        self._removed_since_reconcile = None  # рецепты, удаленные во время сверки
+        self._reconciled_at = None
+        self._lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()
+        self._worker = None
+
+    def init_app(self, app):
+        self.app = app
+        self.size = app.config.get('LEADERBOARD_SIZE', self.size)
+        self.candidates = max(self.size, app.config.get('LEADERBOARD_CANDIDATES', self.candidates))
+        self.reconcile_interval = app.config.get('LEADERBOARD_RECONCILE_INTERVAL', self.reconcile_interval)
+
+    def record(self, metric, recipe_id, count=1):
+        """Учесть просмотр или лайк во всех окнах рейтинга"""
+        with self._lock:
+            for window in WINDOWS:
+                self._boards[(metric, window)].add(recipe_id, count)
+            if self._since_reconcile is not None:
+                pending = self._since_reconcile[metric]
+                pending[recipe_id] = pending.get(recipe_id, 0) + count
+
+    def remove(self, recipe_id):
+        """Убрать удаленный рецепт из всех рейтингов, не дожидаясь сверки.
+
+        Другие процессы уберут его при своей следующей сверке.
+        """
+        with self._lock:
+            for board in self._boards.values():
+                board.remove(recipe_id)
+            if self._removed_since_reconcile is not None:
+                self._removed_since_reconcile.add(recipe_id)
+
+    def top(self, metric, window='all', limit=None):
+        """Список (recipe_id, счет) лучших рецептов по убыванию счета"""
+        if metric not in METRICS or window not in WINDOWS:
+            raise ValueError(f"Unknown leaderboard {metric}/{window}")
+        if self._reconciled_at is None:
+            # Первая загрузка: без нее рейтинг пуст
+            with self._reconcile_lock:
+                if self._reconciled_at is None:
+                    self._reconcile()
+        self._ensure_worker()
+        limit = min(limit or self.size, self.size)
+        with self._lock:
+            return self._boards[(metric, window)].top(limit)
+
+    def _ensure_worker(self):
+        if self.app is None:
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='leaderboard-reconcile', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.reconcile_interval)
+            try:
+                with self.app.app_context():
+                    self.reconcile()
+            except Exception as e:
+                print(f"Error reconciling leaderboard: {e}")
+
+    def reconcile(self):
+        """Перезагрузить рейтинги из БД (recipes и recipe_activity)"""
+        with self._reconcile_lock:
+            self._reconcile()
+
+    def _reconcile(self):
+        from services.view_counter import view_counter
+
+        with self._lock:
+            self._since_reconcile = {metric: {} for metric in METRICS}
+            self._removed_since_reconcile = set()
+        try:
+            # Накопленные просмотры должны попасть в БД до чтения рейтингов
+            view_counter.flush()
+            scores = self._load_scores()
+            self._prune_activity()
+        finally:
+            with self._lock:
+                pending, self._since_reconcile = self._since_reconcile, None
+                removed, self._removed_since_reconcile = self._removed_since_reconcile, None
+        with self._lock:
+            for (metric, window), window_scores in scores.items():
+                for recipe_id, count in pending[metric].items():
+                    window_scores[recipe_id] = window_scores.get(recipe_id, 0) + count
+                # Счета могли быть прочитаны до удаления рецепта
+                for recipe_id in removed:
+                    window_scores.pop(recipe_id, None)
+            self._boards = {key: Board(board_scores, self.size, self.candidates) for key, board_scores in scores.items()}
+            self._reconciled_at = time.time()
+
+    def _load_scores(self):
+        now = datetime.utcnow()
+        scores = {}
+        for metric in METRICS:
+            for window, span in WINDOWS.items():
+                if span is None:
+                    column = getattr(Recipe, metric)
+                    query = select(Recipe.id, column).where(column > 0).order_by(column.desc())
+                else:
+                    total = func.sum(getattr(RecipeActivity, metric))
+                    query = (
+                        select(RecipeActivity.recipe_id, total)
+                        .where(RecipeActivity.bucket >= current_bucket(now - span))
+                        .group_by(RecipeActivity.recipe_id)
+                        .having(total > 0)
+                        .order_by(total.desc())
+                    )
+                rows = db.session.execute(query.limit(self.candidates)).all()
+                scores[(metric, window)] = {recipe_id: count for recipe_id, count in rows}
+        return scores
+
+    def _prune_activity(self):
+        activity = RecipeActivity.__table__
+        with db.engine.begin() as connection:
+            connection.execute(delete(activity).where(activity.c.bucket < current_bucket() - ACTIVITY_RETENTION))
+
+
+leaderboard = Leaderboard()
@@ -0,0 +1,128 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+from models.recipe import Recipe
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+class PageRequest:
+    """Параметры запроса страницы: курсор, размер и нужен ли общий счетчик"""
+
+    def __init__(self, cursor=None, limit=None, with_total=False):
+        self.cursor = cursor or None
+        self.limit = self._clamp_limit(limit)
+        self.with_total = with_total
+
+    @staticmethod
+    def _clamp_limit(limit):
+        try:
+            limit = int(limit) if limit is not None else DEFAULT_PAGE_SIZE
+        except (TypeError, ValueError):
+            limit = DEFAULT_PAGE_SIZE
+        return max(1, min(limit, MAX_PAGE_SIZE))
+
+    @classmethod
+    def from_args(cls, args):
+        """Собрать запрос страницы из query-параметров (?cursor=&limit=&count=)"""
+        with_total = str(args.get('count', '')).lower() in ('1', 'true', 'yes')
+        return cls(args.get('cursor'), args.get('limit'), with_total)
+
+
+class Page:
+    """Страница результатов. Итерируется как список элементов"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(values, direction):
+    """Упаковать значения ключа в непрозрачный курсор"""
+    payload = {
+        'd': direction,
+        'k': [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Распаковать курсор. Бросает ValueError, если курсор поврежден"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = payload['d']
+        raw_values = payload['k']
+        if direction not in ('next', 'prev') or len(raw_values) != len(columns):
+            raise ValueError('Invalid cursor')
+
+        values = []
+        for column, value in zip(columns, raw_values):
+            if value is not None and column.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            values.append(value)
+        return direction, values
+    except ValueError:
+        raise
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def _recipe_key(recipe):
+    return recipe.created_at, recipe.id
+
+
+def paginate(query, page_request=None, columns=None, key=None):
+    """Keyset-пагинация запроса по убыванию (columns).
+
+    По умолчанию ключ - (Recipe.created_at, Recipe.id). Стоимость страницы
+    не зависит от глубины листания, в отличие от OFFSET.
+    """
+    page_request = page_request or PageRequest()
+    columns = columns or (Recipe.created_at, Recipe.id)
+    key = key or _recipe_key
+
+    total = query.order_by(None).count() if page_request.with_total else None
+
+    direction = 'next'
+    if page_request.cursor:
+        direction, values = decode_cursor(page_request.cursor, columns)
+        if direction == 'next':
+            query = query.filter(tuple_(*columns) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+
+    if direction == 'next':
+        query = query.order_by(None).order_by(*[c.desc() for c in columns])
+    else:
+        query = query.order_by(None).order_by(*[c.asc() for c in columns])
+
+    rows = query.limit(page_request.limit + 1).all()
+    has_more = len(rows) > page_request.limit
+    items = rows[:page_request.limit]
+
+    next_cursor = prev_cursor = None
+    if direction == 'next':
+        if has_more and items:
+            next_cursor = encode_cursor(key(items[-1]), 'next')
+        if page_request.cursor and items:
+            prev_cursor = encode_cursor(key(items[0]), 'prev')
+    else:
+        items.reverse()
+        if has_more and items:
+            prev_cursor = encode_cursor(key(items[0]), 'prev')
+        if items:
+            next_cursor = encode_cursor(key(items[-1]), 'next')
+
+    return Page(items, next_cursor, prev_cursor, total)
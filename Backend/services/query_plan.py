@@ -0,0 +1,74 @@
+import re
+import threading
+from sqlalchemy import event
+from models.db import db
+
+# Полный проход по таблице: 'SCAN recipes' (без индекса) - в отличие от 'SCAN recipes USING INDEX ...'
+_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+_TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+class QueryPlanAdvisor:
+    """Режим разработки: EXPLAIN QUERY PLAN для каждого SELECT и предупреждение о полных сканах.
+
+    Каждый текст запроса проверяется один раз за процесс. Работает только для SQLite.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.findings = {}  # текст запроса -> список замечаний
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        if not app.config.get('QUERY_PLAN_ADVISOR'):
+            return
+        with app.app_context():
+            for engine in db.engines.values():
+                if engine.dialect.name == 'sqlite':
+                    event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    def explain(self, dbapi_connection, statement, parameters=()):
+        """Строки плана запроса (detail) через отдельный курсор, в обход событий SQLAlchemy"""
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return [row[3] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def analyze(self, plan):
+        """Замечания по плану: полные сканы таблиц моделей и сортировки во временном B-дереве"""
+        tables = set(db.metadata.tables)
+        problems = []
+        for detail in plan:
+            match = _SCAN_RE.match(detail.strip())
+            if match and match.group(1) in tables:
+                problems.append(f"полный скан таблицы {match.group(1)}")
+            elif detail.strip().startswith(_TEMP_SORT):
+                problems.append("сортировка без индекса (temp b-tree)")
+        return problems
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return
+        with self._lock:
+            if statement in self._seen:
+                return
+            self._seen.add(statement)
+
+        try:
+            plan = self.explain(conn.connection.dbapi_connection, statement, parameters)
+        except Exception as e:
+            print(f"QUERY PLAN: не удалось разобрать запрос: {e}")
+            return
+
+        problems = self.analyze(plan)
+        if problems:
+            self.findings[statement] = problems
+            print(f"QUERY PLAN: {'; '.join(problems)}\n  {' '.join(statement.split())}\n  "
+                  + '\n  '.join(plan))
+
+
+query_plan_advisor = QueryPlanAdvisor()
@@ -1,9 +1,13 @@
 from models.db import db
 from models.recipe import Rating, Recipe
+from services.recipe_cache import recipe_json_cache
+from services.version_service import VersionService, recipe_collections
+from services.user_stats_service import UserStatsService
+from sqlalchemy import and_, case, func, select, update
 
 class RatingService:
     def __init__(self):
-        pass
+        self.user_stats = UserStatsService()
     
     def add_rating(self, recipe_id, user_id, rating_value):
         try:
@@ -14,9 +18,10 @@ class RatingService:
             ).first()
             
             if existing_rating:
-                # Обновляем существующий рейтинг
+                # Обновляем существующий рейтинг: меняется только сумма
                 old_rating = existing_rating.rating
                 existing_rating.rating = rating_value
+                self._update_recipe_rating(recipe_id, rating_value - old_rating, 0)
             else:
                 # Добавляем новый рейтинг
                 rating = Rating(
@@ -25,26 +30,82 @@ class RatingService:
                     rating=rating_value
                 )
                 db.session.add(rating)
+                self._update_recipe_rating(recipe_id, rating_value, 1)
+                self.user_stats.adjust(user_id, ratings_given=1)
             
-            # Пересчитываем средний рейтинг
-            self._update_recipe_rating(recipe_id)
             db.session.commit()
+            recipe_json_cache.invalidate(recipe_id)
             return True
         except Exception as e:
             db.session.rollback()
             print(f"Error adding rating: {e}")
             return False
     
-    def _update_recipe_rating(self, recipe_id):
-        ratings = Rating.query.filter_by(recipe_id=recipe_id).all()
-        if ratings:
-            total_score = sum(r.rating for r in ratings)
-            average_rating = total_score / len(ratings)
-            
-            recipe = Recipe.query.get(recipe_id)
-            if recipe:
-                recipe.rating = round(average_rating, 1)
-                recipe.rating_count = len(ratings)
+    def _update_recipe_rating(self, recipe_id, sum_delta, count_delta):
+        """Применить изменение оценки одним атомарным UPDATE, без чтения всех оценок.
+
+        Рецепт с оценками, но с нулевой суммой - из базы до появления rating_sum,
+        еще не прошедшей reconcile_ratings.py. Для него сумма и число берутся
+        из ratings (уже с этим изменением), дальше он считается приращениями.
+        """
+        if not sum_delta and not count_delta:
+            return
+        
+        db.session.flush()  # Изменение оценки должно быть в ratings до пересчета
+        stale = and_(func.coalesce(Recipe.rating_count, 0) > 0, func.coalesce(Recipe.rating_sum, 0) == 0)
+        recipe_ratings = select(Rating.rating).where(Rating.recipe_id == recipe_id).subquery()
+        new_sum = case(
+            (stale, select(func.coalesce(func.sum(recipe_ratings.c.rating), 0)).scalar_subquery()),
+            else_=func.coalesce(Recipe.rating_sum, 0) + sum_delta
+        )
+        new_count = case(
+            (stale, select(func.count()).select_from(recipe_ratings).scalar_subquery()),
+            else_=func.coalesce(Recipe.rating_count, 0) + count_delta
+        )
+        db.session.execute(
+            update(Recipe)
+            .where(Recipe.id == recipe_id)
+            .values(
+                rating_sum=new_sum,
+                rating_count=new_count,
+                rating=func.coalesce(func.round(new_sum * 1.0 / func.nullif(new_count, 0), 1), 0.0)
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
+    def reconcile_ratings(self):
+        """Пересчитать агрегаты оценок всех рецептов одним GROUP BY"""
+        totals = (
+            select(
+                Rating.recipe_id,
+                func.sum(Rating.rating).label('rating_sum'),
+                func.count(Rating.id).label('rating_count')
+            )
+            .group_by(Rating.recipe_id)
+            .subquery()
+        )
+        
+        recipes = Recipe.__table__
+        # Рецепты без оценок
+        reset = db.session.execute(
+            update(recipes)
+            .where(~recipes.c.id.in_(select(Rating.recipe_id)))
+            .values(rating_sum=0, rating_count=0, rating=0.0)
+        )
+        # Рецепты с оценками: UPDATE ... FROM (SELECT ... GROUP BY recipe_id)
+        updated = db.session.execute(
+            update(recipes)
+            .where(recipes.c.id == totals.c.recipe_id)
+            .values(
+                rating_sum=totals.c.rating_sum,
+                rating_count=totals.c.rating_count,
+                rating=func.round(totals.c.rating_sum * 1.0 / totals.c.rating_count, 1)
+            )
+        )
+        VersionService().bump(*recipe_collections())
+        db.session.commit()
+        recipe_json_cache.clear()
+        return updated.rowcount + reset.rowcount
     
     def get_user_rating(self, recipe_id, user_id):
         rating = Rating.query.filter_by(
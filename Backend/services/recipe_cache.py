@@ -0,0 +1,86 @@
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+from models.recipe import Recipe, RecipeStepImage
+from services.cache import TTLCache
+from services.version_service import bump_versions, recipe_collections
+
+
+def touch_recipes(connection, recipe_ids):
+    """Сменить updated_at рецептов в текущей транзакции.
+
+    Для изменений вне строки рецепта (изображения шагов, варианты изображений):
+    закэшированный JSON устаревает во всех процессах, а не только в этом.
+    Версии списков с этими рецептами тоже меняются.
+    """
+    recipe_ids = {recipe_id for recipe_id in recipe_ids if recipe_id}
+    if recipe_ids:
+        recipes = Recipe.__table__
+        connection.execute(
+            update(recipes).where(recipes.c.id.in_(recipe_ids)).values(updated_at=datetime.utcnow())
+        )
+        bump_versions(connection, recipe_collections(recipe_ids))
+
+
+@event.listens_for(Session, 'after_flush')
+def _touch_on_flush(session, flush_context):
+    """ORM-изменения изображений шагов меняют версию своих рецептов"""
+    touch_recipes(session.connection(), {
+        obj.recipe_id
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, RecipeStepImage)
+    })
+
+
+class RecipeJsonCache:
+    """Кэш готового JSON (bytes) рецептов.
+
+    Запись действительна, пока совпадает версия рецепта (updated_at, views):
+    правки полей рецепта меняют updated_at, сброс просмотров меняет views.
+    Изменения изображений шагов и их вариантов тоже меняют updated_at (touch_recipes).
+    invalidate() только освобождает память в этом процессе.
+    """
+
+    def __init__(self, maxsize=5000):
+        self._cache = TTLCache(maxsize=maxsize)
+
+    @staticmethod
+    def _version(recipe):
+        return recipe.updated_at, recipe.views
+
+    def get(self, recipe):
+        entry = self._cache.get(recipe.id)
+        if entry is not None and entry[0] == self._version(recipe):
+            return entry[1]
+        return None
+
+    def encode(self, recipe):
+        """JSON рецепта в bytes: из кэша или через to_dict()"""
+        cached = self.get(recipe)
+        if cached is not None:
+            return cached
+        encoded = current_app.json.dumps(recipe.to_dict()).encode()
+        self._cache.set(recipe.id, (self._version(recipe), encoded))
+        return encoded
+
+    def encode_many(self, recipes):
+        """JSON-массив рецептов, склеенный из готовых фрагментов без повторного кодирования"""
+        return b'[' + b','.join(self.encode(recipe) for recipe in recipes) + b']'
+
+    def encode_map(self, recipe_ids, recipes):
+        """JSON-объект {id: рецепт} в порядке recipe_ids; для отсутствующих рецептов - null"""
+        by_id = {recipe.id: recipe for recipe in recipes}
+        return b'{' + b','.join(
+            b'"%d":' % recipe_id + (self.encode(by_id[recipe_id]) if recipe_id in by_id else b'null')
+            for recipe_id in recipe_ids
+        ) + b'}'
+
+    def invalidate(self, recipe_id):
+        self._cache.pop(recipe_id)
+
+    def clear(self):
+        self._cache.clear()
+
+
+recipe_json_cache = RecipeJsonCache()
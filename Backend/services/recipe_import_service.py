@@ -0,0 +1,220 @@
+import codecs
+import csv
+import json
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import insert, select
+from models.db import db
+from models.recipe import Recipe, RecipeIngredient
+from models.user import User
+from services.ingredient_service import build_index_rows
+from services.user_stats_service import UserStatsService
+from services.version_service import VersionService, recipe_collections
+
+IMPORT_FORMATS = ('ndjson', 'csv')
+# Сколько ошибок валидации возвращать в отчете (остальные только считаются)
+MAX_REPORTED_ERRORS = 100
+
+# Текстовое поле -> максимальная длина
+TEXT_FIELDS = {
+    'title': 200,
+    'category': 100,
+    'difficulty': 50,
+    'image_url': 500,
+}
+INT_FIELDS = {'cooking_time': 0, 'servings': 6, 'views': 0, 'likes': 0}
+# Автор рецептов без пользователя (так их сохраняет RecipeService.add_recipe)
+GUEST_AUTHOR = 'Гость'
+# Поля экспорта: то же, что принимает импорт, плюс id и рейтинг для справки
+EXPORT_COLUMNS = (
+    'id', 'title', 'ingredients', 'instructions', 'cooking_time', 'category', 'difficulty',
+    'image_url', 'servings', 'author', 'author_id', 'views', 'likes', 'rating', 'rating_count',
+    'created_at', 'updated_at'
+)
+
+
+def iter_ndjson(stream):
+    """Объекты NDJSON из байтового потока по одной строке: (номер строки, dict или ошибка)"""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)  # json сам декодирует UTF-8
+        except ValueError as e:
+            yield line_number, ValueError(f'invalid JSON: {e}')
+
+
+def iter_csv(stream):
+    """Строки CSV с заголовком из байтового потока: (номер строки, dict)"""
+    reader = csv.DictReader(codecs.getreader('utf-8-sig')(stream))
+    for row in reader:
+        yield reader.line_num, {key: value for key, value in row.items() if value not in (None, '')}
+
+
+def _as_text(value):
+    """Списки ингредиентов/шагов хранятся JSON-строкой, как их сохраняет фронтенд"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value).strip()
+
+
+def validate_row(row, authors, now):
+    """Проверить строку импорта и превратить ее в параметры INSERT для recipes.
+
+    authors - {username: id, id: username} всех пользователей.
+    Возвращает dict или бросает ValueError.
+    """
+    if not isinstance(row, dict):
+        raise ValueError('row must be an object')
+
+    values = {}
+    for field in ('title', 'ingredients'):
+        if not row.get(field) or not _as_text(row[field]):
+            raise ValueError(f'{field} is required')
+    values['ingredients'] = _as_text(row['ingredients'])
+    values['instructions'] = _as_text(row['instructions']) if row.get('instructions') is not None else None
+
+    # null и пустая строка - поле не задано
+    for field, max_length in TEXT_FIELDS.items():
+        value = row.get(field)
+        value = (str(value).strip() or None) if value is not None else None
+        if value and len(value) > max_length:
+            raise ValueError(f'{field} is longer than {max_length} characters')
+        values[field] = value
+    values['difficulty'] = values['difficulty'] or 'Легкий'
+
+    for field, default in INT_FIELDS.items():
+        value = row.get(field)
+        if value is None or value == '':
+            value = default
+        elif isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+            raise ValueError(f'{field} must be an integer')
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'{field} must be an integer')
+        if value < 0:
+            raise ValueError(f'{field} must not be negative')
+        values[field] = value
+
+    # Автор: по имени пользователя или по id. Без автора, с автором GUEST_AUTHOR
+    # или с явным author_id: null (так выгружает export_ndjson) рецепт гостевой
+    author, author_id = row.get('author'), row.get('author_id')
+    is_guest = not author or author == GUEST_AUTHOR or ('author_id' in row and row['author_id'] is None)
+    if author_id not in (None, ''):
+        try:
+            author_id = int(author_id)
+        except (TypeError, ValueError):
+            raise ValueError('author_id must be an integer')
+        author = author or authors.get(author_id)
+        if author is None or authors.get(author) != author_id:
+            raise ValueError(f'unknown author_id {author_id}')
+    elif is_guest:
+        author_id = None
+    else:
+        author_id = authors.get(author)
+        if author_id is None:
+            raise ValueError(f'unknown author {author!r}')
+    values['author'] = str(author).strip()[:100] if author else GUEST_AUTHOR
+    values['author_id'] = author_id
+
+    try:
+        created_at = datetime.fromisoformat(row['created_at']) if row.get('created_at') else now
+    except (TypeError, ValueError):
+        raise ValueError('created_at must be an ISO 8601 date')
+    values['created_at'] = created_at
+    values['updated_at'] = created_at
+    return values
+
+
+class RecipeImportService:
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.user_stats = UserStatsService()
+        self.version_service = VersionService()
+
+    def author_lookup(self):
+        """Таблица авторов в обе стороны ({username: id, id: username}) одним запросом"""
+        authors = {}
+        for username, user_id in db.session.execute(select(User.username, User.id)):
+            authors[username] = user_id
+            authors[user_id] = username
+        return authors
+
+    def import_stream(self, stream, format='ndjson', dry_run=False):
+        """Импортировать рецепты из NDJSON/CSV-потока пакетами по chunk_size строк.
+
+        Каждый пакет - один INSERT на все рецепты и один на их индекс ингредиентов,
+        затем commit; память не растет с размером файла. Невалидные строки
+        пропускаются и попадают в отчет.
+        """
+        if format not in IMPORT_FORMATS:
+            raise ValueError(f'format must be one of {", ".join(IMPORT_FORMATS)}')
+        rows = iter_ndjson(stream) if format == 'ndjson' else iter_csv(stream)
+
+        authors = self.author_lookup()
+        now = datetime.utcnow()
+        report = {'imported': 0, 'failed': 0, 'errors': []}
+        chunk = []
+        for line_number, row in rows:
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                chunk.append(validate_row(row, authors, now))
+            except ValueError as e:
+                report['failed'] += 1
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'line': line_number, 'error': str(e)})
+                continue
+            if len(chunk) >= self.chunk_size:
+                report['imported'] += self._insert_chunk(chunk, dry_run)
+                chunk = []
+        if chunk:
+            report['imported'] += self._insert_chunk(chunk, dry_run)
+        return report
+
+    def _insert_chunk(self, chunk, dry_run=False):
+        if dry_run:
+            return len(chunk)
+        try:
+            recipe_ids = db.session.execute(
+                insert(Recipe.__table__).returning(Recipe.__table__.c.id, sort_by_parameter_order=True),
+                chunk
+            ).scalars().all()
+
+            # ORM-хуки (индекс ингредиентов, версии, счетчики) обходятся - обновляем вручную
+            ingredient_rows = [
+                {'recipe_id': recipe_id, 'position': position, 'name': name,
+                 'ingredient_key': key, 'quantity': quantity, 'unit': unit}
+                for recipe_id, values in zip(recipe_ids, chunk)
+                for position, name, key, quantity, unit in build_index_rows(values['ingredients'])
+            ]
+            if ingredient_rows:
+                db.session.execute(insert(RecipeIngredient.__table__), ingredient_rows)
+
+            per_author = Counter(values['author_id'] for values in chunk if values['author_id'])
+            for author_id, count in per_author.items():
+                self.user_stats.adjust(author_id, recipes_count=count)
+            self.version_service.bump(*recipe_collections(recipe_ids))
+            db.session.commit()
+            return len(recipe_ids)
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def export_ndjson(self):
+        """Генератор строк NDJSON со всеми рецептами, по порядку id.
+
+        Читает серверным курсором пакетами по chunk_size строк - таблица целиком
+        в память не загружается.
+        """
+        columns = [Recipe.__table__.c[name] for name in EXPORT_COLUMNS]
+        result = db.session.execute(
+            select(*columns).order_by(Recipe.id).execution_options(yield_per=self.chunk_size)
+        )
+        for row in result:
+            record = {}
+            for name, value in zip(EXPORT_COLUMNS, row):
+                record[name] = value.isoformat() if isinstance(value, datetime) else value
+            yield json.dumps(record, ensure_ascii=False) + '\n'
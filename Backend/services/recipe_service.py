@@ -1,6 +1,16 @@
 from models.db import db
-from models.recipe import Recipe
+from models.recipe import Recipe, RecipeActivity
 from sqlalchemy import or_
+from services.pagination import paginate, Page
+from services.search_service import SearchService
+from services.ingredient_service import IngredientService
+from services.view_counter import view_counter
+from services.leaderboard import leaderboard, record_activity
+from services.recipe_cache import recipe_json_cache, touch_recipes
+from services.image_service import ImageService, UPLOAD_ROOT
+from services.user_stats_service import UserStatsService
+from services.version_service import VersionService, comments_collection
+from models.image import ImageVariant
 import os
 import json
 from werkzeug.utils import secure_filename
@@ -8,7 +18,11 @@ from werkzeug.utils import secure_filename
 class RecipeService:
     def __init__(self):
         self.ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-        self.UPLOAD_FOLDER = 'uploads/recipes'
+        self.UPLOAD_FOLDER = os.path.join(UPLOAD_ROOT, 'recipes')
+        self.search_service = SearchService()
+        self.ingredient_service = IngredientService()
+        self.image_service = ImageService()
+        self.user_stats = UserStatsService()
     
     def allowed_file(self, filename):
         if not filename or '.' not in filename:
@@ -18,50 +32,15 @@ class RecipeService:
         return filename.rsplit('.', 1)[1].lower() in self.ALLOWED_EXTENSIONS
     
     def save_image(self, file):
-        """Сохранить изображение и вернуть URL"""
+        """Сохранить изображение и вернуть URL.
+
+        Файл записывается на диск потоково, варианты строятся в фоне (ImageService).
+        """
         if file and file.filename and self.allowed_file(file.filename):
-            # Получаем оригинальное имя и расширение
-            original_filename = file.filename
-            
-            # Проверяем расширение
-            if '.' in original_filename:
-                file_ext = original_filename.rsplit('.', 1)[1].lower()
-            else:
-                file_ext = ''
-            
-            if file_ext not in self.ALLOWED_EXTENSIONS:
-                print(f"DEBUG: File extension '{file_ext}' not allowed")
-                return None
-            
-            # Создаем уникальное имя файла С СОХРАНЕНИЕМ РАСШИРЕНИЯ
-            from datetime import datetime
-            import uuid
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            unique_id = str(uuid.uuid4())[:8]
-            
-            # Генерируем безопасное имя файла с расширением
-            unique_filename = f"{timestamp}_{unique_id}.{file_ext}"
-            
-            # Убедитесь, что папка существует
-            upload_path = self.UPLOAD_FOLDER  # Уже 'uploads/recipes'
-            os.makedirs(upload_path, exist_ok=True)
-            
-            file_path = os.path.join(upload_path, unique_filename)
-            
             try:
-                print(f"DEBUG: Saving image to {file_path}")
-                file.save(file_path)
-                
-                # Проверяем, что файл сохранен
-                if os.path.exists(file_path):
-                    file_size = os.path.getsize(file_path)
-                    print(f"DEBUG: Image saved successfully, size: {file_size} bytes, path: {file_path}")
-                else:
-                    print(f"DEBUG: ERROR - File not saved!")
-                
-                # Возвращаем относительный URL
-                return f"/uploads/recipes/{unique_filename}"
+                image_url = self.image_service.save_upload(file, 'recipes')
+                print(f"DEBUG: Image saved: {image_url}")
+                return image_url
             except Exception as e:
                 print(f"Error saving image: {e}")
                 import traceback
@@ -89,16 +68,57 @@ class RecipeService:
                     saved_images.append(step_image)
         
         db.session.commit()
+        recipe_json_cache.invalidate(recipe_id)
         return saved_images
 
-    def get_all_recipes(self):
-        return Recipe.query.order_by(Recipe.created_at.desc()).all()
+    def prime_step_images(self, recipes):
+        """Загрузить изображения шагов и варианты изображений для набора рецептов IN-запросами"""
+        from models.recipe import RecipeStepImage
+        recipes = [recipe for recipe in recipes if recipe is not None]
+        if not recipes:
+            return recipes
+        
+        by_recipe = {recipe.id: [] for recipe in recipes}
+        step_images = RecipeStepImage.query.filter(
+            RecipeStepImage.recipe_id.in_(list(by_recipe))
+        ).order_by(RecipeStepImage.recipe_id, RecipeStepImage.step_index).all()
+        
+        # Варианты главных изображений и изображений шагов - еще одним IN-запросом
+        variants = ImageVariant.by_original(
+            [recipe.image_url for recipe in recipes] + [img.image_url for img in step_images]
+        )
+        
+        for img in step_images:
+            by_recipe[img.recipe_id].append(img.to_dict(variants.get(img.image_url)))
+        
+        # Используем сеттер через property
+        for recipe in recipes:
+            recipe.step_images_list = by_recipe[recipe.id]
+            recipe.image_variants_list = variants.get(recipe.image_url, [])
+        return recipes
+    
+    def _page(self, query, page_request=None):
+        """Страница рецептов с заранее загруженными изображениями шагов"""
+        page = paginate(query, page_request)
+        self.prime_step_images(page.items)
+        return page
+
+    def get_all_recipes(self, page_request=None):
+        return self._page(Recipe.query, page_request)
+    
+    def get_recipe_version(self, recipe_id):
+        """(updated_at, views) рецепта для условных запросов; None если рецепта нет"""
+        row = db.session.query(Recipe.updated_at, Recipe.views).filter(Recipe.id == recipe_id).first()
+        return (row.updated_at, row.views) if row else None
+    
+    def record_view(self, recipe_id):
+        # Просмотр копится в памяти и пишется в базу пакетом
+        view_counter.record(recipe_id)
     
     def get_recipe_by_id(self, recipe_id):
         recipe = Recipe.query.get(recipe_id)
         if recipe:
-            recipe.views += 1
-            db.session.commit()
+            self.record_view(recipe.id)
         return recipe
     
     def add_recipe(self, recipe_data, user=None):
@@ -118,6 +138,7 @@ class RecipeService:
             )
             
             db.session.add(new_recipe)
+            self.user_stats.adjust(new_recipe.author_id, recipes_count=1)
             db.session.commit()
             return new_recipe
         except Exception as e:
@@ -142,6 +163,7 @@ class RecipeService:
                 recipe.image_url = recipe_data.get('image_url', recipe.image_url)
                 
                 db.session.commit()
+                recipe_json_cache.invalidate(recipe_id)
                 return recipe
             return None
         except Exception as e:
@@ -160,8 +182,14 @@ class RecipeService:
             
             # Проверяем права доступа
             if user and (user.id == recipe.author_id or user.username == "admin"):
+                self.user_stats.adjust(recipe.author_id, recipes_count=-1)
+                self.user_stats.release_recipe(recipe_id)
+                RecipeActivity.query.filter_by(recipe_id=recipe_id).delete()
                 db.session.delete(recipe)
+                VersionService().bump(comments_collection(recipe_id))
                 db.session.commit()
+                recipe_json_cache.invalidate(recipe_id)
+                leaderboard.remove(recipe_id)
                 print(f"Recipe {recipe_id} deleted successfully")
                 return True
             
@@ -172,27 +200,38 @@ class RecipeService:
             print(f"Error deleting recipe: {e}")
             return False
     
-    def search_recipes(self, query):
+    def search_recipes(self, query, page_request=None, sort='relevance'):
+        """Полнотекстовый поиск по названию, ингредиентам, инструкциям и категории"""
         if not query:
-            return self.get_all_recipes()
-        
-        query_lower = query.lower()
+            return self.get_all_recipes(page_request)
         
-        # Получаем все рецепты и фильтруем на Python
-        all_recipes = Recipe.query.all()
+        # Без FTS5 (не SQLite) - LIKE по тем же полям, сортировка по дате
+        if not self.search_service.is_available():
+            return self._page(
+                Recipe.query.filter(self.search_service.fallback_filter(query)), page_request
+            )
         
-        results = []
-        for recipe in all_recipes:
-            # Ищем в названии (основной поиск)
-            if recipe.title and query_lower in recipe.title.lower():
-                results.append(recipe)
+        match = self.search_service.build_match_query(query)
+        if not match:
+            return Page([])
         
-        # Сортируем по дате
-        results.sort(key=lambda x: x.created_at, reverse=True)
+        matches = self.search_service.match_subquery(match)
+        if sort == 'date':
+            return self._page(Recipe.query.join(matches, matches.c.id == Recipe.id), page_request)
         
-        return results
+        # Сортировка по BM25: курсор строится по (score, id)
+        ranked = db.session.query(Recipe, matches.c.score).join(matches, matches.c.id == Recipe.id)
+        page = paginate(
+            ranked, page_request,
+            columns=(matches.c.score, Recipe.id),
+            key=lambda row: (row[1], row[0].id)
+        )
+        page.items = [recipe for recipe, _ in page.items]
+        self.prime_step_images(page.items)
+        return page
     
-    def get_recipes_by_filters(self, category=None, difficulty=None, max_cooking_time=None):
+    def get_recipes_by_filters(self, category=None, difficulty=None, max_cooking_time=None,
+                               include_ingredients=None, exclude_ingredients=None, page_request=None):
         query = Recipe.query
         
         if category:
@@ -204,29 +243,27 @@ class RecipeService:
         if max_cooking_time:
             query = query.filter(Recipe.cooking_time <= int(max_cooking_time))
         
-        return query.order_by(Recipe.created_at.desc()).all()
+        # Ингредиенты - через индекс recipe_ingredients
+        query = self.ingredient_service.apply_filters(query, include_ingredients, exclude_ingredients)
+        
+        return self._page(query, page_request)
 
     def get_recipes_by_ingredients(self, include_ingredients=None, exclude_ingredients=None):
-        query = Recipe.query
-        
-        if include_ingredients:
-            include_terms = [term.lower() for term in include_ingredients]
-            for term in include_terms:
-                query = query.filter(Recipe.ingredients.ilike(f'%{term}%'))
+        query = self.ingredient_service.apply_filters(
+            Recipe.query, include_ingredients, exclude_ingredients
+        )
         
-        if exclude_ingredients:
-            exclude_terms = [term.lower() for term in exclude_ingredients]
-            for term in exclude_terms:
-                query = query.filter(~Recipe.ingredients.ilike(f'%{term}%'))
-        
-        return query.order_by(Recipe.created_at.desc()).all()
+        return self.prime_step_images(query.order_by(Recipe.created_at.desc()).all())
        
     def increment_likes(self, recipe_id):
         try:
             recipe = Recipe.query.get(recipe_id)
             if recipe:
                 recipe.likes += 1
+                record_activity(db.session.connection(), 'likes', {recipe.id: 1})
                 db.session.commit()
+                recipe_json_cache.invalidate(recipe_id)
+                leaderboard.record('likes', recipe.id)
                 return recipe
             return None
         except Exception as e:
@@ -234,22 +271,33 @@ class RecipeService:
             print(f"Error incrementing likes: {e}")
             return None
     
-    def get_popular_recipes(self, limit=5):
-        return Recipe.query.order_by(Recipe.views.desc()).limit(limit).all()
+    def get_popular_recipes(self, limit=5, window='all'):
+        return self.get_recipes_by_ids([recipe_id for recipe_id, _ in self.get_top_ranking('views', window, limit)])
+    
+    def get_most_liked_recipes(self, limit=5, window='all'):
+        return self.get_recipes_by_ids([recipe_id for recipe_id, _ in self.get_top_ranking('likes', window, limit)])
     
-    def get_most_liked_recipes(self, limit=5):
-        return Recipe.query.order_by(Recipe.likes.desc()).limit(limit).all()
+    def get_top_ranking(self, metric, window='all', limit=10):
+        """Места рейтинга из памяти процесса: [(recipe_id, счет)], без SQL"""
+        return leaderboard.top(metric, window, limit)
     
-    def get_recipes_by_author(self, author_id):
-        return Recipe.query.filter_by(author_id=author_id).order_by(Recipe.created_at.desc()).all()
+    def get_recipes_by_ids(self, recipe_ids):
+        """Рецепты одним IN-запросом в порядке recipe_ids (отсутствующие пропускаются)"""
+        if not recipe_ids:
+            return []
+        by_id = {recipe.id: recipe for recipe in Recipe.query.filter(Recipe.id.in_(set(recipe_ids))).all()}
+        return self.prime_step_images([by_id.get(recipe_id) for recipe_id in recipe_ids])
+    
+    def get_recipes_by_author(self, author_id, page_request=None):
+        return self._page(Recipe.query.filter_by(author_id=author_id), page_request)
     
     def get_categories(self):
         categories = db.session.query(Recipe.category).distinct().all()
         return [cat[0] for cat in categories if cat[0]]
     
-    def get_user_recipes(self, user_id):
+    def get_user_recipes(self, user_id, page_request=None):
         """Получить рецепты пользователя"""
-        return Recipe.query.filter_by(author_id=user_id).order_by(Recipe.created_at.desc()).all()
+        return self._page(Recipe.query.filter_by(author_id=user_id), page_request)
     
     def create_recipe_with_steps(self, recipe_data, step_images=None, user=None):
         """Создать рецепт с изображениями шагов"""
@@ -307,6 +355,7 @@ class RecipeService:
                             )
                             db.session.add(step_image)
             
+            self.user_stats.adjust(new_recipe.author_id, recipes_count=1)
             db.session.commit()
             
             # Загружаем связанные изображения шагов
@@ -319,13 +368,7 @@ class RecipeService:
     
     def _load_step_images(self, recipe):
         """Загрузить и кэшировать изображения шагов для рецепта"""
-        from models.recipe import RecipeStepImage
-        step_images = RecipeStepImage.query.filter_by(
-            recipe_id=recipe.id
-        ).order_by(RecipeStepImage.step_index).all()
-        
-        # Используем сеттер через property
-        recipe.step_images_list = [img.to_dict() for img in step_images]
+        self.prime_step_images([recipe])
     
 
     def get_recipe_with_step_images(self, recipe_id):
@@ -391,9 +434,11 @@ class RecipeService:
                 
                 # Обновляем изображения шагов только если они переданы
                 if step_images is not None:
-                    # Удаляем старые изображения шагов
+                    # Удаляем старые изображения шагов (массовый DELETE идет мимо
+                    # ORM-событий - версию рецепта меняем сами)
                     from models.recipe import RecipeStepImage
                     RecipeStepImage.query.filter_by(recipe_id=recipe.id).delete()
+                    touch_recipes(db.session.connection(), [recipe.id])
                     
                     # Сохраняем новые изображения шагов если есть
                     for step_index, image_file in enumerate(step_images):
@@ -408,6 +453,7 @@ class RecipeService:
                                 db.session.add(step_image)
                 
                 db.session.commit()
+                recipe_json_cache.invalidate(recipe.id)
                 
                 # Загружаем связанные изображения шагов
                 self._load_step_images(recipe)
@@ -0,0 +1,84 @@
+import atexit
+import sqlite3
+import threading
+import time
+from sqlalchemy.engine import make_url
+
+
+def sqlite_path(url):
+    """Путь к файлу базы из SQLite-URL (None для прочих СУБД и баз в памяти)"""
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return None
+    return url.database
+
+
+class SqliteReplicator:
+    """Учебный заменитель репликации: периодически копирует основную SQLite-базу в реплики.
+
+    Копирование идет через online backup API SQLite, поэтому основная база
+    доступна на запись во время копирования. Реплики отстают на интервал
+    копирования - как асинхронные реплики в настоящем развертывании.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.primary = None
+        self.replicas = []
+        self._thread = None
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        self.interval = app.config.get('SQLITE_REPLICATOR_INTERVAL', self.interval)
+        self.configure(app.config['SQLALCHEMY_DATABASE_URI'], app.config.get('DATABASE_REPLICA_URLS') or [])
+        if self.interval and self.primary and self.replicas:
+            self.start()
+
+    def configure(self, primary_url, replica_urls):
+        self.primary = sqlite_path(primary_url)
+        self.replicas = [path for path in map(sqlite_path, replica_urls) if path]
+
+    def sync_once(self):
+        """Скопировать основную базу во все реплики"""
+        source = sqlite3.connect(self.primary)
+        try:
+            for path in self.replicas:
+                target = sqlite3.connect(path)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+        finally:
+            source.close()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sqlite-replicator', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync_once()
+            except Exception as e:
+                print(f"Error replicating database: {e}")
+            self._stop.wait(self.interval)
+
+
+replicator = SqliteReplicator()
+
+
+def run_replicator(primary_url, replica_urls, interval=1.0):
+    """Копировать базу в реплики в текущем потоке, пока процесс не остановят"""
+    instance = SqliteReplicator(interval)
+    instance.configure(primary_url, replica_urls)
+    while True:
+        started = time.perf_counter()
+        instance.sync_once()
+        print(f"✅ Реплики обновлены за {(time.perf_counter() - started) * 1000:.0f} мс")
+        time.sleep(interval)
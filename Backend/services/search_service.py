@@ -0,0 +1,100 @@
+import re
+from sqlalchemy import text, select, Float, type_coerce, and_, or_, false, column, table, literal_column
+from models.db import db
+from models.recipe import Recipe
+
+FTS_TABLE = 'recipes_fts'
+# Поля рецепта, попадающие в индекс, и их веса для BM25
+FTS_COLUMNS = ('title', 'ingredients', 'instructions', 'category')
+FTS_WEIGHTS = (10.0, 3.0, 1.0, 2.0)
+
+FTS_TRIGGERS = ('recipes_fts_ai', 'recipes_fts_ad', 'recipes_fts_au')
+
+# Состояние индекса по URL базы: True - FTS5 готов, False - используем fallback
+_index_state = {}
+
+
+def _normalize_sql(expr):
+    """SQL-нормализация текста перед индексацией: ё -> е (регистр сворачивает unicode61)"""
+    return f"replace(replace(coalesce({expr}, ''), 'ё', 'е'), 'Ё', 'Е')"
+
+
+def normalize_text(value):
+    """Та же нормализация на стороне Python для поисковых запросов"""
+    return (value or '').lower().replace('ё', 'е')
+
+
+class SearchService:
+    def __init__(self):
+        pass
+
+    def is_available(self):
+        """Доступен ли полнотекстовый индекс FTS5 для текущей базы"""
+        url = str(db.engine.url)
+        if url not in _index_state:
+            _index_state[url] = db.engine.dialect.name == 'sqlite' and self.ensure_index()
+        return _index_state[url]
+
+    def _index_exists(self):
+        names = {row[0] for row in db.session.execute(text(
+            "SELECT name FROM sqlite_master WHERE name IN (:t, :ai, :ad, :au)"
+        ), {'t': FTS_TABLE, 'ai': FTS_TRIGGERS[0], 'ad': FTS_TRIGGERS[1], 'au': FTS_TRIGGERS[2]})}
+        return len(names) == 1 + len(FTS_TRIGGERS)
+
+    def ensure_index(self):
+        """Создать FTS5-таблицу и триггеры синхронизации, если их нет"""
+        try:
+            if not self._index_exists():
+                self.rebuild_index()
+            return True
+        except Exception as e:
+            db.session.rollback()
+            print(f"FTS5 index unavailable, falling back to LIKE search: {e}")
+            return False
+
+    def rebuild_index(self):
+        """Пересоздать индекс с нуля и заполнить его из таблицы recipes"""
+        columns = ', '.join(FTS_COLUMNS)
+        new_values = ', '.join(_normalize_sql(f'new.{c}') for c in FTS_COLUMNS)
+        statements = [
+            f"DROP TABLE IF EXISTS {FTS_TABLE}",
+            *[f"DROP TRIGGER IF EXISTS {name}" for name in FTS_TRIGGERS],
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"{columns}, tokenize = 'unicode61 remove_diacritics 2')",
+            f"CREATE TRIGGER {FTS_TRIGGERS[0]} AFTER INSERT ON recipes BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+            f"CREATE TRIGGER {FTS_TRIGGERS[1]} AFTER DELETE ON recipes BEGIN "
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END",
+            f"CREATE TRIGGER {FTS_TRIGGERS[2]} AFTER UPDATE OF {columns} ON recipes BEGIN "
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; "
+            f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+            f"INSERT INTO {FTS_TABLE}(rowid, {columns}) SELECT id, "
+            + ', '.join(_normalize_sql(c) for c in FTS_COLUMNS) + " FROM recipes",
+        ]
+        for statement in statements:
+            db.session.execute(text(statement))
+        db.session.commit()
+
+    def build_match_query(self, query):
+        """Строка запроса -> выражение MATCH: все слова, каждое как префикс"""
+        terms = re.findall(r'\w+', normalize_text(query))
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def match_subquery(self, match):
+        """Подзапрос (id, score) по совпадениям; больший score - более релевантный"""
+        fts = table(FTS_TABLE, column('rowid'))
+        weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+        score = type_coerce(-literal_column(f'bm25({FTS_TABLE}, {weights})'), Float)
+        return select(
+            fts.c.rowid.label('id'), score.label('score')
+        ).where(literal_column(FTS_TABLE).op('MATCH')(match)).subquery()
+
+    def fallback_filter(self, query):
+        """Условие поиска для баз без FTS5: LIKE по всем индексируемым полям"""
+        conditions = []
+        for term in re.findall(r'\w+', query):
+            pattern = f'%{term}%'
+            conditions.append(or_(*[
+                getattr(Recipe, name).ilike(pattern) for name in FTS_COLUMNS
+            ]))
+        return and_(*conditions) if conditions else false()
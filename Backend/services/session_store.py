@@ -0,0 +1,288 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, select, update
+from models.db import db
+from models.user import UserSession
+
+DEFAULT_TTL = 7 * 24 * 3600  # 7 дней
+
+
+class SessionStore(ABC):
+    """Интерфейс хранилища сессий: session_id -> user_id.
+
+    get() продлевает сессию (скользящее окно ttl), revoke_user() завершает
+    все сессии пользователя, sweep_expired() удаляет просроченные.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+
+    @abstractmethod
+    def get(self, session_id):
+        """user_id сессии (с продлением) или None, если ее нет или она истекла"""
+
+    @abstractmethod
+    def set(self, session_id, user_id):
+        """Создать сессию на ttl секунд"""
+
+    @abstractmethod
+    def delete(self, session_id):
+        """Завершить одну сессию (выход)"""
+
+    @abstractmethod
+    def revoke_user(self, user_id):
+        """Завершить все сессии пользователя; возвращает их число"""
+
+    @abstractmethod
+    def sweep_expired(self):
+        """Удалить просроченные записи; возвращает их число"""
+
+    @abstractmethod
+    def keys(self):
+        """id действующих сессий"""
+
+    # Совместимость со старым dict-хранилищем
+    def __contains__(self, session_id):
+        return session_id is not None and self.get(session_id) is not None
+
+    def __getitem__(self, session_id):
+        user_id = self.get(session_id)
+        if user_id is None:
+            raise KeyError(session_id)
+        return user_id
+
+    def __setitem__(self, session_id, user_id):
+        self.set(session_id, user_id)
+
+    def __delitem__(self, session_id):
+        self.delete(session_id)
+
+    def __len__(self):
+        return len(self.keys())
+
+
+class MemorySessionStore(SessionStore):
+    """LRU в памяти процесса с TTL. Подходит для одного воркера и разработки"""
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=10000):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._sessions = OrderedDict()  # session_id -> (user_id, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            user_id, expires_at = entry
+            now = time.time()
+            if expires_at <= now:
+                del self._sessions[session_id]
+                return None
+            self._sessions[session_id] = (user_id, now + self.ttl)
+            self._sessions.move_to_end(session_id)
+            return user_id
+
+    def set(self, session_id, user_id):
+        with self._lock:
+            self._sessions[session_id] = (user_id, time.time() + self.ttl)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def revoke_user(self, user_id):
+        with self._lock:
+            revoked = [sid for sid, (uid, _) in self._sessions.items() if uid == user_id]
+            for sid in revoked:
+                del self._sessions[sid]
+            return len(revoked)
+
+    def sweep_expired(self):
+        with self._lock:
+            now = time.time()
+            expired = [sid for sid, (_, expires_at) in self._sessions.items() if expires_at <= now]
+            for sid in expired:
+                del self._sessions[sid]
+            return len(expired)
+
+    def keys(self):
+        self.sweep_expired()
+        with self._lock:
+            return list(self._sessions.keys())
+
+
+class SqlSessionStore(SessionStore):
+    """Сессии в таблице user_sessions: общие для всех воркеров, переживают перезапуск"""
+
+    def __init__(self, ttl=DEFAULT_TTL, sweep_every=100):
+        super().__init__(ttl)
+        self.sweep_every = sweep_every
+        self._writes = 0
+
+    def _execute(self, statement):
+        # Отдельное соединение: не коммитим чужие изменения из сессии запроса
+        with db.engine.begin() as connection:
+            return connection.execute(statement)
+
+    def get(self, session_id):
+        sessions = UserSession.__table__
+        row = self._execute(
+            select(sessions.c.user_id, sessions.c.expires_at)
+            .where(sessions.c.session_id == session_id)
+        ).first()
+        if row is None:
+            return None
+
+        now = datetime.utcnow()
+        if row.expires_at <= now:
+            self.delete(session_id)
+            return None
+
+        # Продлеваем не на каждом запросе, а когда прошла половина ttl
+        if row.expires_at - now < timedelta(seconds=self.ttl / 2):
+            self._execute(
+                update(sessions)
+                .where(sessions.c.session_id == session_id)
+                .values(expires_at=now + timedelta(seconds=self.ttl))
+            )
+        return row.user_id
+
+    def set(self, session_id, user_id):
+        now = datetime.utcnow()
+        self._execute(UserSession.__table__.insert().values(
+            session_id=session_id,
+            user_id=user_id,
+            created_at=now,
+            expires_at=now + timedelta(seconds=self.ttl)
+        ))
+        self._writes += 1
+        if self._writes % self.sweep_every == 0:
+            self.sweep_expired()
+
+    def delete(self, session_id):
+        self._execute(delete(UserSession.__table__).where(UserSession.__table__.c.session_id == session_id))
+
+    def revoke_user(self, user_id):
+        result = self._execute(delete(UserSession.__table__).where(UserSession.__table__.c.user_id == user_id))
+        return result.rowcount
+
+    def sweep_expired(self):
+        sessions = UserSession.__table__
+        result = self._execute(delete(sessions).where(sessions.c.expires_at <= datetime.utcnow()))
+        return result.rowcount
+
+    def keys(self):
+        sessions = UserSession.__table__
+        rows = self._execute(
+            select(sessions.c.session_id).where(sessions.c.expires_at > datetime.utcnow())
+        )
+        return [row.session_id for row in rows]
+
+    def __len__(self):
+        sessions = UserSession.__table__
+        return self._execute(
+            select(func.count()).select_from(sessions).where(sessions.c.expires_at > datetime.utcnow())
+        ).scalar()
+
+
+class RedisSessionStore(SessionStore):
+    """Сессии в Redis (или любом сервере с протоколом Redis).
+
+    client - объект с API redis-py; в тестах можно передать fakeredis.FakeRedis().
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, url='redis://localhost:6379/0', client=None, prefix='cookbook'):
+        super().__init__(ttl)
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError('SESSION_BACKEND=redis requires the "redis" package')
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _session_key(self, session_id):
+        return f'{self.prefix}:session:{session_id}'
+
+    def _user_key(self, user_id):
+        return f'{self.prefix}:user_sessions:{user_id}'
+
+    def get(self, session_id):
+        key = self._session_key(session_id)
+        pipe = self.client.pipeline()
+        pipe.get(key)
+        pipe.expire(key, self.ttl)  # Скользящее продление
+        value, _ = pipe.execute()
+        if value is None:
+            return None
+        user_id = int(value)
+        self.client.expire(self._user_key(user_id), self.ttl)
+        return user_id
+
+    def set(self, session_id, user_id):
+        pipe = self.client.pipeline()
+        pipe.set(self._session_key(session_id), user_id, ex=self.ttl)
+        pipe.sadd(self._user_key(user_id), session_id)
+        pipe.expire(self._user_key(user_id), self.ttl)
+        pipe.execute()
+
+    def delete(self, session_id):
+        key = self._session_key(session_id)
+        value = self.client.get(key)
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        if value is not None:
+            pipe.srem(self._user_key(int(value)), session_id)
+        pipe.execute()
+
+    def revoke_user(self, user_id):
+        user_key = self._user_key(user_id)
+        session_ids = [sid.decode() if isinstance(sid, bytes) else sid
+                       for sid in self.client.smembers(user_key)]
+        pipe = self.client.pipeline()
+        for session_id in session_ids:
+            pipe.delete(self._session_key(session_id))
+        pipe.delete(user_key)
+        results = pipe.execute()
+        return sum(results[:len(session_ids)])
+
+    def sweep_expired(self):
+        # Сами сессии истекают по TTL; чистим ссылки на них в наборах пользователей
+        removed = 0
+        for user_key in self.client.scan_iter(match=self._user_key('*')):
+            for sid in self.client.smembers(user_key):
+                sid = sid.decode() if isinstance(sid, bytes) else sid
+                if not self.client.exists(self._session_key(sid)):
+                    self.client.srem(user_key, sid)
+                    removed += 1
+        return removed
+
+    def keys(self):
+        prefix_len = len(self._session_key(''))
+        return [
+            (key.decode() if isinstance(key, bytes) else key)[prefix_len:]
+            for key in self.client.scan_iter(match=self._session_key('*'))
+        ]
+
+
+def create_session_store(config):
+    """Создать хранилище сессий по настройкам SESSION_BACKEND / SESSION_TTL"""
+    backend = config.get('SESSION_BACKEND', 'memory')
+    ttl = config.get('SESSION_TTL', DEFAULT_TTL)
+
+    if backend == 'memory':
+        return MemorySessionStore(ttl, config.get('SESSION_MAX_ENTRIES', 10000))
+    if backend == 'sql':
+        return SqlSessionStore(ttl)
+    if backend == 'redis':
+        return RedisSessionStore(ttl, config.get('REDIS_URL', 'redis://localhost:6379/0'))
+    raise ValueError(f'Unknown SESSION_BACKEND: {backend}')
@@ -0,0 +1,67 @@
+from models.db import db
+from models.user import User, Favorite
+from models.recipe import Recipe, Comment, Rating
+from sqlalchemy import delete, func, select, update
+
+# Счетчик пользователя -> (модель, колонка с id пользователя)
+USER_COUNTERS = {
+    'recipes_count': (Recipe, Recipe.author_id),
+    'favorites_count': (Favorite, Favorite.user_id),
+    'comments_count': (Comment, Comment.user_id),
+    'ratings_given': (Rating, Rating.user_id),
+}
+
+
+class UserStatsService:
+    def __init__(self):
+        pass
+
+    def adjust(self, user_id, **deltas):
+        """Изменить счетчики пользователя атомарным UPDATE в текущей транзакции db.session.
+
+        Вызывается до commit вместе с изменением, которое считается.
+        """
+        values = {
+            name: func.coalesce(getattr(User, name), 0) + delta
+            for name, delta in deltas.items() if delta
+        }
+        if not user_id or not values:
+            return
+        db.session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+    def release_recipe(self, recipe_id):
+        """Удалить избранное, комментарии и оценки рецепта, уменьшив счетчики их авторов.
+
+        Для удаления рецепта: у моделей нет каскада, а строки принадлежат другим
+        пользователям. По одному UPDATE и одному DELETE на счетчик, в текущей транзакции.
+        """
+        users = User.__table__
+        for name in ('favorites_count', 'comments_count', 'ratings_given'):
+            model, user_column = USER_COUNTERS[name]
+            per_user = (
+                select(func.count()).select_from(model)
+                .where(user_column == users.c.id, model.recipe_id == recipe_id)
+                .scalar_subquery()
+            )
+            db.session.execute(
+                update(users)
+                .where(users.c.id.in_(select(user_column).where(model.recipe_id == recipe_id)))
+                .values({name: func.coalesce(users.c[name], 0) - per_user})
+            )
+            db.session.execute(delete(model.__table__).where(model.__table__.c.recipe_id == recipe_id))
+
+    def reconcile(self):
+        """Пересчитать счетчики всех пользователей по исходным таблицам одним UPDATE"""
+        users = User.__table__
+        values = {
+            name: select(func.count()).select_from(model).where(user_column == users.c.id).scalar_subquery()
+            for name, (model, user_column) in USER_COUNTERS.items()
+        }
+        result = db.session.execute(update(users).values(**values))
+        db.session.commit()
+        return result.rowcount
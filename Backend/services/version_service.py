@@ -0,0 +1,98 @@
+from datetime import datetime
+from sqlalchemy import bindparam, event, select
+from sqlalchemy.orm import Session
+from models.db import db, dialect_insert
+from models.version import CollectionVersion
+from models.recipe import Recipe, Rating, Comment
+
+RECIPES = 'recipes'
+# Версия списков рецептов разбита на строки по recipe_id % RECIPE_VERSION_SHARDS:
+# записи разных рецептов не конкурируют за одну строку collection_versions
+RECIPE_VERSION_SHARDS = 16
+
+
+def recipe_collection(recipe_id):
+    """Строка версии, в которую попадают изменения рецепта recipe_id"""
+    return f'{RECIPES}:{recipe_id % RECIPE_VERSION_SHARDS}'
+
+
+def recipe_collections(recipe_ids=None):
+    """Строки версий для набора рецептов; без аргумента - все строки списков рецептов"""
+    if recipe_ids is None:
+        return [f'{RECIPES}:{shard}' for shard in range(RECIPE_VERSION_SHARDS)]
+    return sorted({recipe_collection(recipe_id) for recipe_id in recipe_ids})
+
+
+def comments_collection(recipe_id):
+    return f'comments:{recipe_id}'
+
+
+def bump_versions(connection, names):
+    """Увеличить версии коллекций на переданном соединении (в текущей транзакции).
+
+    Один пакетный UPSERT: первое изменение коллекции создает строку с версией 1,
+    и два параллельных первых изменения не падают на первичном ключе.
+    """
+    names = sorted(set(names))  # Один порядок блокировок строк во всех транзакциях
+    if not names:
+        return
+    versions = CollectionVersion.__table__
+    statement = dialect_insert(connection)(versions).values(
+        name=bindparam('name'), version=1, updated_at=bindparam('now')
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'version': versions.c.version + 1, 'updated_at': statement.excluded.updated_at}
+    )
+    now = datetime.utcnow()
+    connection.execute(statement, [{'name': name, 'now': now} for name in names])
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_on_flush(session, flush_context):
+    """ORM-изменения рецептов, оценок и комментариев меняют версии своих коллекций.
+
+    Изображения шагов и варианты меняют версию через touch_recipes (recipe_cache).
+    """
+    names = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Recipe):
+            names.add(recipe_collection(obj.id))
+        elif isinstance(obj, Rating):
+            names.add(recipe_collection(obj.recipe_id))
+        elif isinstance(obj, Comment):
+            names.add(recipe_collection(obj.recipe_id))
+            names.add(comments_collection(obj.recipe_id))
+    if names:
+        bump_versions(session.connection(), names)
+
+
+class VersionService:
+    def __init__(self):
+        pass
+
+    def bump(self, *names):
+        """Явно увеличить версии (для Core-запросов в обход ORM) в транзакции db.session"""
+        bump_versions(db.session.connection(), names)
+
+    def get(self, name):
+        """(версия, время изменения) коллекции; (0, None) если изменений еще не было"""
+        versions = CollectionVersion.__table__
+        row = db.session.execute(
+            select(versions.c.version, versions.c.updated_at).where(versions.c.name == name)
+        ).first()
+        return (row.version, row.updated_at) if row else (0, None)
+
+    def get_many(self, names):
+        """Общая версия набора коллекций одним запросом: (строка версий, последнее изменение)"""
+        versions = CollectionVersion.__table__
+        rows = {
+            row.name: row
+            for row in db.session.execute(
+                select(versions.c.name, versions.c.version, versions.c.updated_at)
+                .where(versions.c.name.in_(names))
+            )
+        }
+        version = '.'.join(str(rows[name].version) if name in rows else '0' for name in names)
+        updated = [row.updated_at for row in rows.values() if row.updated_at]
+        return version, max(updated) if updated else None
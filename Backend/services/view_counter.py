@@ -0,0 +1,116 @@
+import atexit
+import threading
+import time
+from sqlalchemy import bindparam, update
+from models.db import db
+from models.recipe import Recipe
+from services.leaderboard import leaderboard, record_activity
+
+
+class ViewCounter:
+    """Накопитель просмотров рецептов (write-behind).
+
+    Просмотры копятся в памяти процесса и сбрасываются в базу одним
+    пакетным UPDATE ... SET views = views + ? по таймеру, при достижении
+    порога или при завершении процесса.
+    """
+
+    def __init__(self, flush_interval=5.0, flush_threshold=1000):
+        self.app = None
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._pending = {}
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    def init_app(self, app):
+        self.app = app
+        self.flush_interval = app.config.get('VIEW_FLUSH_INTERVAL', self.flush_interval)
+        self.flush_threshold = app.config.get('VIEW_FLUSH_THRESHOLD', self.flush_threshold)
+        atexit.register(self.flush)
+
+    def record(self, recipe_id, count=1):
+        """Учесть просмотр рецепта без записи в базу"""
+        with self._lock:
+            self._pending[recipe_id] = self._pending.get(recipe_id, 0) + count
+            self._pending_total += count
+            should_flush = self._pending_total >= self.flush_threshold
+            self._ensure_timer()
+        leaderboard.record('views', recipe_id, count)
+
+        if should_flush:
+            self.flush()
+
+    def pending(self, recipe_id):
+        """Просмотры рецепта, еще не записанные в базу"""
+        with self._lock:
+            return self._pending.get(recipe_id, 0)
+
+    def _ensure_timer(self):
+        # Вызывается под self._lock
+        if self._timer is None or not self._timer.is_alive():
+            self._timer = threading.Thread(target=self._run, name='view-counter-flush', daemon=True)
+            self._timer.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing view counts: {e}")
+
+    def _take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._pending_total = 0
+        return pending
+
+    def _restore_pending(self, pending):
+        with self._lock:
+            for recipe_id, count in pending.items():
+                self._pending[recipe_id] = self._pending.get(recipe_id, 0) + count
+                self._pending_total += count
+
+    def flush(self):
+        """Записать накопленные просмотры одним пакетным UPDATE"""
+        with self._flush_lock:
+            pending = self._take_pending()
+            if not pending:
+                return 0
+
+            recipes = Recipe.__table__
+            # updated_at не трогаем: просмотр не меняет содержимое рецепта
+            statement = (
+                update(recipes)
+                .where(recipes.c.id == bindparam('recipe_id'))
+                .values(views=recipes.c.views + bindparam('delta'), updated_at=recipes.c.updated_at)
+            )
+            params = [{'recipe_id': recipe_id, 'delta': delta} for recipe_id, delta in pending.items()]
+
+            try:
+                if self.app is not None:
+                    with self.app.app_context():
+                        self._execute(statement, params)
+                else:
+                    self._execute(statement, params)
+            except Exception:
+                # Не теряем просмотры: вернем их в очередь до следующего сброса
+                self._restore_pending(pending)
+                raise
+            return len(params)
+
+    def _execute(self, statement, params):
+        # Отдельное соединение, чтобы не вмешиваться в сессию текущего запроса
+        with db.engine.begin() as connection:
+            connection.execute(statement, params)
+            # Почасовая активность - для рейтингов популярных рецептов за день и неделю
+            record_activity(connection, 'views', {p['recipe_id']: p['delta'] for p in params})
+            # Версии списков не меняем: иначе ETag списков менялся бы с каждым сбросом
+            # и все записи конкурировали бы за строки collection_versions. Число
+            # просмотров в закэшированном клиентом списке может немного отставать
+
+
+view_counter = ViewCounter()
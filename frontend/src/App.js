@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import './App.css';
 import RecipeCard from './components/RecipeCard';
 import RecipeForm from './components/RecipeForm';
@@ -9,7 +9,9 @@ import RecipeDetail from './components/RecipeDetail';
 import UserProfile from './components/UserProfile';
 import RecipeEditForm from './components/RecipeEditForm';
 import Swal from 'sweetalert2';
+import { fetchPage, fetchRecipesByIds } from './api';
 const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:5000';
+const RECIPES_URL = 'http://localhost:5000/api/recipes';
 
 
 function App() {
@@ -18,6 +20,11 @@ function App() {
   const [selectedRecipe, setSelectedRecipe] = useState(null);
   const [view, setView] = useState('main'); // 'main', 'myRecipes', 'recipeBook', 'detail'
   const [loading, setLoading] = useState(false);
+  // Следующая страница текущего списка ({ url, options, cursor }) или null, если страниц больше нет
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Номер загрузки списка: ответ "Загрузить еще" от прежнего списка отбрасывается
+  const listGeneration = useRef(0);
   
   const [currentUser, setCurrentUser] = useState(null);
   const [authView, setAuthView] = useState('login');
@@ -242,12 +249,39 @@ function App() {
     }
   };
 
+  // Первая страница нового списка; курсор запоминается для кнопки "Загрузить еще"
+  const fetchFirstPage = async (url, options = {}) => {
+    listGeneration.current += 1;
+    setNextPage(null);
+    const { items, nextCursor } = await fetchPage(url, options);
+    setNextPage(nextCursor ? { url, options, cursor: nextCursor } : null);
+    return items;
+  };
+
+  // Следующая страница текущего списка дописывается в конец
+  const loadMoreRecipes = async () => {
+    if (!nextPage || loadingMore) return;
+    const generation = listGeneration.current;
+    setLoadingMore(true);
+    try {
+      const { items, nextCursor } = await fetchPage(nextPage.url, nextPage.options, nextPage.cursor);
+      if (generation !== listGeneration.current || !Array.isArray(items)) return;
+      setFilteredRecipes(prev => [...prev, ...items]);
+      if (nextPage.url === RECIPES_URL) {
+        setRecipes(prev => [...prev, ...items]);
+      }
+      setNextPage(nextCursor ? { ...nextPage, cursor: nextCursor } : null);
+    } catch (error) {
+      console.error('Ошибка при загрузке следующей страницы:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchRecipes = async () => {
     setLoading(true);
     try {
-      const response = await fetch("http://localhost:5000/api/recipes");
-      if (!response.ok) throw new Error('Ошибка загрузки рецептов');
-      const data = await response.json();
+      const data = await fetchFirstPage(RECIPES_URL);
       setRecipes(data);
       setFilteredRecipes(data);
     } catch (error) {
@@ -276,15 +310,9 @@ function App() {
 
     setLoading(true);
     try {
-      const response = await fetch('http://localhost:5000/api/recipes/my', {
+      const data = await fetchFirstPage('http://localhost:5000/api/recipes/my', {
         credentials: 'include'
       });
-      
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-      
-      const data = await response.json();
       console.log('My recipes API response:', data); // Для отладки
       
       // Проверяем, что data - массив
@@ -325,6 +353,9 @@ function App() {
     }
 
     setLoading(true);
+    // Книга рецептов загружается целиком по списку id, страниц у нее нет
+    listGeneration.current += 1;
+    setNextPage(null);
     try {
       const response = await fetch('http://localhost:5000/api/auth/favorites', {
         credentials: 'include'
@@ -363,25 +394,8 @@ function App() {
         return;
       }
       
-      // Загружаем информацию о каждом рецепте
-      const recipesPromises = recipeIds.map(async (id) => {
-        try {
-          const recipeResponse = await fetch(`http://localhost:5000/api/recipes/${id}`);
-          if (recipeResponse.ok) {
-            return await recipeResponse.json();
-          } else {
-            console.error(`Failed to fetch recipe ${id}`);
-            return null;
-          }
-        } catch (error) {
-          console.error(`Error fetching recipe ${id}:`, error);
-          return null;
-        }
-      });
-      
-      const recipes = await Promise.all(recipesPromises);
-      // Фильтруем null значения
-      const validRecipes = recipes.filter(recipe => recipe !== null);
+      // Загружаем рецепты пакетами, без отдельного запроса (и просмотра) на каждый
+      const validRecipes = await fetchRecipesByIds(recipeIds);
       console.log('Loaded recipes for favorites:', validRecipes);
       setFilteredRecipes(validRecipes);
       
@@ -402,15 +416,14 @@ function App() {
       } else if (view === 'recipeBook') {
         fetchRecipeBook();
       } else {
-        setFilteredRecipes(Array.isArray(recipes) ? recipes : []);
+        fetchRecipes();
       }
       return;
     }
 
     setLoading(true);
     try {
-      const response = await fetch(`http://localhost:5000/api/recipes/search?q=${encodeURIComponent(query)}`);
-      const data = await response.json();
+      const data = await fetchFirstPage(`http://localhost:5000/api/recipes/search?q=${encodeURIComponent(query)}`);
       
       if (Array.isArray(data)) {
         setFilteredRecipes(data);
@@ -488,13 +501,7 @@ function App() {
 
     setLoading(true);
     try {
-      const response = await fetch(`http://localhost:5000/api/recipes/filter?${params}`);
-      
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-      
-      const data = await response.json();
+      const data = await fetchFirstPage(`http://localhost:5000/api/recipes/filter?${params}`);
       
       if (Array.isArray(data)) {
         setFilteredRecipes(data);
@@ -764,31 +771,45 @@ function App() {
     }
   };
 
-  const checkIfFavorite = async (recipeId) => {
-    if (!currentUser) return false;
+  // Проверки избранного от карточек одного рендера собираются в один запрос
+  const favoriteCheckQueue = useRef(null);
+
+  const flushFavoriteChecks = async () => {
+    const pending = favoriteCheckQueue.current;
+    favoriteCheckQueue.current = null;
+    const ids = Object.keys(pending);
     
+    let flags = {};
     try {
-      const response = await fetch('http://localhost:5000/api/auth/favorites', {
-        credentials: 'include'
+      const response = await fetch('http://localhost:5000/api/auth/favorites/check', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        credentials: 'include',
+        body: JSON.stringify({ recipe_ids: ids.map(Number) })
       });
       
       if (response.ok) {
         const data = await response.json();
-        let favoriteIds = [];
-        
-        if (Array.isArray(data)) {
-          favoriteIds = data;
-        } else if (data && Array.isArray(data.favorites)) {
-          favoriteIds = data.favorites;
-        }
-        
-        return favoriteIds.includes(recipeId);
+        flags = data.favorites || {};
       }
     } catch (error) {
       console.error('Error checking favorites:', error);
     }
     
-    return false;
+    ids.forEach(id => pending[id].forEach(resolve => resolve(Boolean(flags[id]))));
+  };
+
+  const checkIfFavorite = (recipeId) => {
+    if (!currentUser) return Promise.resolve(false);
+    
+    return new Promise(resolve => {
+      if (!favoriteCheckQueue.current) {
+        favoriteCheckQueue.current = {};
+        setTimeout(flushFavoriteChecks, 0);
+      }
+      const pending = favoriteCheckQueue.current;
+      (pending[recipeId] = pending[recipeId] || []).push(resolve);
+    });
   };
 
   const handleAddToFavorites = async (recipeId) => {
@@ -1051,7 +1072,7 @@ function App() {
                 {view === 'myRecipes' && 'Ваши рецепты: '}
                 {view === 'recipeBook' && 'Избранные рецепты: '}
                 {view === 'main' && 'Все рецепты: '}
-                Найдено {Array.isArray(filteredRecipes) ? filteredRecipes.length : 0} рецептов
+                {nextPage ? 'Показано' : 'Найдено'} {Array.isArray(filteredRecipes) ? filteredRecipes.length : 0} рецептов
               </div>
 
               {loading && <div className="loading">Загрузка...</div>}
@@ -1103,6 +1124,19 @@ function App() {
                 />
               ))}
 
+              {!loading && nextPage && (
+                <div style={{ textAlign: 'center', margin: '20px 0' }}>
+                  <button 
+                    onClick={loadMoreRecipes} 
+                    className="submit-btn"
+                    disabled={loadingMore}
+                    style={{ width: 'auto', padding: '12px 30px' }}
+                  >
+                    {loadingMore ? 'Загрузка...' : 'Загрузить еще'}
+                  </button>
+                </div>
+              )}
+
               {/* Модальное окно редактирования */}
               {showEditModal && editingRecipe && (
                 <RecipeEditForm
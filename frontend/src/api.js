@@ -0,0 +1,47 @@
+// Списки API отдаются страницами: курсор следующей страницы приходит
+// в заголовке X-Next-Cursor, на последней странице его нет.
+const PAGE_SIZE = 50;
+// Максимум id в одном запросе /api/recipes/batch
+const BATCH_SIZE = 100;
+
+// Загрузить одну страницу списка: { items, nextCursor }.
+// Следующая страница - тот же url с nextCursor; nextCursor === null - страниц больше нет.
+// Если сервер вернул не массив (например, {error: ...}), он возвращается в items как есть.
+export async function fetchPage(url, options = {}, cursor = null) {
+  const separator = url.includes('?') ? '&' : '?';
+  const pageUrl = `${url}${separator}limit=${PAGE_SIZE}` +
+    (cursor ? `&cursor=${encodeURIComponent(cursor)}` : '');
+  const response = await fetch(pageUrl, options);
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+  const items = await response.json();
+  const nextCursor = Array.isArray(items) ? response.headers.get('X-Next-Cursor') : null;
+  return { items, nextCursor };
+}
+
+// Рецепты по списку id через /api/recipes/batch (до BATCH_SIZE id за запрос,
+// просмотры не засчитываются). Порядок сохраняется, удаленные рецепты пропускаются.
+export async function fetchRecipesByIds(ids) {
+  const recipes = [];
+  for (let start = 0; start < ids.length; start += BATCH_SIZE) {
+    const chunk = ids.slice(start, start + BATCH_SIZE);
+    const response = await fetch('http://localhost:5000/api/recipes/batch', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ ids: chunk })
+    });
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    const byId = await response.json();
+    chunk.forEach(id => {
+      if (byId[id]) {
+        recipes.push(byId[id]);
+      }
+    });
+  }
+  return recipes;
+}
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import RecipeCard from './RecipeCard';
 import './FavoritesPage.css';
+import { fetchRecipesByIds } from '../api';
 
 const FavoritesPage = ({ currentUser, onBack }) => {
   const [favoriteRecipes, setFavoriteRecipes] = useState([]);
@@ -18,13 +19,8 @@ const FavoritesPage = ({ currentUser, onBack }) => {
       
       if (response.ok) {
         const data = await response.json();
-        // data.favorites содержит ID рецептов
-        // Нужно загрузить информацию о каждом рецепте
-        const recipesPromises = data.favorites.map(id =>
-          fetch(`http://localhost:5000/api/recipes/${id}`).then(r => r.json())
-        );
-        
-        const recipes = await Promise.all(recipesPromises);
+        // data.favorites содержит ID рецептов - загружаем их пакетами
+        const recipes = await fetchRecipesByIds(data.favorites);
         setFavoriteRecipes(recipes);
       }
     } catch (error) {
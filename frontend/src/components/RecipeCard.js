@@ -124,7 +124,7 @@ const RecipeCard = ({
     <div className="recipe-card" onClick={() => onView(recipe.id)}>
       <div className="recipe-image">
         {recipe.image_url ? (
-          <img src={`http://localhost:5000${recipe.image_url}`} alt={recipe.title} />
+          <img src={`http://localhost:5000${recipe.card_image_url || recipe.image_url}`} alt={recipe.title} loading="lazy" />
         ) : (
           <div className="image-placeholder">
             <span>📷</span>
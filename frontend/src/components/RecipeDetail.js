@@ -1,11 +1,15 @@
 import React, { useState, useEffect } from 'react';
 import './RecipeDetail.css';
 import Swal from 'sweetalert2';
+import { fetchPage } from '../api';
 
 const RecipeDetail = ({ recipe, currentUser, onBack, onAddToFavorites, onViewProfile }) => {
   const [servings, setServings] = useState(6);
   const [newComment, setNewComment] = useState('');
   const [comments, setComments] = useState(recipe?.comments || []);
+  // Курсор следующей страницы комментариев (null - загружены все)
+  const [commentsCursor, setCommentsCursor] = useState(null);
+  const [loadingComments, setLoadingComments] = useState(false);
   const [loading, setLoading] = useState(false);
   const [selectedServings, setSelectedServings] = useState(recipe?.servings || 6);
 // RecipeDetail.js
@@ -177,30 +181,28 @@ const RecipeDetail = ({ recipe, currentUser, onBack, onAddToFavorites, onViewPro
     };
   };
 
-  // Функция для загрузки комментариев с сервера
-  const fetchComments = async () => {
+  // Функция для загрузки комментариев с сервера: первая страница, остальные - по кнопке
+  const fetchComments = async (cursor = null) => {
+    setLoadingComments(true);
     try {
       console.log('Fetching comments for recipe:', recipe.id);
-      const response = await fetch(`http://localhost:5000/api/recipes/${recipe.id}/comments`, {
+      const { items: data, nextCursor } = await fetchPage(`http://localhost:5000/api/recipes/${recipe.id}/comments`, {
         credentials: 'include'
-      });
-      
-      if (response.ok) {
-        const data = await response.json();
-        // Проверяем, что data - массив
-        if (Array.isArray(data)) {
-          setComments(data);
-        } else {
-          console.error('Comments data is not an array:', data);
-          setComments([]);
-        }
+      }, cursor);
+      // Проверяем, что data - массив
+      if (Array.isArray(data)) {
+        setComments(prev => cursor ? [...prev, ...data] : data);
+        setCommentsCursor(nextCursor);
       } else {
-        console.error('Failed to fetch comments:', response.status);
-        setComments([]);
+        console.error('Comments data is not an array:', data);
+        if (!cursor) setComments([]);
+        setCommentsCursor(null);
       }
     } catch (error) {
       console.error('Error fetching comments:', error);
-      setComments([]);
+      if (!cursor) setComments([]);
+    } finally {
+      setLoadingComments(false);
     }
   };
 
@@ -625,6 +627,17 @@ const RecipeDetail = ({ recipe, currentUser, onBack, onAddToFavorites, onViewPro
           ) : (
             <p>Пока нет комментариев. Будьте первым!</p>
           )}
+          {commentsCursor && (
+            <div style={{ textAlign: 'center', marginTop: '15px' }}>
+              <button 
+                className="recipe-detail-comment-btn"
+                onClick={() => fetchComments(commentsCursor)}
+                disabled={loadingComments}
+              >
+                {loadingComments ? 'Загрузка...' : 'Показать еще комментарии'}
+              </button>
+            </div>
+          )}
         </div>
 
         {currentUser && (
@@ -1,12 +1,18 @@
 // src/components/UserProfile.js
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import './UserProfile.css';
 //import RecipeCard from './RecipeCard';
 import Swal from 'sweetalert2';
+import { fetchPage } from '../api';
 
 const UserProfile = ({ currentUser, profileUserId, onBack, onViewRecipe, onGoToMyRecipes }) => {
   const [userData, setUserData] = useState(null);
   const [userRecipes, setUserRecipes] = useState([]);
+  // Следующая страница списка вкладки ({ url, options, cursor }) или null
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Номер загрузки списка: страница от прежней вкладки или профиля отбрасывается
+  const listGeneration = useRef(0);
   const [loading, setLoading] = useState(true);
   const [isEditing, setIsEditing] = useState(false);
   const [editForm, setEditForm] = useState({
@@ -179,13 +185,18 @@ const UserProfile = ({ currentUser, profileUserId, onBack, onViewRecipe, onGoToM
     }
   };
 
+  // Первая страница списка вкладки, курсор запоминается для кнопки "Загрузить еще"
+  const fetchFirstPage = async (url, options = {}) => {
+    listGeneration.current += 1;
+    setNextPage(null);
+    const { items, nextCursor } = await fetchPage(url, options);
+    setUserRecipes(Array.isArray(items) ? items : []);
+    setNextPage(nextCursor ? { url, options, cursor: nextCursor } : null);
+  };
+
   const fetchUserRecipes = async () => {
     try {
-      const response = await fetch(`http://localhost:5000/api/recipes/user/${profileUserId}`);
-      if (response.ok) {
-        const recipes = await response.json();
-        setUserRecipes(recipes);
-      }
+      await fetchFirstPage(`http://localhost:5000/api/recipes/user/${profileUserId}`);
     } catch (error) {
       console.error('Error fetching user recipes:', error);
     }
@@ -193,18 +204,30 @@ const UserProfile = ({ currentUser, profileUserId, onBack, onViewRecipe, onGoToM
 
   const fetchFavoriteRecipes = async () => {
     try {
-      const response = await fetch('http://localhost:5000/api/auth/favorite-recipes', {
+      await fetchFirstPage('http://localhost:5000/api/auth/favorite-recipes', {
         credentials: 'include'
       });
-      if (response.ok) {
-        const favorites = await response.json();
-        setUserRecipes(favorites);
-      }
     } catch (error) {
       console.error('Error fetching favorite recipes:', error);
     }
   };
 
+  const loadMoreRecipes = async () => {
+    if (!nextPage || loadingMore) return;
+    const generation = listGeneration.current;
+    setLoadingMore(true);
+    try {
+      const { items, nextCursor } = await fetchPage(nextPage.url, nextPage.options, nextPage.cursor);
+      if (generation !== listGeneration.current || !Array.isArray(items)) return;
+      setUserRecipes(prev => [...prev, ...items]);
+      setNextPage(nextCursor ? { ...nextPage, cursor: nextCursor } : null);
+    } catch (error) {
+      console.error('Error loading more recipes:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleEditSubmit = async (e) => {
     e.preventDefault();
     
@@ -255,7 +278,8 @@ const UserProfile = ({ currentUser, profileUserId, onBack, onViewRecipe, onGoToM
           ...prev,
           email: updatedUser.email,
           bio: updatedUser.bio,
-          avatar_url: updatedUser.avatar_url || prev.avatar_url
+          avatar_url: updatedUser.avatar_url || prev.avatar_url,
+          avatar_thumb_url: updatedUser.avatar_thumb_url || prev.avatar_thumb_url
         }));
         
         // Обновляем превью аватара
@@ -426,7 +450,8 @@ const UserProfile = ({ currentUser, profileUserId, onBack, onViewRecipe, onGoToM
         
         setUserData(prev => ({
           ...prev,
-          avatar_url: updatedUser.avatar_url
+          avatar_url: updatedUser.avatar_url,
+          avatar_thumb_url: updatedUser.avatar_thumb_url
         }));
         
         setEditForm(prev => ({ ...prev, avatar: null }));
@@ -468,6 +493,22 @@ const UserProfile = ({ currentUser, profileUserId, onBack, onViewRecipe, onGoToM
     }
   ];
 
+  // Пока загружены не все страницы, число рецептов берется из счетчиков профиля
+  const listTotal = activeTab === 'favorites' ? userData?.favorites_count : userData?.recipes_count;
+  const listCount = nextPage && listTotal ? listTotal : userRecipes.length;
+
+  const loadMoreButton = nextPage && (
+    <div style={{ textAlign: 'center', marginTop: '20px' }}>
+      <button 
+        className="create-first-recipe"
+        onClick={loadMoreRecipes}
+        disabled={loadingMore}
+      >
+        {loadingMore ? 'Загрузка...' : 'Загрузить еще'}
+      </button>
+    </div>
+  );
+
   if (loading) {
     return <div className="loading">Загрузка профиля...</div>;
   }
@@ -486,7 +527,7 @@ const UserProfile = ({ currentUser, profileUserId, onBack, onViewRecipe, onGoToM
           <div className="profile-avatar-section">
             <div className="avatar-container">
               <img 
-                src={`http://localhost:5000${userData.avatar_url} `} 
+                src={`http://localhost:5000${userData.avatar_thumb_url || userData.avatar_url}`} 
                 alt={userData?.username}
                 className="profile-avatar"
               />
@@ -717,9 +758,9 @@ const UserProfile = ({ currentUser, profileUserId, onBack, onViewRecipe, onGoToM
           {activeTab === 'recipes' && (
             <>
               <div className="recipes-count">
-                {userRecipes.length} рецепт{userRecipes.length % 10 === 1 && userRecipes.length % 100 !== 11 ? '' : 
-                 userRecipes.length % 10 >= 2 && userRecipes.length % 10 <= 4 && 
-                 (userRecipes.length % 100 < 10 || userRecipes.length % 100 >= 20) ? 'а' : 'ов'}
+                {listCount} рецепт{listCount % 10 === 1 && listCount % 100 !== 11 ? '' : 
+                 listCount % 10 >= 2 && listCount % 10 <= 4 && 
+                 (listCount % 100 < 10 || listCount % 100 >= 20) ? 'а' : 'ов'}
               </div>
 
               {userRecipes.length === 0 ? (
@@ -746,7 +787,7 @@ const UserProfile = ({ currentUser, profileUserId, onBack, onViewRecipe, onGoToM
                       <div className="recipe-image-container">
                         {recipe.image_url ? (
                           <img 
-                            src={`http://localhost:5000${recipe.image_url}`} 
+                            src={`http://localhost:5000${recipe.card_image_url || recipe.image_url}`} 
                             alt={recipe.title}
                             onError={(e) => {
                               e.target.onerror = null;
@@ -776,16 +817,17 @@ const UserProfile = ({ currentUser, profileUserId, onBack, onViewRecipe, onGoToM
                   ))}
                 </div>
               )}
+              {loadMoreButton}
             </>
           )}
 
           {activeTab === 'favorites' && isOwnProfile && (
             <>
               <div className="recipes-count">
-                {userRecipes.length} избранн{userRecipes.length === 1 ? 'ый' : 
-                 userRecipes.length >= 2 && userRecipes.length <= 4 ? 'ых' : 'ых'} рецепт{userRecipes.length % 10 === 1 && userRecipes.length % 100 !== 11 ? '' : 
-                 userRecipes.length % 10 >= 2 && userRecipes.length % 10 <= 4 && 
-                 (userRecipes.length % 100 < 10 || userRecipes.length % 100 >= 20) ? 'а' : 'ов'}
+                {listCount} избранн{listCount === 1 ? 'ый' : 
+                 listCount >= 2 && listCount <= 4 ? 'ых' : 'ых'} рецепт{listCount % 10 === 1 && listCount % 100 !== 11 ? '' : 
+                 listCount % 10 >= 2 && listCount % 10 <= 4 && 
+                 (listCount % 100 < 10 || listCount % 100 >= 20) ? 'а' : 'ов'}
               </div>
 
               {userRecipes.length === 0 ? (
@@ -805,7 +847,7 @@ const UserProfile = ({ currentUser, profileUserId, onBack, onViewRecipe, onGoToM
                       <div className="recipe-image-container">
                         {recipe.image_url ? (
                           <img 
-                            src={`http://localhost:5000${recipe.image_url}`} 
+                            src={`http://localhost:5000${recipe.card_image_url || recipe.image_url}`} 
                             alt={recipe.title}
                             onError={(e) => {
                               e.target.onerror = null;
@@ -836,6 +878,7 @@ const UserProfile = ({ currentUser, profileUserId, onBack, onViewRecipe, onGoToM
                   ))}
                 </div>
               )}
+              {loadMoreButton}
             </>
           )}
         </div>